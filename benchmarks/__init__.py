@@ -0,0 +1,5 @@
+"""
+Benchmarks and offline test fixtures for DomainCatcher.
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_whois_parser``.
+"""
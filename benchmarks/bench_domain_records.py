@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Memory and access-cost benchmark for DomainRecord vs the old domain_info dicts.
+
+Builds a status cache's worth of WHOIS-style results both ways and reports
+traced memory per domain (and extrapolated to a million domains), then
+times the per-check reads that used to parse date strings: the lifecycle
+policy's next transition and the status cache's freshness check. A round
+trip through dict(record) is checked against the source dicts first.
+
+    python -m benchmarks.bench_domain_records --domains 1000000
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from domain_record import DomainRecord
+from lifecycle import LifecyclePolicy
+from status_cache import StatusCache
+
+REGISTRARS = ('GoDaddy.com, LLC', 'NameCheap, Inc.', 'Tucows Domains Inc.', 'Dynadot Inc')
+STATUSES = ('registered', 'registered', 'registered', 'expired', 'pendingDelete')
+
+
+def domain_infos(count):
+    """Checker-style dicts; registrar names are fresh strings, as when parsed out of each response"""
+    for i in range(count):
+        yield {
+            'domain': f"example{i}.com",
+            'status': STATUSES[i % len(STATUSES)],
+            'expiry_date': f"20{27 + i % 3}-0{1 + i % 9}-1{i % 10}T04:00:00+00:00",
+            'registrar': ''.join(REGISTRARS[i % len(REGISTRARS)]),
+            'epp_status': ['clientTransferProhibited'],
+            'last_updated': datetime.now().isoformat(),
+            'source': 'free_whois'
+        }
+
+
+def traced(build):
+    """(result, bytes still allocated by build)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def verify(count=1000):
+    """Round-trip dicts through records; returns the number of mismatches"""
+    failures = 0
+    for info in domain_infos(count):
+        back = dict(DomainRecord.from_dict(info))
+        for key in ('domain', 'status', 'expiry_date', 'registrar', 'epp_status', 'source'):
+            want, got = info[key], back[key]
+            if key == 'epp_status':
+                want, got = list(want), list(got)
+            if want != got:
+                failures += 1
+                print(f"MISMATCH {info['domain']} {key}: expected {want!r}, got {got!r}")
+    return failures
+
+
+def per_call(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--domains', type=int, default=200000, help='domains to hold in memory')
+    parser.add_argument('--calls', type=int, default=50000, help='timed calls per access case')
+    args = parser.parse_args()
+    n = args.domains
+
+    failures = verify()
+    print(f"Verified dict round trip: {failures} mismatches")
+
+    dicts, dict_bytes = traced(lambda: {info['domain']: info for info in domain_infos(n)})
+    records, record_bytes = traced(lambda: {info['domain']: DomainRecord.from_dict(info) for info in dicts.values()})
+    # The domain strings (and the mapping) are shared by both; count them once, with the dicts
+    print(f"{'':10s} {'B/domain':>9s} {'MiB per million':>16s}")
+    print(f"{'dicts':10s} {dict_bytes / n:9.0f} {dict_bytes / n * 1e6 / 2**20:16.0f}")
+    print(f"{'records':10s} {record_bytes / n:9.0f} {record_bytes / n * 1e6 / 2**20:16.0f}   "
+          f"({dict_bytes / record_bytes:.1f}x smaller)")
+
+    policy = LifecyclePolicy()
+    sample_dicts = list(dicts.values())[:args.calls]
+    sample_records = [records[info['domain']] for info in sample_dicts]
+    print(f"\n{'case':32s} {'dict µs':>8s} {'record µs':>10s}")
+    before = per_call(lambda info: policy.next_transition(info, 'registered'), sample_dicts)
+    after = per_call(lambda info: policy.next_transition(info, 'registered'), sample_records)
+    print(f"{'lifecycle next_transition':32s} {before:8.2f} {after:10.2f}")
+
+    cache = StatusCache(db=None, max_entries=len(sample_records))
+    cache.put_many(sample_records)
+    names = [record.domain for record in sample_records]
+    hit = per_call(cache.get, names)
+    print(f"{'status cache hit':32s} {'':>8s} {hit:10.2f}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
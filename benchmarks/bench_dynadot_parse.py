@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the Dynadot response layer.
+
+Checks that dynadot_responses agrees with the legacy dict walk on every
+response shape Dynadot has returned, then times decoding and parsing one
+response of each kind: the per-probe single-domain search, a 100-domain
+sweep batch and a register result. Legacy is requests' response.json()
+decoding plus the nested shape checks DynadotAPI used to run on every probe.
+
+    python -m benchmarks.bench_dynadot_parse --iterations 200000
+"""
+import argparse
+import json
+import sys
+import time
+
+from dynadot_responses import JSON_BACKEND, loads, parse_register, parse_search
+
+
+def search_body(domains, available=(), shape='list'):
+    """Encoded search response for domains in one of the shapes Dynadot has used"""
+    entries = [{'DomainName': domain, 'Available': 'yes' if domain in available else 'no'} for domain in domains]
+    if shape == 'list':
+        search = {'ResponseCode': '0', 'SearchResults': entries}
+    elif shape == 'object':
+        search = {'ResponseCode': '0', 'SearchResults': {'Domain': {'Available': entries[0]['Available']}}}
+    elif shape == 'domain':
+        search = {'ResponseCode': '0', 'Domain': [{'Name': e['DomainName'].upper(), 'Available': e['Available']}
+                                                  for e in entries]}
+    elif shape == 'priced':
+        search = {'ResponseCode': '0', 'SearchResults': [dict(e, Price='8.99 in USD') for e in entries]}
+    else:
+        search = {'ResponseCode': '-1', 'Error': 'Too many requests'}
+    return json.dumps({'SearchResponse': search}).encode('utf-8')
+
+
+def legacy_search(result, domains):
+    """The pre-layer DynadotAPI._parse_search_response, kept for comparison"""
+    if not isinstance(result, dict) or 'SearchResponse' not in result:
+        return None
+    search_response = result['SearchResponse']
+    if search_response.get('ResponseCode') != '0':
+        # Legacy read an API error as "not available"; the layer reports it as unknown
+        return dict.fromkeys(domains)
+    availability = {domain: False for domain in domains}
+    if 'SearchResults' in search_response:
+        search_results = search_response['SearchResults']
+        if isinstance(search_results, list):
+            entries = search_results
+        elif isinstance(search_results, dict) and 'Domain' in search_results:
+            entries = search_results['Domain']
+        else:
+            return None
+    elif 'Domain' in search_response:
+        entries = search_response['Domain']
+    else:
+        return None
+    if isinstance(entries, dict):
+        entries = [entries]
+    by_name = {domain.lower(): domain for domain in domains}
+    for index, domain_info in enumerate(entries):
+        name = domain_info.get('DomainName') or domain_info.get('Name')
+        if name:
+            domain = by_name.get(name.lower())
+        else:
+            domain = domains[index] if index < len(domains) else None
+        if domain is None:
+            continue
+        availability[domain] = str(domain_info.get('Available', 'no')).lower() in ('yes', 'true')
+    return availability
+
+
+def legacy_register(result):
+    """The pre-layer register_domain branches, returning (success, error)"""
+    if 'RegisterResponse' in result:
+        register_response = result['RegisterResponse']
+        if 'SuccessCode' in register_response:
+            if register_response['SuccessCode'] == '0':
+                return True, None
+            return False, register_response.get('Error', 'Unknown error')
+        elif 'Status' in register_response:
+            if register_response['Status'].lower() == 'success':
+                return True, None
+            return False, register_response.get('Error', 'Unknown error')
+    return None
+
+
+def legacy_decode(body):
+    """What requests' Response.json() does for a UTF-8 body without a charset"""
+    return json.loads(body.decode('utf-8'))
+
+
+def verify():
+    """Compare the new layer with the legacy walk on every shape; returns the number of mismatches"""
+    batch = [f"sweep{i}.com" for i in range(100)]
+    cases = [
+        (search_body(['example.com']), ['example.com']),
+        (search_body(['example.com'], {'example.com'}), ['example.com']),
+        (search_body(['Example.COM'], {'Example.COM'}), ['example.com']),
+        (search_body(['example.com'], {'example.com'}, 'object'), ['example.com']),
+        (search_body(['a.com', 'b.com'], {'b.com'}, 'domain'), ['a.com', 'b.com']),
+        (search_body(['a.com', 'b.com'], {'a.com'}, 'priced'), ['a.com', 'b.com']),
+        (search_body(['example.com'], shape='error'), ['example.com']),
+        (search_body(batch, set(batch[::7])), batch),
+        (search_body(list(reversed(batch)), set(batch[::3])), batch),
+        (b'{"Response": {"ResponseCode": "-1", "Error": "too many requests"}}', ['example.com']),
+    ]
+    failures = 0
+    for body, domains in cases:
+        want = legacy_search(legacy_decode(body), domains)
+        search = parse_search(loads(body), domains)
+        got = search.availability(domains) if search is not None else None
+        if got != want:
+            failures += 1
+            print(f"MISMATCH search {body[:80]!r}: expected {want}, got {got}")
+
+    for body in (b'{"RegisterResponse": {"SuccessCode": "0", "DomainName": "a.com"}}',
+                 b'{"RegisterResponse": {"SuccessCode": "1", "Error": "domain not available"}}',
+                 b'{"RegisterResponse": {"Status": "success"}}',
+                 b'{"RegisterResponse": {"Status": "error", "Error": "insufficient balance"}}',
+                 b'{"Response": {"ResponseCode": "-1"}}'):
+        want = legacy_register(legacy_decode(body))
+        result = parse_register(loads(body))
+        got = (result.success, result.error) if result is not None else None
+        if got != want:
+            failures += 1
+            print(f"MISMATCH register {body!r}: expected {want}, got {got}")
+    return failures
+
+
+def bench(func, iterations, repeat):
+    """Best per-call time in µs over repeat rounds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50000, help='parses per round for single-domain cases')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds per case; the best is reported')
+    args = parser.parse_args()
+
+    failures = verify()
+    print(f"Verified response shapes: {failures} mismatches (decoder: {JSON_BACKEND})")
+
+    probe = search_body(['example.com'])
+    batch_domains = [f"sweep{i}.com" for i in range(100)]
+    batch = search_body(batch_domains, set(batch_domains[::10]))
+    register = b'{"RegisterResponse": {"SuccessCode": "1", "Error": "domain not available"}}'
+    cases = [
+        ('probe (1 domain)', args.iterations,
+         lambda: legacy_search(legacy_decode(probe), ['example.com'])['example.com'],
+         lambda: parse_search(loads(probe), ['example.com']).is_available('example.com')),
+        ('sweep batch (100 domains)', max(1, args.iterations // 50),
+         lambda: legacy_search(legacy_decode(batch), batch_domains),
+         lambda: parse_search(loads(batch), batch_domains).availability(batch_domains)),
+        ('register result', args.iterations,
+         lambda: legacy_register(legacy_decode(register)),
+         lambda: parse_register(loads(register)).success),
+    ]
+    print(f"{'case':28s} {'legacy µs':>10s} {'new µs':>10s} {'speedup':>8s}")
+    for label, iterations, legacy, new in cases:
+        before = bench(legacy, iterations, args.repeat)
+        after = bench(new, iterations, args.repeat)
+        print(f"{label:28s} {before:10.2f} {after:10.2f} {before / after:7.2f}x")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
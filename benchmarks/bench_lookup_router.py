@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Simulated sweep through LookupRouter with registries of very different limits.
+
+The watchlist lists the strict registry's domains first, the worst case for
+one global queue. Each simulated server records its peak concurrency and
+request rate so the run also checks that no per-server budget was exceeded.
+The result is compared with one global budget that is safe for the strictest
+server (the old single pacing rule). The first route() for each server
+blocks like an IANA referral or RDAP bootstrap fetch would; the other
+servers' lookups must not wait for it.
+
+    python -m benchmarks.bench_lookup_router
+"""
+import sys
+import threading
+import time
+from collections import deque
+
+from lookup_router import LookupRouter
+
+# server -> (domains, rate/s, concurrency, latency seconds)
+SERVERS = {
+    'strict.example': (10, 2, 1, 0.30),
+    'medium.example': (100, 20, 4, 0.05),
+    'fast.example': (300, 100, 8, 0.02),
+}
+DISCOVERY = {'strict.example': 1.0}  # Seconds the first route() to a server blocks
+
+
+class SimulatedServer:
+    def __init__(self, latency):
+        self.latency = latency
+        self.active = 0
+        self.max_active = 0
+        self.starts = deque()
+        self.lock = threading.Lock()
+
+    def query(self):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.starts.append(time.monotonic())
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+
+    def peak_rate(self, window=1.0):
+        """Most requests started within any `window` seconds"""
+        starts = list(self.starts)
+        peak = 0
+        first = 0
+        for last in range(len(starts)):
+            while starts[last] - starts[first] >= window:
+                first += 1
+            peak = max(peak, last - first + 1)
+        return peak
+
+
+def main():
+    servers = {name: SimulatedServer(latency) for name, (_, _, _, latency) in SERVERS.items()}
+    limits = {name: {'rate': rate, 'concurrency': concurrency}
+              for name, (_, rate, concurrency, _) in SERVERS.items()}
+    limits['default'] = {'rate': 1, 'concurrency': 1}
+    watchlist = [f"domain{i}.{name}" for name, (count, _, _, _) in SERVERS.items() for i in range(count)]
+
+    discovered = set()
+    discovery_lock = threading.Lock()
+
+    def server_of(domain):
+        return domain.split('.', 1)[1]
+
+    def route(domain):
+        server = server_of(domain)
+        with discovery_lock:
+            delay = 0 if server in discovered else DISCOVERY.get(server, 0)
+            discovered.add(server)
+        time.sleep(delay)
+        return server
+
+    def lookup(domain):
+        servers[server_of(domain)].query()
+        return 'ok'
+
+    finished = {name: None for name in SERVERS}
+    remaining = {name: count for name, (count, _, _, _) in SERVERS.items()}
+    router = LookupRouter(route, lookup, limits=limits, workers=16, route_key=server_of)
+    start = time.monotonic()
+    for domain, result in router.run(iter(watchlist)):
+        server = server_of(domain)
+        remaining[server] -= 1
+        if remaining[server] == 0:
+            finished[server] = time.monotonic() - start
+    elapsed = time.monotonic() - start
+
+    failures = 0
+    print(f"Routed sweep: {len(watchlist)} lookups in {elapsed:.2f}s")
+    for name, (count, rate, concurrency, _) in SERVERS.items():
+        server = servers[name]
+        # A lane banks at most one lookup, so no second may see more than rate + 1
+        ok = server.max_active <= concurrency and server.peak_rate() <= rate + 1
+        failures += not ok
+        print(f"  {name:15s} {count:4d} lookups done at {finished[name]:5.2f}s, "
+              f"peak {server.max_active}/{concurrency} concurrent, {server.peak_rate()}/{rate} per second"
+              f"{'' if ok else '  BUDGET EXCEEDED'}")
+
+    strictest = min(rate for _, rate, _, _ in SERVERS.values())
+    print(f"One global budget safe for the strictest server ({strictest}/s): "
+          f"~{len(watchlist) / strictest:.0f}s for the same watchlist")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+End-to-end scenarios against the local Dynadot and Discord mocks.
+
+catch   Domains drop at known instants. DomainCatcher.catch_domain is given a
+        predicted drop time with a configurable error and the configured
+        strategy; concurrent catches share one ProbeBatcher as under
+        CatchExecutor. Reports probes per second, success rate and the delay from
+        the drop to the successful register command (p50/p99).
+sweep   DomainStatusChecker.monitor_all_domains over a generated watchlist
+        in Dynadot mode. Reports domains checked per second and requests sent.
+notify  A burst of notifications through NotificationManager to a
+        rate-limited webhook. Reports the time until all are delivered.
+
+Results are written as JSON. --compare prints the change from an earlier run.
+
+    python -m benchmarks.bench_scenarios --output results.json
+    python -m benchmarks.bench_scenarios --scenarios catch --latency 0.05 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.mock_server import DiscordStubServer, DynadotStubServer
+from catcher import DomainCatcher, ProbeBatcher
+from check_status import DomainStatusChecker
+from dynadot_api import DynadotAPI
+from notify import NotificationManager
+from rate_limiter import RateLimiter
+
+SCENARIOS = ('catch', 'sweep', 'notify')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, or None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def run_catch(args, dynadot, notifier):
+    """Concurrent catches of domains dropping shortly after the start"""
+    rng = random.Random(args.seed)
+    start = time.time()
+    drops = {}
+    predicted = {}
+    for i in range(args.catches):
+        domain = f"catch{i}-{int(start)}.com"
+        drops[domain] = start + args.drop_in + rng.uniform(0, args.drop_spread)
+        dynadot.add_drop(domain, drops[domain])
+        # The scheduler's prediction is never exact
+        error = rng.uniform(-args.drop_error, args.drop_error)
+        predicted[domain] = datetime.fromtimestamp(drops[domain] + error, timezone.utc)
+
+    batcher = ProbeBatcher()
+
+    def catch(domain):
+        catcher = DomainCatcher(notifier=notifier)
+        catcher.probe_batcher = batcher
+        catcher.dynadot_api = DynadotAPI(api_url=dynadot.api_url, api_key='bench')
+        catcher.dynadot_key = 'bench'
+        try:
+            return catcher.catch_domain(domain, max_duration_minutes=args.catch_minutes, drop_time=predicted[domain],
+                                        strategy=args.strategy, pipeline_depth=args.pipeline_depth)
+        finally:
+            catcher.cleanup()
+
+    searches_before = dynadot.commands.get('search', 0)
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.catches) as executor:
+        caught = list(executor.map(catch, drops))
+    elapsed = time.monotonic() - started
+    searches = dynadot.commands.get('search', 0) - searches_before
+    notifier.flush(timeout=30)  # Success notifications should not spill into the next scenario
+
+    delays = [dynadot.registered[domain] - drops[domain] for domain in drops if domain in dynadot.registered]
+    return {
+        'catches': args.catches,
+        'success_rate': round(sum(caught) / len(caught), 4),
+        'probes': searches,
+        'probes_per_second': round(searches / elapsed, 2),
+        'drop_to_register_p50_ms': round(percentile(delays, 0.50) * 1000, 2) if delays else None,
+        'drop_to_register_p99_ms': round(percentile(delays, 0.99) * 1000, 2) if delays else None,
+        'drop_to_register_max_ms': round(max(delays) * 1000, 2) if delays else None,
+        'elapsed_s': round(elapsed, 3)
+    }
+
+
+def run_sweep(args, dynadot):
+    """Full Dynadot-mode sweep of a generated watchlist"""
+    with open('domains.txt', 'w', encoding='utf-8') as f:
+        f.writelines(f"sweep{i}.com\n" for i in range(args.sweep_domains))
+
+    checker = DomainStatusChecker()
+    checker.source = 'dynadot'
+    checker.dynadot_api = DynadotAPI(api_url=dynadot.api_url, api_key='bench')
+    checker.rate_limiter = RateLimiter(args.sweep_rps)
+    checker.shard = None
+
+    requests_before, limited_before = dynadot.requests, dynadot.rate_limited
+    started = time.monotonic()
+    checker.monitor_all_domains(workers=args.sweep_workers)
+    elapsed = time.monotonic() - started
+    requests_made = dynadot.requests - requests_before
+    return {
+        'domains': args.sweep_domains,
+        'workers': args.sweep_workers,
+        'requests': requests_made,
+        'rate_limited': dynadot.rate_limited - limited_before,
+        'domains_per_second': round(args.sweep_domains / elapsed, 1),
+        'elapsed_s': round(elapsed, 3)
+    }
+
+
+def run_notify(args, discord, notifier):
+    """A burst of status notifications through the background workers"""
+    posts_before, embeds_before, limited_before = discord.posts, discord.embeds, discord.rate_limited
+    started = time.monotonic()
+    for i in range(args.notifications):
+        notifier.send_monitoring_notification(f"notify{i}.com", 'pendingDelete', 'Bench Registrar')
+    delivered = notifier.flush(timeout=60)
+    elapsed = time.monotonic() - started
+    return {
+        'notifications': args.notifications,
+        'delivered': delivered,
+        'posts': discord.posts - posts_before,
+        'embeds': discord.embeds - embeds_before,
+        'rate_limited': discord.rate_limited - limited_before,
+        'queue': notifier.get_queue_stats(),
+        'elapsed_s': round(elapsed, 3)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, previous):
+    """Print each numeric result next to the earlier run's value"""
+    for scenario, values in results['scenarios'].items():
+        before = previous.get('scenarios', {}).get(scenario, {})
+        for key, value in values.items():
+            old = before.get(key)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and not isinstance(value, bool):
+                change = f"{(value - old) / old:+.1%}" if old else 'n/a'
+                print(f"{scenario:7s} {key:26s} {old:>12} -> {value:<12} {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.02, help='mock API latency in seconds (default 0.02)')
+    parser.add_argument('--jitter', type=float, default=0.005, help='+/- latency jitter in seconds')
+    parser.add_argument('--rate-limit', type=int, default=None, help='mock Dynadot requests per second (default unlimited)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--catches', type=int, default=10, help='concurrent catches')
+    parser.add_argument('--drop-in', type=float, default=3.0, help='seconds until the first drop')
+    parser.add_argument('--drop-spread', type=float, default=1.0, help='drops spread over this many seconds')
+    parser.add_argument('--drop-error', type=float, default=0.5, help='+/- error of the predicted drop time (s)')
+    parser.add_argument('--catch-minutes', type=float, default=0.5, help='catch window after the predicted drop')
+    parser.add_argument('--strategy', default=None, help='catch strategy (default CATCH_STRATEGY)')
+    parser.add_argument('--pipeline-depth', type=int, default=None, help='probe connections per catch')
+    parser.add_argument('--sweep-domains', type=int, default=5000)
+    parser.add_argument('--sweep-workers', type=int, default=8)
+    parser.add_argument('--sweep-rps', type=float, default=0, help='sweep request budget (default 0 = unlimited)')
+    parser.add_argument('--notifications', type=int, default=50)
+    parser.add_argument('--discord-rate-limit', type=int, default=5, help='webhook posts per second')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'scenarios': {}
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            DynadotStubServer(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                              seed=args.seed) as dynadot, \
+            DiscordStubServer(latency=args.latency, rate_limit=args.discord_rate_limit) as discord:
+        os.chdir(tmp)  # domains.db and domains.txt for the run live here
+        try:
+            notifier = NotificationManager()
+            notifier.discord_webhook = discord.webhook_url
+            notifier.email_username = None  # Never send real mail from a benchmark
+            for name in scenarios:
+                print(f"Running {name}...", file=sys.stderr)
+                if name == 'catch':
+                    results['scenarios'][name] = run_catch(args, dynadot, notifier)
+                elif name == 'sweep':
+                    results['scenarios'][name] = run_sweep(args, dynadot)
+                else:
+                    results['scenarios'][name] = run_notify(args, discord, notifier)
+            notifier.close()
+        finally:
+            os.chdir(cwd)
+
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
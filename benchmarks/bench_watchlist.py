@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Watchlist sync benchmark on a generated million-line domains.txt.
+
+Times the initial sync, a no-op refresh (same mtime), a touched-but-identical
+file (hash check only), a small edit (incremental diff) and a full streaming
+pass over the watched domains, and reports peak Python memory for each step.
+
+    python -m benchmarks.bench_watchlist --domains 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from database import DomainDatabase
+from watchlist import Watchlist
+
+
+def write_watchlist(path, count, seed=1):
+    """Mixed-case domains with ~5% duplicates and a few comments"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# generated watchlist\n')
+        for i in range(count):
+            if i and rng.random() < 0.05:
+                n = rng.randrange(i)  # duplicate of an earlier entry, different case
+                f.write(f"DOMAIN{n}.COM\n")
+            else:
+                f.write(f"Domain{i}.com\n")
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:28s} {elapsed:7.2f}s  peak {peak / 1024 / 1024:6.1f} MiB  {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--domains', type=int, default=1000000, help='lines in the generated file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'domains.txt')
+        write_watchlist(path, args.domains)
+        print(f"Generated {args.domains} lines ({os.path.getsize(path) / 1024 / 1024:.1f} MiB)")
+
+        watchlist = Watchlist(path, db=DomainDatabase(os.path.join(tmp, 'domains.db')))
+        measure('initial sync', watchlist.refresh)
+        measure('refresh, file untouched', watchlist.refresh)
+
+        os.utime(path)
+        measure('refresh, touched only', watchlist.refresh)
+
+        # Small edit: drop the first 10 domains, append 10 new ones
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:1] + lines[11:])
+            f.writelines(f"Added{i}.net\n" for i in range(10))
+        del lines
+        measure('refresh, 10 added/10 removed', watchlist.refresh)
+
+        measure('stream all watched domains', lambda: sum(1 for _ in watchlist.domains()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for whois_parser against the bundled WHOIS corpus.
+
+Checks every sample against expected.json, then parses the corpus repeated
+up to --records responses with the single-pass parser and with the legacy
+FreeWhoisChecker approach (lowercase + substring scans + uncompiled regexes).
+
+    python -m benchmarks.bench_whois_parser --records 100000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from whois_parser import parse_whois
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'whois_corpus')
+
+
+def load_corpus():
+    """Return {filename: text} for every sample in the corpus"""
+    samples = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.txt'):
+            with open(os.path.join(CORPUS_DIR, name), 'r', encoding='utf-8') as f:
+                samples[name] = f.read()
+    return samples
+
+
+def verify(samples):
+    """Compare parser output with expected.json; returns the number of mismatches"""
+    with open(os.path.join(CORPUS_DIR, 'expected.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    as_of = datetime.fromisoformat(expected['as_of'])
+
+    failures = 0
+    for name, want in expected['samples'].items():
+        record = parse_whois(samples[name])
+        got = {
+            'status': record.status_at(as_of),
+            'registrar': record.registrar,
+            'expiry': record.expiry.isoformat() if record.expiry else None
+        }
+        if got != want:
+            failures += 1
+            print(f"MISMATCH {name}: expected {want}, got {got}")
+    return failures
+
+
+def legacy_parse(text):
+    """The pre-parser FreeWhoisChecker logic, kept for comparison"""
+    output = text.lower()
+    info = {'status': 'unknown', 'registrar': 'unknown', 'expiry_date': ''}
+    for status in ['pendingdelete', 'redemptionperiod', 'pending delete', 'redemption period',
+                   'clientdeleteprohibited', 'pendingdeleteperiod', 'redemption', 'pending delete period']:
+        if status in output:
+            info['status'] = 'pendingDelete'
+            break
+    for pattern in [r'registrar:\s*(.+)', r'registrar name:\s*(.+)',
+                    r'registrar organization:\s*(.+)', r'registrar\s*:\s*(.+)']:
+        match = re.search(pattern, output, re.IGNORECASE)
+        if match:
+            info['registrar'] = re.sub(r'\s+', ' ', match.group(1).strip())
+            break
+    for pattern in [r'expires?:\s*(.+)', r'expiry date:\s*(.+)',
+                    r'expiration date:\s*(.+)', r'expires on:\s*(.+)']:
+        match = re.search(pattern, output, re.IGNORECASE)
+        if match:
+            info['expiry_date'] = re.sub(r'\s+', ' ', match.group(1).strip())
+            break
+    if info['expiry_date']:
+        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', info['expiry_date'])
+        if date_match and datetime.fromisoformat(date_match.group(1)) < datetime.now():
+            info['status'] = 'expired'
+    return info
+
+
+def run(parse, texts):
+    start = time.perf_counter()
+    for text in texts:
+        parse(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000, help='responses to parse (default 100000)')
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the new parser')
+    args = parser.parse_args()
+
+    samples = load_corpus()
+    failures = verify(samples)
+    print(f"Corpus: {len(samples)} samples, {failures} mismatches")
+
+    corpus = list(samples.values())
+    texts = (corpus * (args.records // len(corpus) + 1))[:args.records]
+    total_kb = sum(len(text) for text in texts) / 1024
+
+    elapsed = run(parse_whois, texts)
+    print(f"whois_parser: {args.records} responses ({total_kb:.0f} KiB) in {elapsed:.2f}s "
+          f"({elapsed / args.records * 1e6:.1f} us/response)")
+
+    if not args.skip_legacy:
+        legacy = run(legacy_parse, texts)
+        print(f"legacy:       {args.records} responses in {legacy:.2f}s "
+              f"({legacy / args.records * 1e6:.1f} us/response, {legacy / elapsed:.1f}x slower)")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
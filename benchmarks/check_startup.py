@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget check for health_server.py.
+
+Starts the server as a subprocess in an empty working directory (empty
+watchlist and database, notifications and API keys blanked so nothing
+leaves the machine), then polls until /health answers and until /ready
+reports the scheduler running. Each run is timed from the spawn; the check
+fails (exit status 1) if any run exceeds a budget. The cost of starting an
+interpreter and importing Flask, which no server can avoid, is printed for
+reference. --cached-statuses seeds the status cache table first, so the
+scheduler has a real warm-up to do while /health is already answering.
+
+    python -m benchmarks.check_startup --runs 5 --health-budget 1.0 --ready-budget 10
+    python -m benchmarks.check_startup --cached-statuses 100000
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from database import DomainDatabase
+from domain_record import DomainRecord
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def poll(url, deadline, expect=200):
+    """(monotonic time url first answered with expect, its JSON body), or (None, None)"""
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == expect:
+                    return time.monotonic(), json.load(response)
+        except urllib.error.HTTPError as e:
+            e.close()
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.002)
+    return None, None
+
+
+def server_env(port):
+    env = dict(os.environ, PORT=str(port), PYTHONPATH=ROOT, LOG_LEVEL='WARNING')
+    # Set but empty, so the .env file cannot fill them in (load_dotenv never overrides)
+    for name in ('DISCORD_WEBHOOK', 'EMAIL_USERNAME', 'EMAIL_PASSWORD', 'DYNADOT_API_KEY',
+                 'PORKBUN_API_KEY', 'PORKBUN_SECRET_KEY', 'SHARD_NODE_ID'):
+        env[name] = ''
+    return env
+
+
+def seed_status_cache(path, count):
+    """Write count fresh status cache rows into the database at path"""
+    now = time.time()
+    records = [DomainRecord(f"cached{i}.com", 'registered', 'Example Registrar, Inc.', 'free_whois',
+                            expiry=now + 86400 * 365, checked_at=now) for i in range(count)]
+    DomainDatabase(path).save_cached_statuses([(record.checked_at, record) for record in records])
+
+
+def run_once(timeout, cached_statuses=0):
+    """(seconds to /health, seconds to /ready) for one server start; None for a phase that timed out"""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, 'domains.txt'), 'w').close()
+        if cached_statuses:
+            seed_status_cache(os.path.join(tmp, 'domains.db'), cached_statuses)
+        started = time.monotonic()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'health_server.py')], cwd=tmp,
+                                   env=server_env(port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = started + timeout
+            healthy_at, _ = poll(f"http://127.0.0.1:{port}/health", deadline)
+            ready_at, _ = poll(f"http://127.0.0.1:{port}/ready", deadline) if healthy_at else (None, None)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    return (healthy_at - started if healthy_at else None), (ready_at - started if ready_at else None)
+
+
+def floor_seconds():
+    """Time to start an interpreter and import Flask"""
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', 'import flask'], check=True)
+    return time.monotonic() - started
+
+
+def fmt(seconds):
+    return 'timeout' if seconds is None else f"{seconds * 1000:7.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--health-budget', type=float, default=1.0, help='seconds from spawn to a /health answer')
+    parser.add_argument('--ready-budget', type=float, default=10.0, help='seconds from spawn to /ready = 200')
+    parser.add_argument('--cached-statuses', type=int, default=0, help='status cache rows to seed the database with')
+    args = parser.parse_args()
+
+    print(f"python + import flask: {fmt(floor_seconds())}")
+    worst_health = worst_ready = 0.0
+    for run in range(1, args.runs + 1):
+        health, ready = run_once(max(args.health_budget, args.ready_budget) * 2, args.cached_statuses)
+        print(f"run {run}: /health {fmt(health)}   /ready {fmt(ready)}")
+        worst_health = float('inf') if health is None else max(worst_health, health)
+        worst_ready = float('inf') if ready is None else max(worst_ready, ready)
+
+    failures = []
+    if worst_health > args.health_budget:
+        failures.append(f"/health took {worst_health:.3f}s (budget {args.health_budget}s)")
+    if worst_ready > args.ready_budget:
+        failures.append(f"/ready took {worst_ready:.3f}s (budget {args.ready_budget}s)")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    if not failures:
+        print(f"Within budget: /health <= {args.health_budget}s, /ready <= {args.ready_budget}s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Dynadot API and a Discord webhook.
+
+DynadotStubServer answers the api3.json commands the catcher uses (search
+with domain0..domainN, register, account_info). Each request waits for a
+configurable latency plus jitter, and an optional rate limit answers with
+HTTP 429 once the budget for the current second is spent. Domains have drop
+instants: a domain searches as taken until its drop instant, as available
+afterwards, and as taken again once it has been registered. Registration
+times are recorded so the drop-to-register delay can be measured.
+
+DiscordStubServer accepts webhook POSTs, counts messages and embeds, and can
+rate-limit with Discord's 429 + retry_after body.
+
+    with DynadotStubServer(latency=0.02, jitter=0.005) as dynadot:
+        dynadot.add_drop('example.com', time.time() + 2)
+        api = DynadotAPI(api_url=dynadot.api_url, api_key='bench')
+
+Running the module checks the stub against DynadotAPI and
+NotificationManager.
+
+    python -m benchmarks.mock_server
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubServer:
+    """Threaded HTTP/1.1 keep-alive server with simulated latency and a per-second rate limit"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=None, host='127.0.0.1', port=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit  # Requests per second, None = unlimited
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.window = (0, 0)  # (second, requests in that second)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment; separate small writes stall on delayed ACKs
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                stub.serve(self, 'GET', url.path, parse_qs(url.query), None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                stub.serve(self, 'POST', urlsplit(self.path).path, {}, body)
+
+            def send_json(self, status, body, headers=None):
+                payload = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+
+    def serve(self, handler, method, path, query, body):
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self.lock:
+            self.requests += 1
+            limited = self._over_limit()
+            if limited:
+                self.rate_limited += 1
+        if limited:
+            self.reject(handler)
+            return
+        status, response, headers = self.handle(method, path, query, body)
+        handler.send_json(status, response, headers)
+
+    def _over_limit(self):
+        if not self.rate_limit:
+            return False
+        second = int(time.monotonic())
+        current, count = self.window
+        count = count + 1 if second == current else 1
+        self.window = (second, count)
+        return count > self.rate_limit
+
+    def reject(self, handler):
+        handler.send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+
+    def handle(self, method, path, query, body):
+        raise NotImplementedError
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class DynadotStubServer(StubServer):
+    """Dynadot api3.json: search, register and account_info against simulated drops"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.api_url = f"{self.base_url}/api3.json"
+        self.drops = {}  # domain -> epoch seconds when it becomes available
+        self.registered = {}  # domain -> epoch seconds of the successful register command
+        self.commands = {}  # command -> count
+
+    def add_drop(self, domain, drop_at):
+        """domain searches as taken until drop_at (epoch seconds), then as available"""
+        with self.lock:
+            self.drops[domain.lower()] = drop_at
+            self.registered.pop(domain.lower(), None)
+
+    def is_available(self, domain, now):
+        drop_at = self.drops.get(domain)
+        return drop_at is not None and now >= drop_at and domain not in self.registered
+
+    def handle(self, method, path, query, body):
+        if path != '/api3.json':
+            return 404, {'error': 'not found'}, None
+        command = query.get('command', [''])[0]
+        now = time.time()
+        with self.lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+            if command == 'search':
+                names = []
+                while f'domain{len(names)}' in query:
+                    names.append(query[f'domain{len(names)}'][0])
+                return 200, {'SearchResponse': {'ResponseCode': '0', 'SearchResults': [
+                    {'DomainName': name, 'Available': 'yes' if self.is_available(name.lower(), now) else 'no'}
+                    for name in names
+                ]}}, None
+
+            if command == 'register':
+                domain = query.get('domain', [''])[0].lower()
+                if not self.is_available(domain, now):
+                    return 200, {'RegisterResponse': {'SuccessCode': '1', 'Error': 'domain not available'}}, None
+                self.registered[domain] = now
+                return 200, {'RegisterResponse': {'SuccessCode': '0', 'DomainName': domain}}, None
+
+            if command == 'account_info':
+                return 200, {'AccountInfoResponse': {'ResponseCode': '0', 'AccountInfo': {'Username': 'bench'}}}, None
+
+        return 200, {'Response': {'ResponseCode': '-1', 'Error': f"unknown command {command!r}"}}, None
+
+    def reject(self, handler):
+        handler.send_json(429, {'Response': {'ResponseCode': '-1', 'Error': 'too many requests'}}, {'Retry-After': '1'})
+
+
+class DiscordStubServer(StubServer):
+    """Discord webhook: 204 for each accepted POST, 429 + retry_after when rate limited,
+    400 for a message over Discord's embed limits (10 embeds, 6000 characters of embed text)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.webhook_url = f"{self.base_url}/api/webhooks/1/bench"
+        self.posts = 0
+        self.embeds = 0
+        self.rejected = 0
+
+    def handle(self, method, path, query, body):
+        if method != 'POST' or not path.startswith('/api/webhooks/'):
+            return 405, {'message': '405: Method Not Allowed'}, None
+        data = json.loads(body or b'{}')
+        embeds = data.get('embeds', [])
+        chars = sum(len(embed.get('title') or '') + len(embed.get('description') or '')
+                    + len((embed.get('footer') or {}).get('text') or '') for embed in embeds)
+        if len(embeds) > 10 or chars > 6000:
+            with self.lock:
+                self.rejected += 1
+            return 400, {'message': 'Invalid Form Body', 'code': 50035}, None
+        with self.lock:
+            self.posts += 1
+            self.embeds += len(data.get('embeds', []))
+        return 204, None, None
+
+    def reject(self, handler):
+        retry_after = round(1 - time.monotonic() % 1, 3)  # Until the next one-second window
+        handler.send_json(429, {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': False})
+
+
+def main():
+    from dynadot_api import DynadotAPI
+    from notify import NotificationManager
+
+    failures = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            DynadotStubServer(latency=0.005) as dynadot, DiscordStubServer(rate_limit=2) as discord:
+        os.chdir(tmp)  # NotificationManager opens domains.db in the working directory
+        api = DynadotAPI(api_url=dynadot.api_url, api_key='bench')
+        dynadot.add_drop('dropping.com', time.time() + 0.3)
+
+        if not api.test_api_connection():
+            failures.append('account_info should validate')
+        if api.check_domain_availability('dropping.com'):
+            failures.append('dropping.com available before its drop')
+        if api.register_domain('dropping.com')[0]:
+            failures.append('registered dropping.com before its drop')
+        time.sleep(0.35)
+        availability = api.check_many(['dropping.com', 'taken.com'])
+        if availability != {'dropping.com': True, 'taken.com': False}:
+            failures.append(f"batched search after the drop: {availability}")
+        if not api.register_domain('dropping.com')[0]:
+            failures.append('register after the drop failed')
+        if api.check_domain_availability('dropping.com'):
+            failures.append('dropping.com still available after registration')
+
+        notifier = NotificationManager()
+        notifier.discord_webhook = discord.webhook_url
+        notifier.email_username = None  # Never send real mail from a check
+        for i in range(3):
+            notifier.send_discord(f"message {i}", 'bench')
+        if discord.posts != 3 or discord.rate_limited < 1:
+            failures.append(f"discord: {discord.posts} posts, {discord.rate_limited} rate limited (expected 3, >=1)")
+        os.chdir(cwd)
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print(f"Mock server checks: {len(failures)} failures "
+          f"(dynadot commands {dynadot.commands}, discord posts {discord.posts}, 429s {discord.rate_limited})")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for registry RDAP servers.
+
+Serves /domain/<name> from a {domain: rdap_json} dict (404 for anything else)
+and the IANA-style bootstrap file at /dns.json. HTTP/1.1 keep-alive is on, and
+the server counts TCP connections so connection reuse can be checked:
+
+    with RDAPStubServer({'example.com': rdap_domain('example.com')}) as stub:
+        client = RDAPClient(servers={'com': stub.base_url})
+
+Running the module checks RDAPClient status/event/registrar extraction,
+bootstrap routing, connection reuse and the scheduler's use of the deletion
+event, then times lookups.
+
+    python -m benchmarks.rdap_stub --lookups 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rdap_client import RDAPBootstrap, RDAPClient
+
+
+def rdap_domain(name, statuses=('active',), registrar='Example Registrar, Inc.', events=None):
+    """Build a minimal RDAP domain object"""
+    return {
+        'objectClassName': 'domain',
+        'ldhName': name.upper(),
+        'status': list(statuses),
+        'events': [{'eventAction': action, 'eventDate': date} for action, date in (events or {}).items()],
+        'entities': [{
+            'objectClassName': 'entity',
+            'handle': '9999',
+            'roles': ['registrar'],
+            'vcardArray': ['vcard', [['version', {}, 'text', '4.0'], ['fn', {}, 'text', registrar]]]
+        }]
+    }
+
+
+class RDAPStubServer:
+    """Threaded HTTP/1.1 server answering RDAP domain queries from a dict"""
+
+    def __init__(self, domains, host='127.0.0.1', port=0):
+        self.domains = {name.lower(): data for name, data in domains.items()}
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment; separate small writes stall on delayed ACKs
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                if self.path == '/dns.json':
+                    self.send_json(200, stub.bootstrap())
+                elif self.path.startswith('/domain/'):
+                    data = stub.domains.get(self.path[len('/domain/'):].lower())
+                    if data is None:
+                        self.send_json(404, {'errorCode': 404, 'title': 'Not Found'})
+                    else:
+                        self.send_json(200, data)
+                else:
+                    self.send_json(400, {'errorCode': 400})
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/rdap+json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}/"
+
+    def bootstrap(self):
+        """Bootstrap file routing every TLD in the stub (and 'example') here"""
+        tlds = sorted({name.rsplit('.', 1)[-1] for name in self.domains} | {'example'})
+        return {'version': '1.0', 'services': [[tlds, [self.base_url]]]}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=500, help='lookups to time (default 500)')
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    deletion = (now + timedelta(days=3)).replace(hour=18, minute=42, second=0)
+    domains = {
+        'droppingsoon.com': rdap_domain('droppingsoon.com', statuses=['pending delete', 'inactive'],
+                                        registrar='NameCheap, Inc.', events={
+            'registration': '2016-10-01T12:00:00Z',
+            'expiration': (now - timedelta(days=40)).isoformat().replace('+00:00', 'Z'),
+            'deletion': deletion.isoformat().replace('+00:00', 'Z'),
+        }),
+        'bestbuyelectronics.com': rdap_domain('bestbuyelectronics.com', registrar='GoDaddy.com, LLC', events={
+            'expiration': '2027-03-14T21:18:10Z'
+        }),
+        'robosweep.example': rdap_domain('robosweep.example', statuses=['redemption period']),
+    }
+
+    failures = []
+    with RDAPStubServer(domains) as stub:
+        client = RDAPClient(servers={'com': stub.base_url})
+
+        info = client.check_domain_status('droppingsoon.com')
+        if (info['status'], info['registrar']) != ('pendingDelete', 'NameCheap, Inc.'):
+            failures.append(f"pendingDelete lookup: got {info['status']} / {info['registrar']}")
+        if info['deletion_date'] != deletion.isoformat():
+            failures.append(f"deletion event: got {info['deletion_date']!r}")
+
+        # The scheduler should take the drop time from the registry's deletion event
+        from scheduler import predict_drop_time
+        predicted = predict_drop_time(info)
+        if predicted != deletion:
+            failures.append(f"predicted drop {predicted.isoformat()}, expected {deletion.isoformat()}")
+
+        info = client.check_domain_status('bestbuyelectronics.com')
+        if (info['status'], info['expiry_date']) != ('registered', '2027-03-14T21:18:10+00:00'):
+            failures.append(f"registered lookup: got {info['status']} / {info['expiry_date']}")
+
+        info = client.check_domain_status('nobody-has-this.com')
+        if info['status'] != 'available':
+            failures.append(f"404 lookup: got {info['status']}")
+
+        # Bootstrap routing: .example is only known through the stub's bootstrap file
+        with tempfile.TemporaryDirectory() as tmp:
+            bootstrap = RDAPBootstrap(path=os.path.join(tmp, 'dns.json'), url=f"{stub.base_url}dns.json")
+            routed = RDAPClient(bootstrap=bootstrap)
+            info = routed.check_domain_status('robosweep.example')
+            if not info or info['status'] != 'pendingDelete':
+                failures.append(f"bootstrap-routed lookup: got {info}")
+            if bootstrap.server_for('org') != 'https://rdap.publicinterestregistry.org/rdap/':
+                failures.append('built-in servers should fill gaps in the bootstrap file')
+
+        connections_before, requests_before = stub.connections, stub.requests
+        start = time.perf_counter()
+        for _ in range(args.lookups):
+            client.lookup('droppingsoon.com')
+        elapsed = time.perf_counter() - start
+        connections = stub.connections - connections_before
+        requests_made = stub.requests - requests_before
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print(f"Client checks: {len(failures)} failures")
+    print(f"RDAP: {requests_made} lookups over {connections} new connection(s) in {elapsed:.2f}s "
+          f"({elapsed / args.lookups * 1000:.2f} ms/lookup)")
+    if connections > 1:
+        failures.append('keep-alive connections were not reused')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
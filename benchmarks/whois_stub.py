@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for port-43 WHOIS servers, serving canned responses.
+
+Each query line is looked up (lowercased, DENIC/JPRS decorations stripped) in
+a {query: response} dict; unknown queries get a "No match" answer. Point a
+WhoisClient at it with the `addresses` override:
+
+    with WhoisStubServer({'example.com': text}) as stub:
+        client = WhoisClient(addresses={'whois.verisign-grs.com': stub.address})
+
+Running the module checks the socket WHOIS client against the corpus
+(registry answer, registrar referral, IANA discovery, concurrency cap,
+overall timeout) and
+times it against spawning one `whois`-style subprocess per lookup.
+
+    python -m benchmarks.whois_stub --lookups 200
+"""
+import argparse
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from whois_client import WhoisClient
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'whois_corpus')
+NOT_FOUND_RESPONSE = 'No match for "{query}".\r\n>>> Last update of whois database: 2026-10-17T03:10:12Z <<<\r\n'
+
+
+class WhoisStubServer:
+    """Threaded TCP server answering WHOIS queries from a dict"""
+
+    def __init__(self, responses, host='127.0.0.1', port=0, delay=0.0, trickle=0.0):
+        self.responses = {key.lower(): value for key, value in responses.items()}
+        self.delay = delay  # Seconds to wait before answering (simulates a slow registry)
+        self.trickle = trickle  # Seconds between answer lines (a server that never quite stalls)
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                query = self.rfile.readline().decode('ascii', errors='replace').strip()
+                with stub.lock:
+                    stub.queries.append(query)
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    if stub.trickle:
+                        for line in stub.answer(query).splitlines(keepends=True):
+                            try:
+                                self.wfile.write(line.encode('utf-8'))
+                                self.wfile.flush()
+                            except OSError:
+                                return  # The client gave up
+                            time.sleep(stub.trickle)
+                    else:
+                        self.wfile.write(stub.answer(query).encode('utf-8'))
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self.thread = None
+
+    def answer(self, query):
+        key = query.lower()
+        if key.startswith('-t dn,ace '):
+            key = key[len('-t dn,ace '):]
+        if key.endswith('/e'):
+            key = key[:-2]
+        return self.responses.get(key, NOT_FOUND_RESPONSE.format(query=query))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def read_sample(name):
+    with open(os.path.join(CORPUS_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def check_client(registry, registrar, iana):
+    """Exercise the client against the stubs; returns a list of failure messages"""
+    failures = []
+    client = WhoisClient(
+        servers={'com': 'whois.verisign-grs.com'},
+        addresses={
+            'whois.verisign-grs.com': registry.address,
+            'whois.godaddy.com': registrar.address,
+            'whois.namecheap.com': registrar.address,
+            'whois.enom.com': registrar.address,
+            'whois.iana.org': iana.address,
+        }
+    )
+
+    record = client.lookup('BestBuyElectronics.com')
+    if record.status_at() != 'registered' or record.registrar != 'GoDaddy.com, LLC':
+        failures.append(f"registered lookup: got {record.status_at()} / {record.registrar}")
+    if 'bestbuyelectronics.com' not in registrar.queries:
+        failures.append("referral to the registrar server was not followed")
+
+    record = client.lookup('droppingsoon.com')
+    if record.status_at() != 'pendingDelete':
+        failures.append(f"pendingDelete lookup: got {record.status_at()}")
+
+    record = client.lookup('nobody-has-this.com')
+    if record.status_at() != 'available':
+        failures.append(f"not-found lookup: got {record.status_at()}")
+
+    # .net is not in the client's map: discovered through the IANA stub once, then cached
+    client.lookup('droppingsoon.net')
+    client.lookup('another.net')
+    if iana.queries.count('net') != 1:
+        failures.append(f"IANA should be asked once for .net, was asked {iana.queries.count('net')} times")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=200, help='lookups to time (default 200)')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent lookup threads (default 8)')
+    args = parser.parse_args()
+
+    registered = read_sample('verisign_com_registered.txt')
+    registry_responses = {
+        'bestbuyelectronics.com': registered,
+        'droppingsoon.com': read_sample('verisign_com_pendingdelete.txt'),
+        'droppingsoon.net': read_sample('verisign_net_redemption.txt'),
+    }
+    registrar_responses = {'bestbuyelectronics.com': read_sample('registrar_godaddy_com.txt')}
+    iana_responses = {'net': read_sample('iana_com_referral.txt')}
+
+    with WhoisStubServer(registry_responses) as registry, \
+            WhoisStubServer(registrar_responses) as registrar, \
+            WhoisStubServer(iana_responses) as iana:
+        failures = check_client(registry, registrar, iana)
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print(f"Client checks: {len(failures)} failures")
+
+    # Concurrency cap: 8 threads against one slow server never exceed max_per_server
+    with WhoisStubServer(registry_responses, delay=0.05) as slow:
+        client = WhoisClient(addresses={'whois.verisign-grs.com': slow.address},
+                             follow_referrals=False, max_per_server=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(client.lookup, ['droppingsoon.com'] * 16))
+        print(f"Per-server cap: at most {slow.max_active} concurrent queries (limit 2)")
+        if slow.max_active > 2:
+            failures.append('per-server concurrency cap exceeded')
+
+    # Overall timeout: a server sending a line every 0.1s is cut off at the deadline, not per read
+    with WhoisStubServer(registry_responses, trickle=0.1) as trickling:
+        client = WhoisClient(addresses={'whois.verisign-grs.com': trickling.address},
+                             follow_referrals=False, timeout=0.5)
+        start = time.monotonic()
+        try:
+            client.lookup('droppingsoon.com')
+            failures.append('trickling server: lookup should time out')
+        except OSError:
+            pass
+        elapsed = time.monotonic() - start
+        print(f"Trickling server: lookup gave up after {elapsed:.2f}s (timeout 0.5s)")
+        if elapsed > 0.75:
+            failures.append(f"trickling server held the lookup {elapsed:.2f}s past a 0.5s timeout")
+
+    # Throughput: in-process sockets vs. one subprocess per lookup
+    domains = ['droppingsoon.com'] * args.lookups
+    with WhoisStubServer(registry_responses) as stub:
+        client = WhoisClient(addresses={'whois.verisign-grs.com': stub.address},
+                             follow_referrals=False, max_per_server=args.workers)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(client.lookup, domains))
+        socket_elapsed = time.perf_counter() - start
+
+        # Same query through a child process, as FreeWhoisChecker's 'command' backend does
+        host, port = stub.address
+        command = [sys.executable, '-c',
+                   'import socket,sys;s=socket.create_connection((sys.argv[1],int(sys.argv[2])));'
+                   's.sendall(sys.argv[3].encode()+b"\\r\\n");sys.stdout.write(s.makefile().read())',
+                   host, str(port)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(lambda domain: subprocess.run(command + [domain], capture_output=True, text=True),
+                              domains))
+        subprocess_elapsed = time.perf_counter() - start
+
+    print(f"socket client: {args.lookups} lookups in {socket_elapsed:.2f}s "
+          f"({socket_elapsed / args.lookups * 1000:.2f} ms/lookup)")
+    print(f"subprocess:    {args.lookups} lookups in {subprocess_elapsed:.2f}s "
+          f"({subprocess_elapsed / args.lookups * 1000:.2f} ms/lookup, "
+          f"{subprocess_elapsed / socket_elapsed:.1f}x slower)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
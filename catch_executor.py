@@ -0,0 +1,171 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import MAX_CONCURRENT_CATCHES
+from logging_setup import configure_logging
+from catcher import DomainCatcher, ProbeBatcher
+from clock import SYSTEM_CLOCK
+from domain_record import CatchResult, NO_ATTEMPTS
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+class ThreadSafeDict:
+    """Dict guarded by a lock, shared between catch threads and the scheduler"""
+
+    def __init__(self, initial=None):
+        self._data = dict(initial or {})
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __iter__(self):
+        # Iterate over a snapshot so writers are never blocked by readers
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def setdefault(self, key, default=None):
+        with self._lock:
+            return self._data.setdefault(key, default)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def copy(self):
+        with self._lock:
+            return dict(self._data)
+
+    def update_item(self, key, **fields):
+        """Atomically update fields of an entry (a dict or a record with update()); returns False if key is missing"""
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._data[key].update(fields)
+            return True
+
+
+class CatchExecutor:
+    """Runs domain catches in parallel, each with its own DomainCatcher"""
+
+    def __init__(self, notifier=None, max_concurrent=MAX_CONCURRENT_CATCHES, shard=None, clock=None,
+                 catcher_factory=DomainCatcher):
+        self.notifier = notifier
+        self.shard = shard  # ShardCoordinator when several nodes share the watchlist
+        self.clock = clock or SYSTEM_CLOCK
+        self.catcher_factory = catcher_factory  # Called like DomainCatcher(attempts=, results=, notifier=, clock=)
+        self.max_concurrent = max_concurrent
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='catch')
+
+        # Shared, thread-safe tracking across all catches
+        self.attempts = ThreadSafeDict()
+        self.results = ThreadSafeDict()
+        self.active = ThreadSafeDict()  # domain -> queue time of in-flight catches
+        self.stop_events = ThreadSafeDict()  # domain -> threading.Event used to cancel a catch
+        self.probe_batcher = ProbeBatcher()  # Folds probes of concurrent catches into shared searches
+
+    def submit(self, domain, callback=None, **catch_kwargs):
+        """Start a catch for domain; callback(domain, success, stats) runs when it finishes"""
+        queued_at = time.time()
+        if self.active.setdefault(domain, queued_at) is not queued_at:
+            logger.info(f"Catch for {domain} already running, skipping")
+            return None
+        if self.shard and not self.shard.claim(f"catch:{domain}"):
+            self.active.pop(domain)
+            logger.info(f"Catch for {domain} claimed by another shard node, skipping")
+            return None
+
+        self.stop_events[domain] = threading.Event()
+        logger.info(f"Queueing catch for {domain} ({len(self.active)} active, cap {self.max_concurrent})")
+        # Each catch gets its own timeline from the moment it is queued (the system clock is shared)
+        return self.executor.submit(self._run_catch, domain, callback, catch_kwargs, self.clock.fork())
+
+    def cancel(self, domain):
+        """Ask a queued or running catch to stop; returns False if none is active"""
+        stop_event = self.stop_events.get(domain)
+        if stop_event is None:
+            return False
+        logger.info(f"Stopping catch for {domain}")
+        stop_event.set()
+        return True
+
+    def _run_catch(self, domain, callback, catch_kwargs, clock):
+        """Worker: run one catch with isolated state and HTTP connections"""
+        catcher = None
+        success = False
+        stop_event = self.stop_events.get(domain)
+        try:
+            if stop_event.is_set():
+                logger.info(f"Catch for {domain} cancelled before it started")
+                return False
+            catcher = self.catcher_factory(attempts=self.attempts, results=self.results, notifier=self.notifier,
+                                           clock=clock)
+            if clock is self.clock:
+                # Only catches on the shared system clock search together; simulated timelines stay apart
+                catcher.probe_batcher = self.probe_batcher
+            success = catcher.catch_domain(domain, stop_event=stop_event, **catch_kwargs)
+        except Exception as e:
+            logger.error(f"Error during catch for {domain}: {e}")
+            self.results[domain] = CatchResult(False, f"Error: {e}", self.attempts.get(domain, 0))
+        finally:
+            if catcher:
+                catcher.cleanup()
+            self.stop_events.pop(domain)
+            self.active.pop(domain)
+            if self.shard and stop_event.is_set():
+                # A finished catch keeps its claim until it expires; a cancelled one frees it
+                self.shard.release(f"catch:{domain}")
+
+        if callback:
+            try:
+                callback(domain, success, self.get_catch_stats(domain))
+            except Exception as e:
+                logger.error(f"Error in catch callback for {domain}: {e}")
+        return success
+
+    def get_catch_stats(self, domain):
+        """Get statistics for a domain catch attempt"""
+        return self.results.get(domain, NO_ATTEMPTS)
+
+    def running_domains(self):
+        """Domains with a catch currently in flight"""
+        return self.active.keys()
+
+    def shutdown(self, wait=True):
+        """Stop accepting catches and optionally wait for running ones"""
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,78 @@
+"""
+Probe-intensity curves for the catch loop.
+
+A strategy maps "seconds relative to the predicted drop" (negative before the
+drop, positive after) to the interval between availability probes.
+"""
+import math
+from config import (
+    CATCH_INTERVAL, CATCH_PRE_DROP_INTERVAL, CATCH_RAMP_SECONDS,
+    CATCH_BURST_SECONDS, CATCH_DECAY_HALF_LIFE, CATCH_TAIL_INTERVAL
+)
+
+
+class CatchStrategy:
+    """Base class: subclasses return the probe interval for a point in the drop window"""
+    name = 'base'
+
+    def interval_at(self, seconds_from_drop):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class ConstantStrategy(CatchStrategy):
+    """Probe at a fixed rate for the whole window"""
+    name = 'constant'
+
+    def __init__(self, interval=CATCH_INTERVAL):
+        self.interval = interval
+
+    def interval_at(self, seconds_from_drop):
+        return self.interval
+
+
+class BurstStrategy(CatchStrategy):
+    """Low rate before the window, dense burst around the drop instant, then decay"""
+    name = 'burst'
+
+    def __init__(self, pre_interval=CATCH_PRE_DROP_INTERVAL, burst_interval=CATCH_INTERVAL,
+                 ramp_seconds=CATCH_RAMP_SECONDS, burst_seconds=CATCH_BURST_SECONDS,
+                 decay_half_life=CATCH_DECAY_HALF_LIFE, tail_interval=CATCH_TAIL_INTERVAL):
+        self.pre_interval = pre_interval
+        self.burst_interval = burst_interval
+        self.ramp_seconds = ramp_seconds
+        self.burst_seconds = burst_seconds
+        self.decay_half_life = decay_half_life
+        self.tail_interval = tail_interval
+
+    def interval_at(self, seconds_from_drop):
+        t = seconds_from_drop
+        if t < -self.ramp_seconds:
+            return self.pre_interval
+        if t < 0:
+            # Geometric ramp from the pre-drop rate to the burst rate
+            progress = (t + self.ramp_seconds) / self.ramp_seconds
+            return self.pre_interval * (self.burst_interval / self.pre_interval) ** progress
+        if t < self.burst_seconds:
+            return self.burst_interval
+        # Interval doubles every half-life after the burst, capped at the tail rate
+        decayed = self.burst_interval * math.pow(2, (t - self.burst_seconds) / self.decay_half_life)
+        return min(decayed, self.tail_interval)
+
+
+STRATEGIES = {
+    ConstantStrategy.name: ConstantStrategy,
+    BurstStrategy.name: BurstStrategy,
+}
+
+
+def get_strategy(strategy):
+    """Resolve a strategy name (or pass through a CatchStrategy instance)"""
+    if isinstance(strategy, CatchStrategy):
+        return strategy
+    try:
+        return STRATEGIES[strategy]()
+    except KeyError:
+        raise ValueError(f"Unknown catch strategy '{strategy}' (available: {', '.join(STRATEGIES)})")
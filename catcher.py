@@ -1,41 +1,100 @@
-import requests
-import time
+import queue
 import threading
 import logging
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from config import (
-    PORKBUN_API_KEY, PORKBUN_SECRET_KEY, DYNADOT_API_KEY, CATCH_INTERVAL, 
-    MAX_RETRY_ATTEMPTS, RETRY_DELAY, LOG_LEVEL, LOG_FILE
+    PORKBUN_API_KEY, PORKBUN_SECRET_KEY, DYNADOT_API_KEY, CATCH_STRATEGY, CATCH_PIPELINE_DEPTH,
+    CATCH_MAX_DURATION_MINUTES, DYNADOT_SEARCH_BATCH_SIZE, MAX_RETRY_ATTEMPTS, RETRY_DELAY
 )
+from logging_setup import configure_logging, LogSampler
+from catch_strategy import get_strategy
+from transport import get_session
 from notify import NotificationManager
+from clock import SYSTEM_CLOCK
+from domain_record import CatchResult, NO_ATTEMPTS
+from progress import CatchTracker
+import metrics
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
+PROBE_LOG = LogSampler()
+
+CATCH_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+CATCH_SECONDS = metrics.histogram('domain_catcher_catch_duration_seconds', 'Catch duration by result',
+                                  ['result'], buckets=CATCH_BUCKETS)
+CATCHES = metrics.counter('domain_catcher_catches_total', 'Finished catches by result', ['result'])
+PROBES = metrics.counter('domain_catcher_catch_probes_total', 'Availability probes sent during catches')
+PROBES_IN_FLIGHT = metrics.gauge('domain_catcher_catch_probes_in_flight', 'Probes awaiting a response')
+PROBES_SHARED = metrics.counter('domain_catcher_catch_probes_shared_total',
+                                'Probes answered by a search another catch sent')
+
+
+class ProbeBatcher:
+    """Folds the probes of concurrent catches into shared multi-domain searches.
+    
+    A probe waits while its catch's pipeline depth worth of searches is already
+    in flight across all catches. When a slot frees, the next probe sends one
+    search for every waiting domain (up to DYNADOT_SEARCH_BATCH_SIZE) and the
+    other waiting probes take their answer from it. A lone catch never waits,
+    so it probes exactly as it would without the batcher.
+    """
+    
+    def __init__(self, batch_size=DYNADOT_SEARCH_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.condition = threading.Condition()
+        self.searching = 0
+        self.waiting = {}  # domain -> Future answered by the next search that takes it
+    
+    def probe(self, domain, api, depth):
+        """Availability of domain (None = unknown), searched on api or by another probe's search"""
+        with self.condition:
+            answer = self.waiting.setdefault(domain, Future())
+            while self.searching >= depth and self.waiting.get(domain) is answer:
+                self.condition.wait()
+            shared = self.waiting.get(domain) is not answer
+            if not shared:
+                batch = [domain] + [d for d in self.waiting if d != domain][:self.batch_size - 1]
+                answers = {d: self.waiting.pop(d) for d in batch}
+                self.searching += 1
+        if shared:
+            PROBES_SHARED.inc()
+            return answer.result()
+        
+        results = {}
+        try:
+            if len(batch) == 1:
+                results[domain] = api.check_domain_availability(domain)
+            else:
+                results = api.check_many(batch)
+        except Exception as e:
+            logger.error(f"Error probing {len(batch)} domains: {e}")
+        finally:
+            for d, future in answers.items():
+                future.set_result(results.get(d))
+            with self.condition:
+                self.searching -= 1
+                self.condition.notify_all()
+        return results.get(domain)
 
 class DomainCatcher:
-    def __init__(self):
+    def __init__(self, attempts=None, results=None, notifier=None, clock=None):
         self.porkbun_key = PORKBUN_API_KEY
         self.porkbun_secret = PORKBUN_SECRET_KEY
         self.porkbun_url = "https://api.porkbun.com/api/json/v3"
         self.dynadot_key = DYNADOT_API_KEY
         
-        # Create session for connection pooling
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'DomainCatcher/1.0'
-        })
+        # Shared session for connection pooling
+        self.session = get_session('porkbun')
+        
+        self.probe_clients = None
+        self.clock = clock or SYSTEM_CLOCK  # VirtualClock in simulation
+        self.probe_batcher = None  # ProbeBatcher shared with concurrent catches
+        self.probe_depth = 1
         
-        # Track registration attempts
-        self.attempts = {}
-        self.results = {}
+        # Track registration attempts (CatchExecutor passes thread-safe shared dicts)
+        self.attempts = attempts if attempts is not None else {}
+        self.results = results if results is not None else {}
         
         # Import Dynadot API
         try:
@@ -47,7 +106,7 @@ class DomainCatcher:
             self.dynadot_api = None
         
         # Initialize notification manager
-        self.notifier = NotificationManager()
+        self.notifier = notifier or NotificationManager()
     
     def check_availability(self, domain):
         """Check if domain is available for registration using Dynadot API"""
@@ -55,7 +114,12 @@ class DomainCatcher:
             # Use Dynadot API for availability check
             if self.dynadot_api:
                 available = self.dynadot_api.check_domain_availability(domain)
-                logger.info(f"Availability check for {domain}: {'Available' if available else 'Not Available'}")
+                # Availability is a state change and always logged; the repeated 'no' is sampled
+                if available or PROBE_LOG.allow('catch.availability'):
+                    suppressed = PROBE_LOG.take_suppressed('catch.availability')
+                    logger.info(f"Availability check for {domain}: {'Available' if available else 'Not Available'}"
+                                f"{f' ({suppressed} similar lines suppressed)' if suppressed else ''}",
+                                extra={'domain': domain, 'available': available})
                 return available
             else:
                 logger.warning(f"Dynadot API not available for {domain}")
@@ -65,6 +129,21 @@ class DomainCatcher:
             logger.error(f"Error checking availability for {domain}: {e}")
             return False
     
+    def check_availability_many(self, domains):
+        """Check availability of several domains with batched Dynadot search requests (None = unknown)"""
+        try:
+            if self.dynadot_api:
+                availability = self.dynadot_api.check_many(domains)
+                available = [domain for domain in domains if availability.get(domain)]
+                logger.info(f"Availability check for {len(domains)} domains: {len(available)} available")
+                return {domain: availability.get(domain) for domain in domains}
+            else:
+                logger.warning(f"Dynadot API not available for {len(domains)} domains")
+                return {domain: False for domain in domains}
+                
+        except Exception as e:
+            logger.error(f"Error checking availability for {len(domains)} domains: {e}")
+            return dict.fromkeys(domains)
     
     def register_with_dynadot(self, domain):
         """Register domain using Dynadot API"""
@@ -150,80 +229,297 @@ class DomainCatcher:
             self.notifier.send_failure_notification(domain, "All registration methods failed")
             return False, f"All methods failed: {message}"
     
-    def catch_domain(self, domain, max_duration_minutes=5):
-        """Attempt to catch a domain using high-frequency attempts"""
-        logger.info(f"Starting catch attempt for {domain}")
+    def catch_domain(self, domain, max_duration_minutes=CATCH_MAX_DURATION_MINUTES, stop_event=None, drop_time=None,
+                     strategy=None, pipeline_depth=None):
+        """Attempt to catch a domain, probing at the rate set by a catch strategy.
+        
+        drop_time is the predicted drop instant (aware UTC datetime) and the catch
+        runs until max_duration_minutes after it. Probes are pipelined across
+        pipeline_depth connections; setting stop_event cancels the catch.
+        """
+        strategy = get_strategy(strategy or CATCH_STRATEGY)
+        depth = max(1, pipeline_depth or CATCH_PIPELINE_DEPTH)
+        logger.info(f"Starting catch attempt for {domain} ({strategy.name} strategy, {depth} connections)",
+                    extra={'domain': domain, 'event': 'catch_started'})
         
-        start_time = datetime.now()
-        max_duration = timedelta(minutes=max_duration_minutes)
+        clock = self.clock
+        start = clock.monotonic()
+        drop_at = start
+        if drop_time is not None:
+            drop_at += (drop_time - clock.now()).total_seconds()
+        deadline = max(start, drop_at) + max_duration_minutes * 60
         attempts = 0
-        last_availability_check = datetime.now()
+        next_probe = start
+        next_progress = start + 30
+        in_flight = set()
         
         # Initialize tracking
         self.attempts[domain] = 0
-        self.results[domain] = {'success': False, 'message': '', 'attempts': 0}
+        self.results[domain] = CatchResult()
+        tracker = CatchTracker(domain, strategy.name, drop_time.timestamp() if drop_time else None, clock)
+        tracker.publish('probing', 0)
         
-        while datetime.now() - start_time < max_duration:
-            attempts += 1
-            self.attempts[domain] = attempts
-            
-            # Check availability every 10 attempts to avoid rate limiting
-            if attempts % 10 == 0 or datetime.now() - last_availability_check > timedelta(seconds=30):
-                if self.check_availability(domain):
-                    logger.info(f"Domain {domain} is available! Attempting registration...")
-                    
-                    success, message = self.attempt_registration(domain)
+        self._prepare_probe_clients(depth)
+        pool = ThreadPoolExecutor(max_workers=depth, thread_name_prefix='probe') if depth > 1 else None
+        
+        try:
+            while clock.monotonic() < deadline:
+                if stop_event and stop_event.is_set():
+                    logger.info(f"Catch for {domain} cancelled after {attempts} attempts")
+                    self.results[domain] = CatchResult(False, 'Cancelled', attempts)
+                    self._record_catch('cancelled', start)
+                    tracker.finish('cancelled', attempts, 'Cancelled')
+                    return False
+                
+                # Collect finished probes
+                available = False
+                for future in [f for f in in_flight if f.done()]:
+                    in_flight.discard(future)
+                    available = future.result() or available
+                
+                # Launch the next probe when it is due and a connection is free
+                now = clock.monotonic()
+                if now >= next_probe and len(in_flight) < depth:
+                    attempts += 1
+                    self.attempts[domain] = attempts
+                    if pool:
+                        in_flight.add(pool.submit(self._probe, domain))
+                    else:
+                        available = self._probe(domain) or available
                     
-                    if success:
-                        self.results[domain] = {
-                            'success': True,
-                            'message': message,
-                            'attempts': attempts
-                        }
-                        logger.info(f"🎉 Successfully caught {domain} after {attempts} attempts!")
+                    # Never fire missed probes back to back
+                    next_probe = max(next_probe + strategy.interval_at(now - drop_at), now)
+                
+                # Counters for the progress API (a comparison unless a publish is due)
+                if now >= tracker.next_publish:
+                    tracker.publish('probing', attempts, len(in_flight), now)
+                
+                if available:
+                    logger.info(f"Domain {domain} is available! Attempting registration...",
+                                extra={'domain': domain, 'event': 'available', 'attempts': attempts})
+                    tracker.publish('registering', attempts, len(in_flight))
+                    if self._register_caught(domain, attempts):
+                        self._record_catch('success', start)
+                        tracker.finish('caught', attempts, self.results[domain].message)
                         return True
-                    else:
-                        logger.warning(f"Registration failed for {domain}: {message}")
                 
-                last_availability_check = datetime.now()
-            
-            # Wait before next attempt
-            time.sleep(CATCH_INTERVAL)
-            
-            # Log progress every 1000 attempts
-            if attempts % 1000 == 0:
-                elapsed = (datetime.now() - start_time).total_seconds()
-                logger.info(f"Attempt {attempts}: {elapsed:.1f}s elapsed for {domain}")
+                # Log progress every 30 seconds
+                if now >= next_progress:
+                    logger.info(f"Attempt {attempts}: {now - start:.1f}s elapsed for {domain} "
+                                f"({now - drop_at:+.1f}s from drop, {len(in_flight)} in flight)")
+                    next_progress = now + 30
+                
+                # Wait for the next probe slot, a finished probe, or the deadline
+                now = clock.monotonic()
+                timeout = 0.5 if len(in_flight) >= depth else max(0.0, next_probe - now)
+                timeout = min(timeout, max(0.0, deadline - now))
+                if in_flight:
+                    wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                elif timeout > 0:
+                    if stop_event:
+                        clock.wait(stop_event, timeout)
+                    else:
+                        clock.sleep(timeout)
+        except Exception as e:
+            tracker.finish('error', attempts, f"Error: {e}")
+            raise
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
         
         # Final attempt
         logger.info(f"Final attempt for {domain}...")
-        if self.check_availability(domain):
-            success, message = self.attempt_registration(domain)
-            if success:
-                self.results[domain] = {
-                    'success': True,
-                    'message': message,
-                    'attempts': attempts
-                }
-                return True
+        if self.check_availability(domain) and self._register_caught(domain, attempts):
+            self._record_catch('success', start)
+            tracker.finish('caught', attempts, self.results[domain].message)
+            return True
         
         # Update final result
-        self.results[domain] = {
-            'success': False,
-            'message': f"Failed after {attempts} attempts in {max_duration_minutes} minutes",
-            'attempts': attempts
-        }
+        message = f"Failed after {attempts} attempts in {max_duration_minutes} minutes"
+        self.results[domain] = CatchResult(False, message, attempts)
         
-        logger.warning(f"Failed to catch {domain} after {attempts} attempts")
+        logger.warning(f"Failed to catch {domain} after {attempts} attempts",
+                       extra={'domain': domain, 'event': 'catch_failed', 'attempts': attempts})
+        self._record_catch('failed', start)
+        tracker.finish('failed', attempts, message)
         return False
     
+    def _record_catch(self, result, start):
+        CATCH_SECONDS.labels(result).observe(self.clock.monotonic() - start)
+        CATCHES.labels(result).inc()
+    
+    def _prepare_probe_clients(self, depth):
+        """Build one Dynadot client (and connection) per pipeline slot"""
+        self.probe_clients = queue.Queue()
+        self.probe_depth = depth
+        if not self.dynadot_api:
+            return
+        self.probe_clients.put(self.dynadot_api)
+        for _ in range(depth - 1):
+            self.probe_clients.put(type(self.dynadot_api)(api_url=self.dynadot_api.api_url,
+                                                          api_key=self.dynadot_api.api_key))
+    
+    def _probe(self, domain):
+        """Run one availability probe on an idle pipeline connection"""
+        PROBES.inc()
+        if not self.dynadot_api:
+            return self.check_availability(domain)
+        
+        api = self.probe_clients.get()
+        PROBES_IN_FLIGHT.inc()
+        try:
+            if self.probe_batcher:
+                return self.probe_batcher.probe(domain, api, self.probe_depth)
+            return api.check_domain_availability(domain)
+        finally:
+            PROBES_IN_FLIGHT.dec()
+            self.probe_clients.put(api)
+    
+    def _register_caught(self, domain, attempts):
+        """Register a domain that just became available; returns True on success"""
+        success, message = self.attempt_registration(domain)
+        
+        if success:
+            self.results[domain] = CatchResult(True, message, attempts)
+            logger.info(f"🎉 Successfully caught {domain} after {attempts} attempts!",
+                        extra={'domain': domain, 'event': 'caught', 'attempts': attempts})
+            return True
+        
+        logger.warning(f"Registration failed for {domain}: {message}")
+        return False
+    
+    def catch_domains(self, domains, max_duration_minutes=CATCH_MAX_DURATION_MINUTES, drop_time=None, strategy=None,
+                      pipeline_depth=None):
+        """Catch several domains dropping together, sharing one batched availability check per probe.
+        
+        drop_time, strategy and pipeline_depth work as in catch_domain: probes
+        follow the strategy's schedule relative to the predicted drop and are
+        pipelined across pipeline_depth connections.
+        """
+        domains = list(dict.fromkeys(domains))
+        if len(domains) == 1:
+            return {domains[0]: self.catch_domain(domains[0], max_duration_minutes, drop_time=drop_time,
+                                                  strategy=strategy, pipeline_depth=pipeline_depth)}
+        
+        strategy = get_strategy(strategy or CATCH_STRATEGY)
+        depth = max(1, pipeline_depth or CATCH_PIPELINE_DEPTH)
+        logger.info(f"Starting catch attempt for {len(domains)} domains ({strategy.name} strategy, "
+                    f"{depth} connections): {', '.join(domains)}")
+        
+        clock = self.clock
+        start = clock.monotonic()
+        drop_at = start
+        if drop_time is not None:
+            drop_at += (drop_time - clock.now()).total_seconds()
+        deadline = max(start, drop_at) + max_duration_minutes * 60
+        attempts = 0
+        next_probe = start
+        next_progress = start + 30
+        in_flight = set()
+        remaining = list(domains)
+        caught = {domain: False for domain in domains}
+        
+        # Initialize tracking
+        for domain in domains:
+            self.attempts[domain] = 0
+            self.results[domain] = CatchResult()
+        
+        self._prepare_probe_clients(depth)
+        pool = ThreadPoolExecutor(max_workers=depth, thread_name_prefix='probe') if depth > 1 else None
+        
+        try:
+            while remaining and clock.monotonic() < deadline:
+                # Collect finished probes
+                available = set()
+                for future in [f for f in in_flight if f.done()]:
+                    in_flight.discard(future)
+                    available.update(domain for domain, is_available in future.result().items() if is_available)
+                
+                # Launch the next probe when it is due and a connection is free
+                now = clock.monotonic()
+                if now >= next_probe and len(in_flight) < depth:
+                    attempts += 1
+                    for domain in remaining:
+                        self.attempts[domain] = attempts
+                    if pool:
+                        in_flight.add(pool.submit(self._probe_many, list(remaining)))
+                    else:
+                        available.update(domain for domain, is_available in self._probe_many(remaining).items()
+                                         if is_available)
+                    
+                    # Never fire missed probes back to back
+                    next_probe = max(next_probe + strategy.interval_at(now - drop_at), now)
+                
+                for domain in [d for d in remaining if d in available]:
+                    logger.info(f"Domain {domain} is available! Attempting registration...",
+                                extra={'domain': domain, 'event': 'available', 'attempts': attempts})
+                    if self._register_caught(domain, attempts):
+                        caught[domain] = True
+                        remaining.remove(domain)
+                
+                # Log progress every 30 seconds
+                if now >= next_progress:
+                    logger.info(f"Attempt {attempts}: {now - start:.1f}s elapsed for {len(remaining)} domains "
+                                f"({now - drop_at:+.1f}s from drop, {len(in_flight)} in flight)")
+                    next_progress = now + 30
+                
+                # Wait for the next probe slot, a finished probe, or the deadline
+                now = clock.monotonic()
+                timeout = 0.5 if len(in_flight) >= depth else max(0.0, next_probe - now)
+                timeout = min(timeout, max(0.0, deadline - now))
+                if in_flight:
+                    wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                elif timeout > 0:
+                    clock.sleep(timeout)
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        # Final attempt
+        if remaining:
+            logger.info(f"Final attempt for {len(remaining)} domains...")
+            self._register_available(remaining, caught, attempts)
+        
+        # Update final result
+        for domain in remaining:
+            message = f"Failed after {attempts} attempts in {max_duration_minutes} minutes"
+            self.results[domain] = CatchResult(False, message, attempts)
+            logger.warning(f"Failed to catch {domain} after {attempts} attempts",
+                           extra={'domain': domain, 'event': 'catch_failed', 'attempts': attempts})
+        
+        return caught
+    
+    def _probe_many(self, domains):
+        """Run one batched availability probe on an idle pipeline connection"""
+        PROBES.inc()
+        if not self.dynadot_api:
+            return self.check_availability_many(domains)
+        
+        api = self.probe_clients.get()
+        PROBES_IN_FLIGHT.inc()
+        try:
+            return api.check_many(domains)
+        finally:
+            PROBES_IN_FLIGHT.dec()
+            self.probe_clients.put(api)
+    
+    def _register_available(self, remaining, caught, attempts):
+        """Register every domain in remaining that is available; caught ones are removed"""
+        availability = self.check_availability_many(remaining)
+        for domain in [d for d in remaining if availability.get(d)]:
+            logger.info(f"Domain {domain} is available! Attempting registration...")
+            if self._register_caught(domain, attempts):
+                caught[domain] = True
+                remaining.remove(domain)
+    
     def get_catch_stats(self, domain):
         """Get statistics for a domain catch attempt"""
-        return self.results.get(domain, {'success': False, 'message': 'No attempts made', 'attempts': 0})
+        return self.results.get(domain, NO_ATTEMPTS)
     
     def cleanup(self):
         """Clean up resources"""
-        self.session.close()
+        # Sessions come from the shared transport pool and stay open for other catches
+        self.probe_clients = None
 
 if __name__ == "__main__":
     catcher = DomainCatcher()
@@ -235,18 +531,19 @@ if __name__ == "__main__":
         exit(1)
     
     try:
-        domain = input("Enter domain to catch: ").strip()
-        if not domain:
+        domains = [d.strip() for d in input("Enter domain(s) to catch, comma separated: ").split(',') if d.strip()]
+        if not domains:
             print("No domain provided")
             exit(1)
         
-        print(f"Starting catch attempt for {domain}...")
-        success = catcher.catch_domain(domain)
+        print(f"Starting catch attempt for {', '.join(domains)}...")
+        caught = catcher.catch_domains(domains)
         
-        stats = catcher.get_catch_stats(domain)
-        print(f"\nCatch result: {'Success' if success else 'Failed'}")
-        print(f"Attempts: {stats['attempts']}")
-        print(f"Message: {stats['message']}")
+        for domain, success in caught.items():
+            stats = catcher.get_catch_stats(domain)
+            print(f"\n{domain} catch result: {'Success' if success else 'Failed'}")
+            print(f"Attempts: {stats['attempts']}")
+            print(f"Message: {stats['message']}")
         
     except KeyboardInterrupt:
         print("\nCatch attempt interrupted by user")
@@ -1,109 +1,319 @@
 import time
 import logging
-from datetime import datetime
-from config import DOMAINS_FILE, LOG_LEVEL, LOG_FILE, USE_FREE_WHOIS
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from urllib.parse import urlsplit
+from config import (
+    DOMAINS_FILE, STATUS_SOURCE, DYNADOT_SEARCH_BATCH_SIZE,
+    SWEEP_WORKERS, SWEEP_REQUESTS_PER_SECOND, SWEEP_PROGRESS_INTERVAL, POLL_PAGE_SIZE
+)
+from logging_setup import configure_logging
 from free_whois_checker import FreeWhoisChecker
 from dynadot_api import DynadotAPI
+from rdap_client import RDAPClient
+from lookup_router import LookupRouter
+from rate_limiter import RateLimiter
+from database import DomainDatabase
+from status_cache import StatusCache
+from watchlist import Watchlist
+from sharding import get_coordinator
+from lifecycle import LifecyclePolicy
+from domain_record import DomainRecord, DomainStatus
+import metrics
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+DOMAIN_CHECKS = metrics.counter('domain_catcher_domain_checks_total',
+                                'Domain status checks by resulting lifecycle phase', ['phase'])
+DUE_DOMAINS = metrics.gauge('domain_catcher_due_domains', 'Watched domains due at the start of the last round')
+WATCHED_DOMAINS = metrics.gauge('domain_catcher_watched_domains', 'Domains on the watchlist')
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 class DomainStatusChecker:
     def __init__(self):
-        self.free_checker = FreeWhoisChecker()
-        self.dynadot_api = DynadotAPI()
-        self.domains_cache = {}  # Cache for domain status
+        self.source = STATUS_SOURCE  # 'dynadot', 'whois' or 'rdap'
+        self.db = DomainDatabase()
+        self.cache = StatusCache(self.db)  # Persistent LRU cache for domain status (see warm_cache)
+        self.rate_limiter = RateLimiter(SWEEP_REQUESTS_PER_SECOND)
+        self.watchlist = Watchlist(DOMAINS_FILE, db=self.db)
+        self.shard = get_coordinator()  # None unless SHARD_NODE_ID is set
+        self.swept = None  # (ring, watchlist version, start) of this node's last complete due round
+        self.policy = LifecyclePolicy()
+        WATCHED_DOMAINS.set_function(self.watchlist.count)
+    
+    # Lookup clients are built on first use; a checker mostly needs only the one for its source
+    @cached_property
+    def free_checker(self):
+        return FreeWhoisChecker()
     
-    def check_domain_status(self, domain):
-        """Check domain status using Dynadot API or free whois command"""
+    @cached_property
+    def dynadot_api(self):
+        return DynadotAPI()
+    
+    @cached_property
+    def rdap_client(self):
+        return RDAPClient()
+    
+    def warm_cache(self):
+        """Preload fresh statuses from the database (lookups read through to it anyway)"""
+        return self.cache.warm()
+    
+    def check_domain_status(self, domain, use_cache=True):
+        """Check domain status using Dynadot API, RDAP or free WHOIS; returns a DomainRecord or None"""
         try:
             # Check cache first
-            if domain in self.domains_cache:
-                cached_info = self.domains_cache[domain]
-                # Use cache if less than 1 hour old
-                if datetime.now().timestamp() - datetime.fromisoformat(cached_info['last_updated']).timestamp() < 3600:
-                    logger.debug(f"Using cached data for {domain}")
-                    return cached_info
+            cached_info = self._get_cached(domain) if use_cache else None
+            if cached_info:
+                return cached_info
             
-            # Use Dynadot API first (more reliable)
-            if not USE_FREE_WHOIS:
-                logger.info(f"Checking {domain} using Dynadot API")
-                available = self.dynadot_api.check_domain_availability(domain)
-                
-                domain_info = {
-                    'domain': domain,
-                    'status': 'available' if available else 'registered',
-                    'expiry_date': '',
-                    'registrar': 'unknown',
-                    'last_updated': datetime.now().isoformat(),
-                    'source': 'dynadot_api'
-                }
-                
-                if domain_info:
-                    # Cache the result
-                    self.domains_cache[domain] = domain_info
-                    logger.info(f"Status for {domain}: {domain_info['status']}")
-                
-                return domain_info
-            else:
-                # Fallback to free whois checker
-                domain_info = self.free_checker.check_domain_status(domain)
-                
-                if domain_info:
-                    # Cache the result
-                    self.domains_cache[domain] = domain_info
-                    logger.info(f"Status for {domain}: {domain_info['status']}")
-                
-                return domain_info
+            # Pace lookups against the API budget (cache hits are free)
+            self.rate_limiter.acquire()
+            
+            return self._fetch_status(domain)
             
         except Exception as e:
             logger.error(f"Error checking {domain}: {e}")
             return None
     
-    def is_pending_delete(self, domain_info):
-        """Check if domain is in pendingDelete status"""
-        return self.free_checker.is_pending_delete(domain_info)
+    def _fetch_status(self, domain):
+        """Look up domain at the configured source and cache the result (no pacing)"""
+        # Use Dynadot API first (more reliable)
+        if self.source == 'dynadot':
+            logger.info(f"Checking {domain} using Dynadot API")
+            available = self.dynadot_api.check_domain_availability(domain)
+            if available is None:
+                # The search failed; nothing is known, so nothing is cached or rescheduled
+                return None
+            
+            domain_info = self._dynadot_domain_info(domain, available)
+            
+            if domain_info:
+                # Cache the result
+                self.cache.put(domain_info)
+                logger.info(f"Status for {domain}: {domain_info['status']}")
+            
+            return domain_info
+        elif self.source == 'rdap':
+            # Registry RDAP: full EPP status, expiry and deletion events
+            logger.info(f"Checking {domain} using RDAP")
+            domain_info = DomainRecord.from_dict(self.rdap_client.check_domain_status(domain))
+            
+            if domain_info:
+                # Cache the result
+                self.cache.put(domain_info)
+                logger.info(f"Status for {domain}: {domain_info['status']}")
+            
+            return domain_info
+        else:
+            # Fallback to free whois checker
+            domain_info = DomainRecord.from_dict(self.free_checker.check_domain_status(domain))
+            
+            if domain_info:
+                # Cache the result
+                self.cache.put(domain_info)
+                logger.info(f"Status for {domain}: {domain_info['status']}")
+            
+            return domain_info
+    
+    def check_many_status(self, domains, use_cache=True):
+        """Check many domains with one Dynadot search request per batch.
+        
+        Returns a dict mapping each domain to its DomainRecord, or None if it
+        could not be checked. Falls back to per-domain checks for WHOIS and RDAP.
+        """
+        if self.source != 'dynadot' or len(domains) <= 1:
+            return {domain: self.check_domain_status(domain, use_cache) for domain in domains}
+        
+        results = {}
+        uncached = []
+        for domain in domains:
+            cached_info = self._get_cached(domain) if use_cache else None
+            if cached_info:
+                results[domain] = cached_info
+            else:
+                uncached.append(domain)
+        
+        for i in range(0, len(uncached), DYNADOT_SEARCH_BATCH_SIZE):
+            batch = uncached[i:i + DYNADOT_SEARCH_BATCH_SIZE]
+            fresh = []
+            # One search request per batch, paced against the API budget
+            self.rate_limiter.acquire()
+            try:
+                availability = self.dynadot_api.check_many(batch)
+            except Exception as e:
+                logger.error(f"Error checking batch starting at {batch[0]}: {e}")
+                availability = {}
+            
+            for domain in batch:
+                available = availability.get(domain)
+                if available is None:
+                    results[domain] = None
+                    continue
+                domain_info = self._dynadot_domain_info(domain, available)
+                fresh.append(domain_info)
+                logger.info(f"Status for {domain}: {domain_info['status']}")
+                results[domain] = domain_info
+            
+            # Cache the batch in one write
+            self.cache.put_many(fresh)
+        
+        return results
+    
+    def _get_cached(self, domain):
+        """Return cached domain info if it is still fresh (TTL depends on status)"""
+        cached_info = self.cache.get(domain)
+        if cached_info:
+            logger.debug(f"Using cached data for {domain}")
+        return cached_info
+    
+    def get_cache_stats(self):
+        """Status cache hit/miss counters"""
+        return self.cache.stats()
+    
+    def _dynadot_domain_info(self, domain, available):
+        """Build a DomainRecord from a Dynadot availability result"""
+        status = DomainStatus.AVAILABLE if available else DomainStatus.REGISTERED
+        return DomainRecord(domain, status, source='dynadot_api')
+    
+    @staticmethod
+    def is_pending_delete(domain_info):
+        """Check if domain is in pendingDelete status (a pure check: no lookup client is built)"""
+        return bool(domain_info) and (domain_info.get('status') or '').lower() == 'pendingdelete'
     
-    def is_expired(self, domain_info):
+    @staticmethod
+    def is_expired(domain_info):
         """Check if domain is expired"""
-        return self.free_checker.is_expired(domain_info)
+        return bool(domain_info) and (domain_info.get('status') or '').lower() == 'expired'
     
     def load_domains(self):
-        """Load domains from domains.txt"""
-        try:
-            with open(DOMAINS_FILE, 'r', encoding='utf-8') as f:
-                domains = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-            logger.info(f"Loaded {len(domains)} domains from {DOMAINS_FILE}")
-            return domains
-        except FileNotFoundError:
-            logger.error(f"Error: {DOMAINS_FILE} not found")
-            return []
-        except Exception as e:
-            logger.error(f"Error loading domains: {e}")
-            return []
+        """Sync domains.txt into the watchlist (only changes are applied) and stream it back"""
+        if self.watchlist.refresh() is None:
+            logger.warning(f"Using the last synced watchlist; {self.watchlist.path} could not be loaded")
+        if self.shard:
+            # Only this node's slice of the ring; the other nodes sweep the rest
+            return self.shard.filter(self.watchlist.domains())
+        return self.watchlist.domains()
     
-    def monitor_all_domains(self):
-        """Monitor all domains and return pendingDelete ones"""
+    def monitor_all_domains(self, workers=None):
+        """Check every watched domain now and return pendingDelete ones"""
         domains = self.load_domains()
-        if not domains:
+        total = self.watchlist.count()
+        if not total:
             logger.warning("No domains to monitor")
             return []
-            
+        
+        workers = SWEEP_WORKERS if workers is None else workers
+        budget = f"{SWEEP_REQUESTS_PER_SECOND} req/s budget" if self.source == 'dynadot' else "per-registry budgets"
+        if self.shard:
+            members = len(self.shard.members)
+            logger.info(f"Shard {self.shard.node_id}: sweeping ~1/{members} of {total} domains ({members} live nodes)")
+            total = f"~{total // members}"
+        logger.info(f"Starting sweep of {total} domains ({workers} workers, {budget})")
+        
+        return self._process_sweep(self._sweep(domains, workers), total)
+    
+    def check_due_domains(self, workers=None):
+        """Check only the domains whose lifecycle schedule says they are due; return pendingDelete ones"""
+        if self.watchlist.refresh() is None:
+            logger.warning(f"Using the last synced watchlist; {self.watchlist.path} could not be loaded")
+        now = time.time()
+        ring, version = (self.shard.ring, self._watchlist_version()) if self.shard else (None, None)
+        ranges = self._due_ranges(now, ring, version)
+        total = sum(self.db.count_due_domains(until, after[0]) for after, until in ranges)
+        if not self.shard:
+            DUE_DOMAINS.set(total)
+        if not total:
+            logger.info("No domains due for a check")
+            if self.shard:
+                DUE_DOMAINS.set(0)
+                self.swept = (ring, version, now)
+            return []
+        
+        workers = SWEEP_WORKERS if workers is None else workers
+        if self.shard:
+            total = f"up to {total}"  # Other nodes' due domains are counted here and skipped below
+        logger.info(f"Checking {total} due domains of {self.watchlist.count()} watched ({workers} workers)")
+        
+        # A due domain is due because its cached status is too old to rely on
+        pending = self._process_sweep(self._sweep(self._due_domains(ranges), workers, use_cache=False), total)
+        if self.shard:
+            self.swept = (ring, version, now)
+        return pending
+    
+    def _due_ranges(self, now, ring, version):
+        """Keyset ranges ((next_check_at, domain) to start after, due by) to read this round.
+        
+        After a complete round on a sharded node, every domain this node owns
+        that was due by its start has been rescheduled past it, so whatever is
+        still due from before then belongs to other nodes and is not read
+        again (nor written: they own its schedule). Never-checked domains
+        (next_check_at 0) are only read again when the watchlist was re-synced.
+        A ring change reads everything once more.
+        """
+        swept = self.swept
+        if not self.shard or not swept or swept[0] is not ring:
+            return [((0, ''), now)]
+        ranges = [((swept[2], ''), now)]
+        if version != swept[1]:
+            ranges.insert(0, ((0, ''), 0))
+        return ranges
+    
+    def _watchlist_version(self):
+        """Changes whenever any process re-syncs domains.txt into the database"""
+        state = self.db.get_watchlist_file(self.watchlist.key)
+        return (state['synced_at'], state['sha256']) if state else None
+    
+    def _due_domains(self, ranges):
+        """Yield watched domains due in ranges, soonest first (this node's slice when sharded)"""
+        owned = 0
+        for after, until in ranges:
+            while True:
+                page = self.db.get_due_domains_page(until, after, POLL_PAGE_SIZE)
+                if not page:
+                    break
+                for domain, _ in page:
+                    if not self.shard or self.shard.owns(domain):
+                        owned += 1
+                        yield domain
+                domain, next_check_at = page[-1]
+                after = (next_check_at, domain)  # The keyset is ordered (next_check_at, domain)
+        if self.shard:
+            DUE_DOMAINS.set(owned)
+    
+    def next_check_time(self):
+        """Epoch seconds when the next watched domain falls due, or None if none are watched.
+        
+        On a sharded node only domains rescheduled since the last round count:
+        anything older is another node's (see _due_ranges).
+        """
+        if not self.shard:
+            return self.db.get_next_check_at()
+        swept = self.swept
+        if not swept or swept[0] is not self.shard.ring:
+            return time.time()  # First round, or membership changed: some other domains may be ours now
+        return self.db.get_next_check_at(after=swept[2])
+    
+    def _process_sweep(self, results, total):
+        """Log and reschedule sweep results; returns the pendingDelete ones"""
         pending_delete = []
         expired_domains = []
+        failed = 0
+        checks = []
+        start_time = time.monotonic()
         
-        for domain in domains:
-            logger.info(f"Checking {domain}...")
-            domain_info = self.check_domain_status(domain)
-            
+        for checked, (domain, domain_info) in enumerate(results, 1):
             if domain_info:
                 if self.is_pending_delete(domain_info):
                     pending_delete.append(domain_info)
@@ -114,25 +324,106 @@ class DomainStatusChecker:
                 else:
                     logger.info(f"SUCCESS: {domain} status: {domain_info['status']}")
             else:
+                failed += 1
                 logger.error(f"FAILED: Failed to check {domain}")
             
-            # Rate limiting - be respectful to the API
-            time.sleep(1)
+            # The next check follows the domain's lifecycle phase
+            phase, next_check_at = self.policy.schedule(domain_info)
+            DOMAIN_CHECKS.labels(phase).inc()
+            checks.append((domain, domain_info, phase, next_check_at))
+            if len(checks) >= POLL_PAGE_SIZE:
+                self.db.save_domain_checks(checks)
+                checks = []
+            
+            if checked % SWEEP_PROGRESS_INTERVAL == 0:
+                elapsed = time.monotonic() - start_time
+                logger.info(f"Sweep progress: {checked}/{total} domains in {elapsed:.1f}s")
+        
+        if checks:
+            self.db.save_domain_checks(checks)
         
         # Log summary
-        logger.info(f"Monitoring complete: {len(pending_delete)} pendingDelete, {len(expired_domains)} expired")
+        elapsed = time.monotonic() - start_time
+        logger.info(f"Monitoring complete in {elapsed:.1f}s: {len(pending_delete)} pendingDelete, "
+                    f"{len(expired_domains)} expired, {failed} failed")
+        logger.info(f"Status cache: {self.cache.stats()}")
         
         return pending_delete
     
+    def _sweep(self, domains, workers, use_cache=True):
+        """Yield (domain, domain_info) pairs for any iterable of domains (in order for Dynadot)"""
+        if self.source != 'dynadot':
+            # WHOIS/RDAP: each registry gets its own budget via the router
+            yield from self._sweep_routed(domains, workers, use_cache)
+            return
+        
+        # Dynadot mode: one multi-domain search request per batch
+        units = chunked(domains, DYNADOT_SEARCH_BATCH_SIZE)
+        
+        if workers <= 1:
+            for batch in units:
+                yield from self._check_for_sweep(batch, use_cache)
+            return
+        
+        # Bounded worker pool; pacing comes from the shared rate limiter,
+        # so sweep time depends on the API budget rather than round-trip latency.
+        # Only a few batches are submitted ahead, so the watchlist is read lazily.
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sweep') as executor:
+            submitted = deque()
+            for batch in units:
+                submitted.append(executor.submit(self._check_for_sweep, batch, use_cache))
+                if len(submitted) > workers * 2:
+                    yield from submitted.popleft().result()
+            while submitted:
+                yield from submitted.popleft().result()
+    
+    def _sweep_routed(self, domains, workers, use_cache=True):
+        """Yield (domain, domain_info) pairs as lookups finish, paced per registry server"""
+        cached = deque()
+        
+        def uncached():
+            # Cache hits never reach the router, so they cost no registry budget
+            for domain in domains:
+                cached_info = self._get_cached(domain) if use_cache else None
+                if cached_info:
+                    cached.append((domain, cached_info))
+                else:
+                    yield domain
+        
+        router = LookupRouter(self._route, self._fetch_status, workers=workers)
+        for result in router.run(uncached()):
+            while cached:
+                yield cached.popleft()
+            yield result
+        yield from cached
+    
+    def _route(self, domain):
+        """Server that answers status lookups for domain (WHOIS server or RDAP host)"""
+        if self.source == 'rdap':
+            base_url = self.rdap_client.server_for(domain)
+            return urlsplit(base_url).netloc if base_url else None
+        return self.free_checker.client.server_for(domain)
+    
+    def _check_for_sweep(self, batch, use_cache=True):
+        """Check one unit of sweep work and return (domain, domain_info) pairs"""
+        if len(batch) == 1:
+            logger.info(f"Checking {batch[0]}...")
+            return [(batch[0], self.check_domain_status(batch[0], use_cache))]
+        
+        logger.info(f"Checking {len(batch)} domains ({batch[0]} ... {batch[-1]})...")
+        results = self.check_many_status(batch, use_cache)
+        return [(domain, results.get(domain)) for domain in batch]
+    
     def get_domain_details(self, domain):
         """Get detailed information about a specific domain"""
         return self.check_domain_status(domain)
 
 if __name__ == "__main__":
     checker = DomainStatusChecker()
+    checker.warm_cache()
     
     # Test Dynadot API availability
-    if not checker.dynadot_api.test_api_connection():
+    if checker.source == 'dynadot' and not checker.dynadot_api.test_api_connection():
         logger.error("Please check your Dynadot API key and internet connection")
         exit(1)
     
@@ -0,0 +1,87 @@
+"""
+Clocks for the scheduler, timer and catch loop
+
+Everything that reads the time or waits goes through a clock object, so
+the same code runs against wall time in production and against a
+VirtualClock in simulation, where sleeping just moves the clock forward
+and days of drops replay in seconds.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """Real time: time.time(), time.monotonic() and blocking waits"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self):
+        """Current aware UTC datetime"""
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, timeout):
+        """Wait for a threading.Event up to timeout seconds; True if it is set"""
+        return event.wait(timeout)
+
+    def fork(self):
+        """Real time is shared, so every activity uses this clock"""
+        return self
+
+
+class VirtualClock:
+    """Simulated time that only moves when advanced, slept on or waited on.
+
+    time() and monotonic() return the same epoch-seconds value. A VirtualClock
+    is meant to be driven from one thread; fork() gives a concurrent activity
+    (one catch) its own timeline starting from the current instant.
+    """
+
+    def __init__(self, start=None):
+        self.current = time.time() if start is None else float(start)
+        self.lock = threading.Lock()
+
+    def time(self):
+        return self.current
+
+    def monotonic(self):
+        return self.current
+
+    def now(self):
+        return datetime.fromtimestamp(self.current, timezone.utc)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.advance(seconds)
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.sleep(timeout)
+        return event.is_set()
+
+    def advance(self, seconds):
+        with self.lock:
+            self.current += seconds
+        return self.current
+
+    def advance_to(self, instant):
+        """Move forward to epoch seconds instant (never backwards)"""
+        with self.lock:
+            self.current = max(self.current, instant)
+        return self.current
+
+    def fork(self):
+        """An independent clock starting at this clock's current time"""
+        return VirtualClock(self.current)
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -14,6 +14,19 @@ except (ImportError, UnicodeDecodeError, FileNotFoundError):
 # WHOIS Configuration (Dynadot API)
 USE_FREE_WHOIS = False  # Use Dynadot API instead of system whois command
 WHOIS_COMMAND = 'whois'  # Fallback system command
+WHOIS_BACKEND = os.getenv('WHOIS_BACKEND', 'socket')  # 'socket' (built-in port-43 client) or 'command'
+WHOIS_TIMEOUT = 10  # Seconds per port-43 query
+WHOIS_SERVER_CONCURRENCY = 2  # Simultaneous queries per WHOIS server
+WHOIS_FOLLOW_REFERRALS = True  # Also ask the registrar's WHOIS server named in the registry answer
+
+# Status source for monitoring: 'dynadot' (availability only), 'whois' or 'rdap' (full EPP status)
+STATUS_SOURCE = os.getenv('STATUS_SOURCE', 'whois' if USE_FREE_WHOIS else 'dynadot')
+
+# RDAP settings
+RDAP_BOOTSTRAP_URL = 'https://data.iana.org/rdap/dns.json'
+RDAP_BOOTSTRAP_FILE = 'rdap_dns.json'  # Local copy of the IANA bootstrap file
+RDAP_BOOTSTRAP_MAX_AGE = 7 * 24 * 3600  # Refresh the local copy after this many seconds
+RDAP_TIMEOUT = 10  # Seconds per RDAP request
 
 # Registration APIs
 PORKBUN_API_KEY = os.getenv('PORKBUN_API_KEY')
@@ -22,14 +35,97 @@ PORKBUN_SECRET_KEY = os.getenv('PORKBUN_SECRET_KEY')
 # Dynadot API for domain registration (primary)
 DYNADOT_API_KEY = os.getenv('DYNADOT_API_KEY')
 DYNADOT_API_URL = 'https://api.dynadot.com/api3.json'
+DYNADOT_SEARCH_BATCH_SIZE = 100  # Max domains per search request (domain0..domain99)
 
 # Monitoring Settings
 CHECK_INTERVAL = 1200  # 20 minutes in seconds
+PENDING_CHECK_INTERVAL = 3600  # Re-check interval for domains with no known expiry date (seconds)
 CATCH_INTERVAL = 0.05  # 50ms between registration attempts
 DROP_BUFFER_TIME = 300  # 5 minutes before actual drop time
+CATCH_MAX_DURATION_MINUTES = 5  # Keep probing this long after the predicted drop
+MAX_CONCURRENT_CATCHES = int(os.getenv('MAX_CONCURRENT_CATCHES', '10'))  # Catches running at the same time
+
+# Catch engine settings
+CATCH_STRATEGY = os.getenv('CATCH_STRATEGY', 'burst')  # 'burst' or 'constant'
+CATCH_PIPELINE_DEPTH = int(os.getenv('CATCH_PIPELINE_DEPTH', '4'))  # Probes in flight per catch (one connection each)
+CATCH_PRE_DROP_INTERVAL = 1.0  # Probe interval well before the drop (seconds)
+CATCH_RAMP_SECONDS = 30  # Ramp from pre-drop rate to burst rate over this many seconds before the drop
+CATCH_BURST_SECONDS = 60  # Probe at CATCH_INTERVAL for this long after the predicted drop
+CATCH_DECAY_HALF_LIFE = 30  # After the burst, the probe interval doubles every N seconds
+CATCH_TAIL_INTERVAL = 1.0  # Slowest probe interval after decay (seconds)
+
+# HTTP transport settings
+HTTP_POOL_CONNECTIONS = 10  # Hosts kept in each session's pool
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '64'))  # Keep-alive connections per host
+DNS_CACHE_TTL = 300  # Seconds to cache DNS lookups (0 disables the cache)
+DNS_CACHE_SIZE = 256  # Host/port pairs kept in the DNS cache (least recently used are dropped)
+PREWARM_SECONDS = 10  # Open API connections this many seconds before a catch starts
+PREWARM_CONNECTIONS = CATCH_PIPELINE_DEPTH + 2  # Probe connections plus spares for register calls
+
+# Status sweep settings
+SWEEP_WORKERS = int(os.getenv('SWEEP_WORKERS', '8'))  # 1 = sequential sweep
+SWEEP_REQUESTS_PER_SECOND = float(os.getenv('SWEEP_REQUESTS_PER_SECOND', '2'))  # API budget, 0 = unlimited
+SWEEP_PROGRESS_INTERVAL = 100  # Log sweep progress every N domains
+
+# Per-registry budgets for WHOIS/RDAP sweeps, keyed by WHOIS server or RDAP host.
+# rate is lookups per second, concurrency the queries in flight at once.
+REGISTRY_LIMITS = {
+    'rdap.verisign.com': {'rate': 10, 'concurrency': 8},
+    'whois.verisign-grs.com': {'rate': 2, 'concurrency': 2},
+    'rdap.publicinterestregistry.org': {'rate': 5, 'concurrency': 4},
+    'pubapi.registry.google': {'rate': 5, 'concurrency': 4},
+    'whois.denic.de': {'rate': 0.2, 'concurrency': 1},  # Bans after a burst of queries
+    'whois.nic.uk': {'rate': 0.2, 'concurrency': 1},
+    'whois.jprs.jp': {'rate': 0.2, 'concurrency': 1},
+    'whois.tcinet.ru': {'rate': 0.2, 'concurrency': 1},
+    'whois.iana.org': {'rate': 1, 'concurrency': 1},
+    'default': {'rate': 1, 'concurrency': 2}
+}
+ROUTER_BURST = 1  # Lookups a lane may bank beyond its rate (an entry's 'burst' overrides); 1 = no burst
+ROUTER_MAX_PENDING = 10000  # Watchlist entries read ahead of dispatch
+ROUTER_RESOLVERS = 4  # Threads finding the server for a TLD seen for the first time (WHOIS/RDAP discovery)
+
+# Status cache settings (LRU, persisted to the status_cache table)
+STATUS_CACHE_MAX_ENTRIES = int(os.getenv('STATUS_CACHE_MAX_ENTRIES', '100000'))
+STATUS_CACHE_TTLS = {  # Seconds a status stays fresh
+    'available': 300,
+    'pendingDelete': 900,
+    'expired': 1800,
+    'registered': 3600,
+    'default': 3600
+}
+
+# Lifecycle-aware polling (each domain's next check follows its lifecycle phase)
+POLL_MIN_INTERVAL = 300  # Never re-check a domain sooner than this (seconds)
+POLL_MAX_INTERVAL = 7 * 86400  # Domains far from any transition are checked weekly
+POLL_TRANSITION_FRACTION = 0.25  # Next check after this fraction of the time to the next transition
+POLL_UNCERTAIN_INTERVAL = 6 * 3600  # Cap while the next transition is only an estimate (grace, redemption)
+POLL_AVAILABLE_INTERVAL = 86400  # Available domains
+POLL_RETRY_INTERVAL = 900  # After a failed lookup
+POLL_JITTER = 0.1  # +/- fraction so domains added together spread out over time
+POLL_MIN_WAIT = 15  # Shortest pause between due-queue rounds (seconds)
+POLL_MAX_WAIT = 300  # Longest pause, so domains.txt edits are picked up promptly
+POLL_PAGE_SIZE = 1000  # Due domains read per query
+LIFECYCLE_GRACE_DAYS = 30  # Auto-renew grace after expiry (registrar-dependent, 0-45 days)
+LIFECYCLE_REDEMPTION_DAYS = 30  # Redemption period before pendingDelete
+LIFECYCLE_PENDING_DELETE_DAYS = 5  # pendingDelete before the domain drops
+
+# Sharded monitoring (unset SHARD_NODE_ID = this process owns every domain)
+SHARD_NODE_ID = os.getenv('SHARD_NODE_ID')  # Unique per worker process/node, e.g. 'node-a'
+SHARD_DATABASE_FILE = os.getenv('SHARD_DATABASE_FILE')  # Lease table location (defaults to DATABASE_FILE)
+SHARD_VNODES = 128  # Virtual nodes per worker on the hash ring
+SHARD_HEARTBEAT_INTERVAL = 10  # Seconds between lease renewals
+SHARD_LEASE_TTL = 30  # A node whose lease is older than this is considered dead
+SHARD_CLAIM_TTL = 1800  # Seconds a node holds a catch claim (covers lead time plus the catch)
 
 # Notification Settings (Discord focus for beginners)
 DISCORD_WEBHOOK = os.getenv('DISCORD_WEBHOOK')
+NOTIFY_QUEUE_SIZE = 1000  # Pending notifications before low-priority ones are merged or dropped
+NOTIFY_WORKERS = 1  # Background delivery threads
+NOTIFY_BATCH_MAX = 10  # Messages coalesced into one webhook call (Discord allows 10 embeds)
+NOTIFY_MAX_RETRIES = 3  # Retries after a Discord 429
+NOTIFY_MERGE_KEEP = 5  # Merged low-priority messages kept in full; further ones are only counted
+DISCORD_EMBED_TOTAL = 6000  # Discord's limit on the combined text of all embeds in one message
 
 # Optional: Email notifications (can be added later)
 EMAIL_SMTP_SERVER = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
@@ -39,13 +135,26 @@ EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
 
 # Target domains
 DOMAINS_FILE = 'domains.txt'
+WATCHLIST_PAGE_SIZE = 1000  # Domains fetched per keyset page when streaming the watchlist
 
 # Database (SQLite for beginners)
 DATABASE_FILE = 'domains.db'
+DB_BUSY_TIMEOUT = 30  # Seconds to wait for a write lock
+DB_CACHE_SIZE_KB = 16384  # Page cache per connection
+DB_MMAP_SIZE = 256 * 1024 * 1024  # Memory-mapped I/O window in bytes
 
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = 'domain_catcher.log'
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # 'text' or 'json' (one object per line)
+LOG_QUEUE_SIZE = 10000  # Records buffered for the writer thread; overflow is dropped, never blocks
+LOG_SAMPLE_INTERVAL = float(os.getenv('LOG_SAMPLE_INTERVAL', '5'))  # At most one per-probe line per N seconds
+
+# Live progress API (health_server /api/progress and its event stream)
+PROGRESS_PUBLISH_INTERVAL = 0.5  # A running catch publishes its counters at most this often (seconds)
+PROGRESS_HISTORY = 50  # Finished catches kept for the API
+PROGRESS_STREAM_INTERVAL = 1.0  # Seconds between snapshot checks on each event stream
+PROGRESS_STREAM_KEEPALIVE = 15  # Comment line sent after this many quiet seconds
 
 # Registrar-specific drop times (UTC)
 REGISTRAR_DROP_TIMES = {
@@ -1,72 +1,59 @@
 import sqlite3
+import json
+import threading
 import logging
 from datetime import datetime
-from config import DATABASE_FILE, LOG_LEVEL, LOG_FILE
+from config import (
+    DATABASE_FILE, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_KB, DB_MMAP_SIZE
+)
+from logging_setup import configure_logging
+from migrations import apply_migrations
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# One connection per (thread, database file), shared by every DomainDatabase instance.
+# Connections close when their thread exits.
+thread_connections = threading.local()
+
 class DomainDatabase:
-    def __init__(self):
-        self.db_file = DATABASE_FILE
+    def __init__(self, db_file=None):
+        self.db_file = db_file or DATABASE_FILE
         self.init_database()
     
+    def _get_connection(self):
+        """Return this thread's connection, opening and tuning it on first use"""
+        connections = getattr(thread_connections, 'connections', None)
+        if connections is None:
+            connections = thread_connections.connections = {}
+        
+        conn = connections.get(self.db_file)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=DB_BUSY_TIMEOUT)
+            # WAL lets the Flask thread read while the scheduler writes;
+            # NORMAL sync is durable across application crashes in WAL mode
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}')
+            conn.execute(f'PRAGMA mmap_size={int(DB_MMAP_SIZE)}')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            connections[self.db_file] = conn
+        return conn
+    
+    def close(self):
+        """Close the calling thread's connection"""
+        connections = getattr(thread_connections, 'connections', {})
+        conn = connections.pop(self.db_file, None)
+        if conn is not None:
+            conn.close()
+    
     def init_database(self):
-        """Initialize the database with required tables"""
+        """Initialize the database, upgrading the schema in place to the latest version"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                
-                # Create domains table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS domains (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        domain TEXT UNIQUE NOT NULL,
-                        status TEXT NOT NULL,
-                        registrar TEXT,
-                        expiry_date TEXT,
-                        last_checked DATETIME,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create catch_attempts table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS catch_attempts (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        domain TEXT NOT NULL,
-                        scheduled_time DATETIME,
-                        attempted_time DATETIME,
-                        success BOOLEAN,
-                        attempts INTEGER,
-                        message TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create notifications table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS notifications (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        domain TEXT NOT NULL,
-                        notification_type TEXT NOT NULL,
-                        message TEXT,
-                        sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        success BOOLEAN
-                    )
-                ''')
-                
-                conn.commit()
-                logger.info("Database initialized successfully")
+            with self._get_connection() as conn:
+                version = apply_migrations(conn)
+                logger.info(f"Database initialized successfully (schema version {version})")
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
@@ -74,7 +61,7 @@ class DomainDatabase:
     def add_domain(self, domain, status='unknown', registrar='unknown', expiry_date=''):
         """Add or update a domain in the database"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Check if domain exists
@@ -108,7 +95,7 @@ class DomainDatabase:
     def get_domain(self, domain):
         """Get domain information from database"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT domain, status, registrar, expiry_date, last_checked, created_at, updated_at
@@ -135,7 +122,7 @@ class DomainDatabase:
     def get_all_domains(self):
         """Get all domains from database"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT domain, status, registrar, expiry_date, last_checked, created_at, updated_at
@@ -164,7 +151,7 @@ class DomainDatabase:
     def get_pending_delete_domains(self):
         """Get all domains with pendingDelete status"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT domain, status, registrar, expiry_date, last_checked, created_at, updated_at
@@ -190,10 +177,339 @@ class DomainDatabase:
             logger.error(f"Error getting pendingDelete domains: {e}")
             return []
     
+    def get_watchlist_file(self, path):
+        """Get the state of a watchlist file at its last sync, or None if never synced"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT mtime_ns, size, sha256, domains, synced_at FROM watchlist_files WHERE path = ?
+                ''', (path,))
+                
+                result = cursor.fetchone()
+                if result:
+                    return {
+                        'mtime_ns': result[0],
+                        'size': result[1],
+                        'sha256': result[2],
+                        'domains': result[3],
+                        'synced_at': result[4]
+                    }
+                return None
+        
+        except Exception as e:
+            logger.error(f"Error getting watchlist state for {path}: {e}")
+            return None
+    
+    def touch_watchlist_file(self, path, mtime_ns, size):
+        """Record a new mtime for a watchlist file whose content did not change"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('UPDATE watchlist_files SET mtime_ns = ?, size = ? WHERE path = ?',
+                               (mtime_ns, size, path))
+                
+                conn.commit()
+                return True
+        
+        except Exception as e:
+            logger.error(f"Error updating watchlist state for {path}: {e}")
+            return False
+    
+    def sync_watchlist(self, path, domains, mtime_ns, size, sha256):
+        """Make the watched set exactly `domains` in one transaction.
+        
+        domains is any iterable; it is streamed into watchlist_staging, which
+        also deduplicates it, and only rows that differ from the current
+        watched set are written. Returns (added, removed, total), or None on error.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM watchlist_staging')
+                cursor.executemany('INSERT OR IGNORE INTO watchlist_staging (domain) VALUES (?)',
+                                   ((domain,) for domain in domains))
+                
+                # New domains
+                cursor.execute('''
+                    INSERT INTO domains (domain, status, watched)
+                    SELECT domain, 'unknown', 1 FROM watchlist_staging s
+                    WHERE NOT EXISTS (SELECT 1 FROM domains d WHERE d.domain = s.domain)
+                ''')
+                added = cursor.rowcount
+                
+                # Domains that were removed earlier and are back
+                cursor.execute('''
+                    UPDATE domains SET watched = 1, next_check_at = 0, updated_at = CURRENT_TIMESTAMP
+                    WHERE watched = 0 AND domain IN (SELECT domain FROM watchlist_staging)
+                ''')
+                added += cursor.rowcount
+                
+                # Domains no longer in the file keep their history but leave the watchlist
+                cursor.execute('''
+                    UPDATE domains SET watched = 0, updated_at = CURRENT_TIMESTAMP
+                    WHERE watched = 1 AND domain NOT IN (SELECT domain FROM watchlist_staging)
+                ''')
+                removed = cursor.rowcount
+                
+                cursor.execute('SELECT COUNT(*) FROM watchlist_staging')
+                total = cursor.fetchone()[0]
+                cursor.execute('DELETE FROM watchlist_staging')
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO watchlist_files (path, mtime_ns, size, sha256, domains, synced_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (path, mtime_ns, size, sha256, total))
+                
+                conn.commit()
+                return added, removed, total
+        
+        except Exception as e:
+            logger.error(f"Error syncing watchlist {path}: {e}")
+            return None
+    
+    def get_watched_domains_page(self, after='', limit=1000):
+        """Next page of watched domains in name order, after `after` (keyset pagination)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT domain FROM domains WHERE watched = 1 AND domain > ? ORDER BY domain LIMIT ?
+                ''', (after, limit))
+                
+                return [result[0] for result in cursor.fetchall()]
+        
+        except Exception as e:
+            logger.error(f"Error getting watched domains after {after!r}: {e}")
+            return []
+    
+    def count_watched_domains(self):
+        """Number of domains currently on the watchlist"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM domains WHERE watched = 1')
+                return cursor.fetchone()[0]
+        
+        except Exception as e:
+            logger.error(f"Error counting watched domains: {e}")
+            return 0
+    
+    def get_due_domains_page(self, now, after=(0, ''), limit=1000):
+        """Next page of watched domains due by `now`, soonest first.
+        
+        Keyset pagination on (next_check_at, domain); returns a list of
+        (domain, next_check_at) tuples.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT domain, next_check_at FROM domains
+                    WHERE watched = 1 AND next_check_at <= ? AND (next_check_at, domain) > (?, ?)
+                    ORDER BY next_check_at, domain LIMIT ?
+                ''', (now, after[0], after[1], limit))
+                
+                return cursor.fetchall()
+        
+        except Exception as e:
+            logger.error(f"Error getting due domains: {e}")
+            return []
+    
+    def count_due_domains(self, now, since=0):
+        """Number of watched domains due for a check by `now` (and not before `since`)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM domains WHERE watched = 1 AND next_check_at BETWEEN ? AND ?',
+                               (since, now))
+                return cursor.fetchone()[0]
+        
+        except Exception as e:
+            logger.error(f"Error counting due domains: {e}")
+            return 0
+    
+    def get_next_check_at(self, after=None):
+        """Earliest next_check_at among watched domains (later than `after`, if given), or None if there is none"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                if after is None:
+                    cursor.execute('SELECT MIN(next_check_at) FROM domains WHERE watched = 1')
+                else:
+                    cursor.execute('SELECT MIN(next_check_at) FROM domains WHERE watched = 1 AND next_check_at > ?',
+                                   (after,))
+                return cursor.fetchone()[0]
+        
+        except Exception as e:
+            logger.error(f"Error getting next check time: {e}")
+            return None
+    
+    def save_domain_checks(self, entries):
+        """Record check results and reschedule, in one transaction.
+        
+        entries are (domain, domain_info, phase, next_check_at) tuples;
+        domain_info is None for a failed lookup, which only moves the next check.
+        """
+        checked = [
+            (info['status'], info.get('registrar', 'unknown'), info.get('expiry_date', ''), phase, next_check_at, domain)
+            for domain, info, phase, next_check_at in entries if info
+        ]
+        failed = [(next_check_at, domain) for domain, info, _, next_check_at in entries if not info]
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    UPDATE domains SET status = ?, registrar = ?, expiry_date = ?, lifecycle_phase = ?,
+                        next_check_at = ?, last_checked = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                    WHERE domain = ?
+                ''', checked)
+                cursor.executemany('UPDATE domains SET next_check_at = ? WHERE domain = ?', failed)
+                
+                conn.commit()
+                return True
+        
+        except Exception as e:
+            logger.error(f"Error saving {len(entries)} domain checks: {e}")
+            return False
+    
+    def heartbeat_shard_node(self, node_id, host, pid, now):
+        """Create or renew a shard node's lease"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO shard_nodes (node_id, host, pid, heartbeat_at, started_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(node_id) DO UPDATE SET
+                        host = excluded.host, pid = excluded.pid, heartbeat_at = excluded.heartbeat_at
+                ''', (node_id, host, pid, now, now))
+                
+                conn.commit()
+                return True
+        
+        except Exception as e:
+            logger.error(f"Error renewing lease for shard node {node_id}: {e}")
+            return False
+    
+    def get_live_shard_nodes(self, min_heartbeat_at):
+        """IDs of shard nodes whose lease was renewed since min_heartbeat_at"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT node_id FROM shard_nodes WHERE heartbeat_at >= ? ORDER BY node_id
+                ''', (min_heartbeat_at,))
+                
+                return [result[0] for result in cursor.fetchall()]
+        
+        except Exception as e:
+            logger.error(f"Error getting live shard nodes: {e}")
+            return None
+    
+    def remove_shard_node(self, node_id):
+        """Drop a node's lease and claims (clean shutdown)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM shard_nodes WHERE node_id = ?', (node_id,))
+                cursor.execute('DELETE FROM shard_claims WHERE node_id = ?', (node_id,))
+                
+                conn.commit()
+                return True
+        
+        except Exception as e:
+            logger.error(f"Error removing shard node {node_id}: {e}")
+            return False
+    
+    def claim_shard_work(self, claim_key, node_id, now, ttl):
+        """Claim a unit of work unless another node holds an unexpired claim; True if claimed"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO shard_claims (claim_key, node_id, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(claim_key) DO UPDATE SET
+                        node_id = excluded.node_id, expires_at = excluded.expires_at
+                    WHERE shard_claims.node_id = excluded.node_id OR shard_claims.expires_at < ?
+                ''', (claim_key, node_id, now + ttl, now))
+                claimed = cursor.rowcount == 1
+                
+                conn.commit()
+                return claimed
+        
+        except Exception as e:
+            logger.error(f"Error claiming {claim_key} for shard node {node_id}: {e}")
+            return False
+    
+    def release_shard_work(self, claim_key, node_id):
+        """Release a claim held by node_id"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM shard_claims WHERE claim_key = ? AND node_id = ?',
+                               (claim_key, node_id))
+                
+                conn.commit()
+                return True
+        
+        except Exception as e:
+            logger.error(f"Error releasing {claim_key} for shard node {node_id}: {e}")
+            return False
+    
+    def save_cached_statuses(self, entries):
+        """Persist (checked_at, domain_info) status cache entries (dicts or DomainRecords)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO status_cache (domain, status, info, checked_at)
+                    VALUES (?, ?, ?, ?)
+                ''', [(info['domain'], info['status'], json.dumps(dict(info)), checked_at) for checked_at, info in entries])
+                
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error saving {len(entries)} status cache entries: {e}")
+            return False
+    
+    def get_cached_status(self, domain):
+        """Get a persisted status cache entry as (checked_at, domain_info)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT checked_at, info FROM status_cache WHERE domain = ?', (domain,))
+                
+                result = cursor.fetchone()
+                if result:
+                    return result[0], json.loads(result[1])
+                return None
+                
+        except Exception as e:
+            logger.error(f"Error getting cached status for {domain}: {e}")
+            return None
+    
+    def load_cached_statuses(self, min_checked_at, limit):
+        """Get the newest status cache entries checked since min_checked_at"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT checked_at, info FROM status_cache
+                    WHERE checked_at >= ? ORDER BY checked_at DESC LIMIT ?
+                ''', (min_checked_at, limit))
+                
+                return [(result[0], json.loads(result[1])) for result in cursor.fetchall()]
+                
+        except Exception as e:
+            logger.error(f"Error loading status cache: {e}")
+            return []
+    
     def add_catch_attempt(self, domain, scheduled_time=None, attempted_time=None, success=False, attempts=0, message=''):
         """Add a catch attempt record"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO catch_attempts (domain, scheduled_time, attempted_time, success, attempts, message)
@@ -211,7 +527,7 @@ class DomainDatabase:
     def get_catch_attempts(self, domain=None):
         """Get catch attempts (optionally filtered by domain)"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 if domain:
@@ -247,7 +563,7 @@ class DomainDatabase:
     def add_notification(self, domain, notification_type, message, success=True):
         """Add a notification record"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO notifications (domain, notification_type, message, success)
@@ -265,7 +581,7 @@ class DomainDatabase:
     def get_notifications(self, domain=None, limit=50):
         """Get notifications (optionally filtered by domain)"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 if domain:
@@ -299,20 +615,21 @@ class DomainDatabase:
     def cleanup_old_records(self, days=30):
         """Clean up old records to keep database size manageable"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Clean up old notifications
+                cutoff = f'-{int(days)} days'
                 cursor.execute('''
                     DELETE FROM notifications 
-                    WHERE sent_at < datetime('now', '-{} days')
-                '''.format(days))
+                    WHERE sent_at < datetime('now', ?)
+                ''', (cutoff,))
                 
                 # Clean up old catch attempts
                 cursor.execute('''
                     DELETE FROM catch_attempts 
-                    WHERE created_at < datetime('now', '-{} days')
-                '''.format(days))
+                    WHERE created_at < datetime('now', ?)
+                ''', (cutoff,))
                 
                 conn.commit()
                 logger.info(f"Cleaned up records older than {days} days")
@@ -325,7 +642,7 @@ class DomainDatabase:
     def get_stats(self):
         """Get database statistics"""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Count domains by status
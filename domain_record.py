@@ -0,0 +1,193 @@
+"""
+Compact in-memory domain state shared by the checker, scheduler and catcher
+
+The status cache holds one record per watched domain, so at a million
+domains the per-record overhead is most of the process. Records are slotted
+objects rather than dicts: times are epoch seconds (nothing to format on a
+check or parse on a lookup), the status is a DomainStatus and the registrar,
+TLD and source strings are interned, so every record from one registrar
+shares a single string (likewise each combination of EPP status codes).
+
+Records still answer the dict keys the rest of the code was written against
+(record['status'], record.get('expiry_date'), dict(record)), with dates
+rendered as ISO-8601 strings on access.
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from enum import Enum
+from whois_parser import parse_date
+
+UNKNOWN_REGISTRAR = 'unknown'
+
+_EPP_STATUS_SETS = {}  # Distinct EPP status tuples; there are only a few dozen combinations
+
+
+class DomainStatus(str, Enum):
+    """Lifecycle status of a checked domain; compares and hashes like its string value"""
+    AVAILABLE = 'available'
+    REGISTERED = 'registered'
+    EXPIRED = 'expired'
+    PENDING_DELETE = 'pendingDelete'
+    UNKNOWN = 'unknown'
+
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+    @classmethod
+    def _missing_(cls, value):
+        return cls.UNKNOWN
+
+
+def to_epoch(value):
+    """Epoch seconds from an ISO-8601 or WHOIS date string, a datetime or a number; None if empty.
+
+    Naive times are taken as UTC, as the registries publish them.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            value = parse_date(str(value))
+            if value is None:
+                return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def to_datetime(epoch):
+    """Aware UTC datetime for epoch seconds, or None"""
+    return None if epoch is None else datetime.fromtimestamp(epoch, timezone.utc)
+
+
+def to_iso(epoch):
+    """ISO-8601 UTC string for epoch seconds ('' for None, as the old dicts had)"""
+    return '' if epoch is None else datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def _intern(value, default):
+    return sys.intern(str(value)) if value else default
+
+
+class _Fields:
+    """Dict-style read access to KEYS, for code written against the old dicts"""
+    __slots__ = ()
+    KEYS = ()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+
+class DomainRecord(_Fields):
+    """Result of one status check of one domain"""
+    __slots__ = ('domain', 'tld', 'status', 'registrar', 'source', 'expiry', 'deletion', 'checked_at', 'epp_status')
+    KEYS = ('domain', 'status', 'expiry_date', 'registrar', 'epp_status', 'last_updated', 'source', 'deletion_date')
+
+    def __init__(self, domain, status, registrar=None, source=None, expiry=None, deletion=None, checked_at=None,
+                 epp_status=()):
+        self.domain = domain
+        self.tld = sys.intern(domain.rpartition('.')[2].lower())
+        self.status = DomainStatus(status)
+        self.registrar = _intern(registrar, UNKNOWN_REGISTRAR)
+        self.source = _intern(source, 'unknown')
+        self.expiry = expiry  # Epoch seconds, or None
+        self.deletion = deletion  # Epoch seconds of the registry's scheduled deletion, or None
+        self.checked_at = time.time() if checked_at is None else checked_at
+        codes = tuple(sys.intern(code) for code in epp_status)
+        self.epp_status = _EPP_STATUS_SETS.setdefault(codes, codes)
+
+    @classmethod
+    def from_dict(cls, domain_info, checked_at=None):
+        """Record from a checker's domain_info dict (a record is returned as is).
+
+        checked_at defaults to now: checkers build the dict just after the lookup.
+        """
+        if domain_info is None or isinstance(domain_info, cls):
+            return domain_info
+        return cls(domain_info['domain'], domain_info.get('status'), domain_info.get('registrar'),
+                   domain_info.get('source'), to_epoch(domain_info.get('expiry_date')),
+                   to_epoch(domain_info.get('deletion_date')), checked_at, domain_info.get('epp_status') or ())
+
+    @property
+    def expiry_date(self):
+        return to_iso(self.expiry)
+
+    @property
+    def deletion_date(self):
+        return to_iso(self.deletion)
+
+    @property
+    def last_updated(self):
+        return to_iso(self.checked_at)
+
+    def __repr__(self):
+        return f"<DomainRecord {self.domain} {self.status} registrar={self.registrar!r} source={self.source}>"
+
+
+class ScheduledCatch(_Fields):
+    """A catch the scheduler has set up for one domain"""
+    __slots__ = ('record', 'scheduled_at', 'drop_at', 'strategy', 'job', 'warm_jobs', 'status')
+    KEYS = ('domain_info', 'scheduled_time', 'drop_time', 'strategy', 'job', 'warm_jobs', 'status')
+
+    def __init__(self, record, scheduled_at, drop_at, strategy, job=None, warm_jobs=(), status='scheduled'):
+        self.record = record
+        self.scheduled_at = scheduled_at  # Epoch seconds the catch starts
+        self.drop_at = drop_at  # Epoch seconds of the predicted drop
+        self.strategy = strategy
+        self.job = job
+        self.warm_jobs = warm_jobs
+        self.status = status
+
+    @property
+    def domain_info(self):
+        return self.record
+
+    @property
+    def scheduled_time(self):
+        return to_datetime(self.scheduled_at)
+
+    @property
+    def drop_time(self):
+        return to_datetime(self.drop_at)
+
+    def update(self, fields):
+        """Set fields from a dict (what ThreadSafeDict.update_item does to its entries)"""
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+
+class CatchResult(_Fields):
+    """Outcome so far of the catch of one domain"""
+    __slots__ = ('success', 'message', 'attempts')
+    KEYS = __slots__
+
+    def __init__(self, success=False, message='', attempts=0):
+        self.success = success
+        self.message = message
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"<CatchResult success={self.success} attempts={self.attempts} message={self.message!r}>"
+
+
+NO_ATTEMPTS = CatchResult(message='No attempts made')
+
@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import threading
+import time
+import logging
+from datetime import timezone
+from clock import SYSTEM_CLOCK
+from logging_setup import configure_logging
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Below this many seconds the loop stops sleeping on the condition and
+# yields until the deadline, which keeps firing jitter in the sub-ms range
+SPIN_THRESHOLD = 0.002
+
+
+class TimerJob:
+    """A one-shot (or fixed-interval) job in the OneShotScheduler heap"""
+    __slots__ = ('deadline', 'seq', 'name', 'func', 'args', 'kwargs', 'interval', 'cancelled')
+
+    def __init__(self, deadline, seq, name, func, args, kwargs, interval=None):
+        self.deadline = deadline  # clock.monotonic() value
+        self.seq = seq
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def seconds_until(self, now=None):
+        return self.deadline - (time.monotonic() if now is None else now)
+
+
+class OneShotScheduler:
+    """Heap-based timer on the monotonic clock with real cancellation.
+
+    Jobs run on the thread calling run(), so callbacks must be quick and hand
+    long work (sweeps, catches) to another thread. With a VirtualClock, drive
+    the timer with run_until() instead of run().
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.heap = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.running = False
+
+    def schedule_at(self, when, func, *args, name=None, **kwargs):
+        """Run func at an absolute UTC datetime (naive datetimes are taken as UTC)"""
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        delay = (when - self.clock.now()).total_seconds()
+        return self.schedule_in(delay, func, *args, name=name, **kwargs)
+
+    def schedule_in(self, delay, func, *args, name=None, **kwargs):
+        """Run func once after delay seconds"""
+        return self._push(self.clock.monotonic() + max(0.0, delay), func, args, kwargs, name, None)
+
+    def schedule_every(self, interval, func, *args, name=None, first_delay=None, **kwargs):
+        """Run func every interval seconds (first run after first_delay, default interval)"""
+        delay = interval if first_delay is None else first_delay
+        return self._push(self.clock.monotonic() + max(0.0, delay), func, args, kwargs, name, interval)
+
+    def _push(self, deadline, func, args, kwargs, name, interval):
+        job = TimerJob(deadline, next(self.counter), name or getattr(func, '__name__', 'job'),
+                       func, args, kwargs, interval)
+        with self.cond:
+            heapq.heappush(self.heap, job)
+            self.cond.notify()
+        return job
+
+    def cancel(self, job):
+        """Cancel a job; returns False if it was already cancelled"""
+        with self.cond:
+            if job is None or job.cancelled:
+                return False
+            job.cancelled = True
+            # Drop it from the heap now so cancelled jobs never pile up
+            try:
+                self.heap.remove(job)
+                heapq.heapify(self.heap)
+            except ValueError:
+                pass
+            self.cond.notify()
+        return True
+
+    def pending_jobs(self):
+        """Snapshot of scheduled jobs, soonest first"""
+        with self.cond:
+            return sorted(self.heap)
+
+    def next_due(self):
+        """Seconds until the next job, or None if nothing is scheduled"""
+        with self.cond:
+            return self.heap[0].seconds_until(self.clock.monotonic()) if self.heap else None
+
+    def run_pending(self):
+        """Run every job whose deadline has passed; returns how many ran"""
+        ran = 0
+        while True:
+            job = self._pop_due()
+            if job is None:
+                return ran
+            self._run_job(job)
+            ran += 1
+
+    def _pop_due(self):
+        with self.cond:
+            if self.heap and self.heap[0].deadline <= self.clock.monotonic():
+                return heapq.heappop(self.heap)
+        return None
+
+    def _run_job(self, job):
+        lateness_ms = -job.seconds_until(self.clock.monotonic()) * 1000
+        logger.debug("Running timer job %s (%.2fms after deadline)", job.name, lateness_ms)
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            logger.error(f"Error in timer job {job.name}: {e}")
+
+        if job.interval and not job.cancelled:
+            with self.cond:
+                if not job.cancelled:
+                    job.deadline += job.interval
+                    # Skip missed runs instead of firing them back to back
+                    now = self.clock.monotonic()
+                    if job.deadline < now:
+                        job.deadline = now
+                    heapq.heappush(self.heap, job)
+
+    def run(self):
+        """Run jobs until stop() is called"""
+        self.running = True
+        while self.running:
+            self.run_pending()
+            with self.cond:
+                if not self.running:
+                    break
+                timeout = self.heap[0].seconds_until(self.clock.monotonic()) if self.heap else None
+                if timeout is None:
+                    self.cond.wait()
+                    continue
+                if timeout > SPIN_THRESHOLD:
+                    self.cond.wait(timeout - SPIN_THRESHOLD)
+                    continue
+            if timeout > 0:
+                # Final approach: yield the GIL until the deadline
+                time.sleep(0)
+
+    def run_until(self, instant):
+        """Virtual clocks only: run jobs in deadline order, advancing the clock to each, up to instant"""
+        ran = 0
+        while True:
+            with self.cond:
+                if not self.heap or self.heap[0].deadline > instant:
+                    break
+                deadline = self.heap[0].deadline
+            self.clock.advance_to(deadline)
+            ran += self.run_pending()
+        self.clock.advance_to(instant)
+        return ran
+
+    def stop(self):
+        """Stop the run() loop"""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
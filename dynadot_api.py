@@ -2,33 +2,56 @@
 """
 Dynadot API integration for domain registration
 """
+import time
 import requests
 import logging
-from config import DYNADOT_API_KEY, DYNADOT_API_URL, LOG_LEVEL, LOG_FILE
+import metrics
+from config import (
+    DYNADOT_API_KEY, DYNADOT_API_URL, DYNADOT_SEARCH_BATCH_SIZE, PREWARM_CONNECTIONS
+)
+from logging_setup import configure_logging, LogSampler
+from transport import get_session, prewarm
+from dynadot_responses import loads, parse_search, parse_register
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
+PROBE_LOG = LogSampler()  # 'Not Available' lines repeat on every probe of a catch
+
+REQUEST_SECONDS = metrics.histogram('domain_catcher_dynadot_request_seconds',
+                                    'Dynadot API request latency by command', ['command'])
+REQUESTS = metrics.counter('domain_catcher_dynadot_requests_total',
+                           'Dynadot API requests by command and outcome', ['command', 'outcome'])
 
 class DynadotAPI:
-    def __init__(self):
-        self.api_key = DYNADOT_API_KEY
-        self.api_url = DYNADOT_API_URL
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'DomainCatcher/1.0',
+    def __init__(self, session=None, api_url=None, api_key=None):
+        self.api_key = api_key or DYNADOT_API_KEY
+        self.api_url = api_url or DYNADOT_API_URL  # Overridden to point at a local mock in benchmarks
+        # Shared keep-alive pool, so every client reuses warm connections
+        self.session = session or get_session('dynadot', headers={
             'Content-Type': 'application/x-www-form-urlencoded'
         })
     
+    def prewarm(self, connections=PREWARM_CONNECTIONS):
+        """Open keep-alive connections to the API host ahead of a catch"""
+        return prewarm(self.api_url, connections, session=self.session)
+    
+    def _get(self, data):
+        """GET the API, recording latency and outcome per command"""
+        command = data['command']
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.api_url, params=data, timeout=30)
+        except Exception:
+            REQUESTS.labels(command, 'error').inc()
+            raise
+        finally:
+            REQUEST_SECONDS.labels(command).observe(time.perf_counter() - start)
+        REQUESTS.labels(command, 'ok' if response.ok else 'http_error').inc()
+        return response
+    
     def check_domain_availability(self, domain):
-        """Check if domain is available for registration"""
+        """Check if domain is available for registration; None when the search failed"""
         try:
             data = {
                 'key': self.api_key,
@@ -36,51 +59,94 @@ class DynadotAPI:
                 'domain0': domain
             }
             
-            logger.info(f"Checking availability for {domain} via Dynadot API")
-            response = self.session.get(self.api_url, params=data, timeout=30)
+            logger.debug("Checking availability for %s via Dynadot API", domain)
+            response = self._get(data)
             response.raise_for_status()
             
-            result = response.json()
-            logger.debug(f"Dynadot availability response: {result}")
-            
-            # Parse Dynadot response
-            if 'SearchResponse' in result:
-                search_response = result['SearchResponse']
-                if 'ResponseCode' in search_response and search_response['ResponseCode'] == '0':
-                    if 'SearchResults' in search_response:
-                        search_results = search_response['SearchResults']
-                        if isinstance(search_results, list) and len(search_results) > 0:
-                            # Handle array format: [{'DomainName': 'domain.com', 'Available': 'yes'}]
-                            domain_info = search_results[0]
-                            available = domain_info.get('Available', 'no').lower() == 'yes'
-                            logger.info(f"Domain {domain} availability: {'Available' if available else 'Not Available'}")
-                            return available
-                        elif isinstance(search_results, dict) and 'Domain' in search_results:
-                            # Handle object format: {'Domain': {'Available': 'true'}}
-                            domain_info = search_results['Domain']
-                            available = domain_info.get('Available', 'false').lower() == 'true'
-                            logger.info(f"Domain {domain} availability: {'Available' if available else 'Not Available'}")
-                            return available
-                    elif 'Domain' in search_response:
-                        # Alternative response structure
-                        domain_info = search_response['Domain']
-                        available = domain_info.get('Available', 'false').lower() == 'true'
-                        logger.info(f"Domain {domain} availability: {'Available' if available else 'Not Available'}")
-                        return available
-                else:
-                    # Check if domain is not available (response code != 0)
-                    logger.info(f"Domain {domain} availability: Not Available (ResponseCode: {search_response.get('ResponseCode', 'unknown')})")
-                    return False
+            result = loads(response.content)
+            logger.debug("Dynadot availability response: %s", result)
+            
+            search = self._parse_search_response(result, [domain])
+            if search is not None and not search.ok:
+                return None
+            if search is not None:
+                available = search.is_available(domain)
+                # Availability is a state change and always logged; the repeated 'no' is sampled
+                if available or PROBE_LOG.allow('dynadot.search'):
+                    suppressed = PROBE_LOG.take_suppressed('dynadot.search')
+                    logger.info(f"Domain {domain} availability: {'Available' if available else 'Not Available'}"
+                                f"{f' ({suppressed} similar lines suppressed)' if suppressed else ''}",
+                                extra={'domain': domain, 'available': available})
+                return available
             
             logger.warning(f"Could not parse availability response for {domain}")
-            return False
+            return None
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error checking availability for {domain}: {e}")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Error checking availability for {domain}: {e}")
-            return False
+            return None
+    
+    def check_many(self, domains):
+        """Check availability of many domains using multi-domain search requests.
+        
+        Returns a dict mapping each domain to True/False, or None when the
+        batch containing it could not be checked.
+        """
+        availability = {}
+        domains = list(dict.fromkeys(domains))
+        
+        for i in range(0, len(domains), DYNADOT_SEARCH_BATCH_SIZE):
+            batch = domains[i:i + DYNADOT_SEARCH_BATCH_SIZE]
+            availability.update(self._search_batch(batch))
+        
+        return availability
+    
+    def _search_batch(self, batch):
+        """Run one search request for up to DYNADOT_SEARCH_BATCH_SIZE domains"""
+        try:
+            data = {
+                'key': self.api_key,
+                'command': 'search'
+            }
+            for index, domain in enumerate(batch):
+                data[f'domain{index}'] = domain
+            
+            logger.info(f"Checking availability for {len(batch)} domains via Dynadot API")
+            response = self._get(data)
+            response.raise_for_status()
+            
+            result = loads(response.content)
+            logger.debug("Dynadot availability response: %s", result)
+            
+            search = self._parse_search_response(result, batch)
+            if search is None:
+                logger.warning(f"Could not parse availability response for batch starting at {batch[0]}")
+                return {domain: None for domain in batch}
+            if not search.ok:
+                return {domain: None for domain in batch}
+            
+            availability = search.availability(batch)
+            available = [domain for domain, is_available in availability.items() if is_available]
+            logger.info(f"Batch availability: {len(available)}/{len(batch)} available {available}")
+            return availability
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error checking availability for batch starting at {batch[0]}: {e}")
+        except Exception as e:
+            logger.error(f"Error checking availability for batch starting at {batch[0]}: {e}")
+        return {domain: None for domain in batch}
+    
+    def _parse_search_response(self, result, domains):
+        """Parse a search response into a SearchResponse, or None if unrecognised"""
+        search = parse_search(result, domains)
+        if search is not None and not search.ok:
+            # An API error says nothing about the domains: their availability is unknown
+            logger.warning(f"Search returned ResponseCode {search.code or 'unknown'} "
+                           f"for {', '.join(domains)}: {search.error or 'no error message'}")
+        return search
     
     def register_domain(self, domain, years=1):
         """Register domain with Dynadot"""
@@ -93,36 +159,24 @@ class DynadotAPI:
             }
             
             logger.info(f"Attempting to register {domain} via Dynadot API")
-            response = self.session.get(self.api_url, params=data, timeout=30)
+            response = self._get(data)
             response.raise_for_status()
             
-            result = response.json()
-            logger.info(f"Dynadot registration response: {result}")
-            
-            # Parse Dynadot response
-            if 'RegisterResponse' in result:
-                register_response = result['RegisterResponse']
-                if 'SuccessCode' in register_response:
-                    success_code = register_response['SuccessCode']
-                    if success_code == '0':
-                        logger.info(f"SUCCESS: Domain {domain} registered successfully via Dynadot")
-                        return True, f"Successfully registered {domain}"
-                    else:
-                        error_msg = register_response.get('Error', 'Unknown error')
-                        logger.error(f"FAILED: Domain {domain} registration failed: {error_msg}")
-                        return False, error_msg
-                elif 'Status' in register_response:
-                    status = register_response['Status']
-                    if status.lower() == 'success':
-                        logger.info(f"SUCCESS: Domain {domain} registered successfully via Dynadot")
-                        return True, f"Successfully registered {domain}"
-                    else:
-                        error_msg = register_response.get('Error', 'Unknown error')
-                        logger.error(f"FAILED: Domain {domain} registration failed: {error_msg}")
-                        return False, error_msg
-            
-            logger.error(f"Could not parse registration response for {domain}")
-            return False, "Could not parse registration response"
+            result = loads(response.content)
+            logger.debug("Dynadot registration response: %s", result)
+            
+            registration = parse_register(result)
+            if registration is None:
+                logger.error(f"Could not parse registration response for {domain}: {result}")
+                return False, "Could not parse registration response"
+            
+            if registration.success:
+                logger.info(f"SUCCESS: Domain {domain} registered successfully via Dynadot")
+                return True, f"Successfully registered {domain}"
+            
+            logger.error(f"FAILED: Domain {domain} registration failed: {registration.error} "
+                         f"({registration.error_class})")
+            return False, registration.error
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error registering {domain}: {e}")
@@ -140,10 +194,10 @@ class DynadotAPI:
             }
             
             logger.info("Testing Dynadot API connection")
-            response = self.session.get(self.api_url, params=data, timeout=30)
+            response = self._get(data)
             response.raise_for_status()
             
-            result = response.json()
+            result = loads(response.content)
             logger.info(f"Dynadot API test response: {result}")
             
             if 'AccountInfoResponse' in result:
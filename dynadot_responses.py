@@ -0,0 +1,220 @@
+"""
+Dynadot api3.json response parsing
+
+Bodies are decoded with orjson when it is installed (the json module
+otherwise) and turned into small slotted result objects. Nearly every search
+response has one shape, {"SearchResponse": {"ResponseCode": "0",
+"SearchResults": [{"DomainName": ..., "Available": ...}, ...]}} with the
+results in request order, and that shape is read with a few direct lookups.
+The older shapes Dynadot has returned go through the general walk.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional: pip install orjson for faster decoding
+
+
+def _json_loads(content):
+    # json.loads sniffs the encoding of bytes; Dynadot always sends UTF-8
+    if isinstance(content, (bytes, bytearray)):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+if orjson is not None:
+    loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+else:
+    loads = _json_loads
+    JSON_BACKEND = 'json'
+
+# Error text fragments (lowercase) -> error class, checked in order
+ERROR_CLASSES = (
+    ('not_available', ('not available', 'unavailable', 'already registered', 'is taken', 'not_available')),
+    ('insufficient_funds', ('insufficient', 'balance', 'not enough', 'funds')),
+    ('rate_limited', ('too many', 'rate limit', 'try again later')),
+    ('auth', ('api key', 'invalid key', 'not authorized', 'permission', 'ip address')),
+    ('invalid_domain', ('invalid domain', 'not supported', 'unsupported tld')),
+)
+
+
+def classify_error(message):
+    """Coarse class of a Dynadot error message ('unknown' if unrecognised, None for no error)"""
+    if not message:
+        return None
+    text = str(message).lower()
+    for error_class, fragments in ERROR_CLASSES:
+        if any(fragment in text for fragment in fragments):
+            return error_class
+    return 'unknown'
+
+
+def parse_price(value):
+    """Leading number of a price field ('8.99 in USD' -> 8.99), or None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).split()[0].replace(',', ''))
+    except (ValueError, IndexError):
+        return None
+
+
+def is_yes(value):
+    return value is True or (isinstance(value, str) and value.lower() in ('yes', 'true'))
+
+
+class SearchResult:
+    """Availability (and price, when Dynadot sends one) of one searched domain"""
+    __slots__ = ('domain', 'available', 'price')
+
+    def __init__(self, domain, available, price=None):
+        self.domain = domain  # As requested, not as echoed by the API
+        self.available = available
+        self.price = price
+
+    def __repr__(self):
+        return f"<SearchResult {self.domain} available={self.available} price={self.price}>"
+
+
+class SearchResponse:
+    """A parsed search command: response code, per-domain results and any error"""
+    __slots__ = ('code', 'results', 'error')
+
+    def __init__(self, code, results, error=None):
+        self.code = code
+        self.results = results
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.code == '0'
+
+    @property
+    def error_class(self):
+        return classify_error(self.error)
+
+    def is_available(self, domain):
+        """True/False for domain, or None when the search itself failed (availability unknown)"""
+        if not self.ok:
+            return None
+        for result in self.results:
+            if result.domain == domain:
+                return result.available
+        return False
+
+    def availability(self, domains):
+        """{domain: available} for every requested domain (False when missing from the response,
+        None for all of them when the search failed)"""
+        if not self.ok:
+            return dict.fromkeys(domains)
+        availability = dict.fromkeys(domains, False)
+        for result in self.results:
+            availability[result.domain] = result.available
+        return availability
+
+
+class RegisterResult:
+    """A parsed register command"""
+    __slots__ = ('success', 'code', 'error')
+
+    def __init__(self, success, code, error=None):
+        self.success = success
+        self.code = code
+        self.error = error
+
+    @property
+    def error_class(self):
+        return classify_error(self.error)
+
+    def __repr__(self):
+        return f"<RegisterResult success={self.success} code={self.code} error_class={self.error_class}>"
+
+
+def parse_search(payload, domains):
+    """SearchResponse for the requested domains from a decoded body, or None if the shape is unknown"""
+    search = payload.get('SearchResponse') if isinstance(payload, dict) else None
+    if not isinstance(search, dict):
+        return None
+
+    code = search.get('ResponseCode')
+    if code != '0':
+        return SearchResponse(code, [], search.get('Error'))
+
+    # Fast path: a result list in request order, named as requested
+    entries = search.get('SearchResults')
+    if type(entries) is list and len(entries) == len(domains):
+        results = []
+        append = results.append
+        for domain, entry in zip(domains, entries):
+            if type(entry) is not dict:
+                break
+            name = entry.get('DomainName')
+            if name != domain and (name is None or name.lower() != domain.lower()):
+                break
+            available = entry.get('Available')
+            price = entry.get('Price')
+            append(SearchResult(domain, available == 'yes' or (available != 'no' and is_yes(available)),
+                                None if price is None else parse_price(price)))
+        else:
+            return SearchResponse(code, results)
+
+    return _parse_search_general(search, code, domains)
+
+
+def _parse_search_general(search, code, domains):
+    """Every search shape Dynadot has used: result lists or objects, named or in request order"""
+    if 'SearchResults' in search:
+        search_results = search['SearchResults']
+        if isinstance(search_results, list):
+            # Array format: [{'DomainName': 'domain.com', 'Available': 'yes'}]
+            entries = search_results
+        elif isinstance(search_results, dict) and 'Domain' in search_results:
+            # Object format: {'Domain': {'Available': 'true'}}
+            entries = search_results['Domain']
+        else:
+            return None
+    elif 'Domain' in search:
+        # Alternative response structure
+        entries = search['Domain']
+    else:
+        return None
+
+    if isinstance(entries, dict):
+        entries = [entries]
+
+    by_name = {domain.lower(): domain for domain in domains}
+    results = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get('DomainName') or entry.get('Name')
+        if name:
+            domain = by_name.get(name.lower())
+        else:
+            # Entries without a name come back in request order
+            domain = domains[index] if index < len(domains) else None
+        if domain is None:
+            continue
+        results.append(SearchResult(domain, is_yes(entry.get('Available')), parse_price(entry.get('Price'))))
+    return SearchResponse(code, results)
+
+
+def parse_register(payload):
+    """RegisterResult from a decoded body, or None if the shape is unknown"""
+    register = payload.get('RegisterResponse') if isinstance(payload, dict) else None
+    if not isinstance(register, dict):
+        return None
+
+    if 'SuccessCode' in register:
+        code = register['SuccessCode']
+        success = code == '0'
+    elif 'Status' in register:
+        code = register['Status']
+        success = str(code).lower() == 'success'
+    else:
+        return None
+    return RegisterResult(success, code, None if success else register.get('Error', 'Unknown error'))
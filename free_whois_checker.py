@@ -1,27 +1,42 @@
 import subprocess
-import re
+import time
 import logging
-from datetime import datetime
-from config import WHOIS_COMMAND, LOG_LEVEL, LOG_FILE
+import metrics
+from config import WHOIS_COMMAND, WHOIS_BACKEND
+from logging_setup import configure_logging
+from whois_parser import parse_whois
+from whois_client import WhoisClient
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+LOOKUP_SECONDS = metrics.histogram('domain_catcher_whois_lookup_seconds',
+                                   'WHOIS lookup duration by backend', ['backend'])
+LOOKUPS = metrics.counter('domain_catcher_whois_lookups_total',
+                          'WHOIS lookups by backend and resulting status', ['backend', 'status'])
+
 class FreeWhoisChecker:
     def __init__(self):
         self.whois_command = WHOIS_COMMAND
+        self.backend = WHOIS_BACKEND
+        self.client = WhoisClient()  # Built-in port-43 client (backend 'socket')
         self.timeout = 30  # seconds
         
     def check_domain_status(self, domain):
-        """Check domain status using free whois command"""
+        """Check domain status over free WHOIS (built-in client or system command)"""
+        start = time.perf_counter()
+        if self.backend == 'socket':
+            domain_info = self._check_with_client(domain)
+        else:
+            domain_info = self._check_with_command(domain)
+        
+        LOOKUP_SECONDS.labels(self.backend).observe(time.perf_counter() - start)
+        LOOKUPS.labels(self.backend, domain_info['status'] if domain_info else 'failed').inc()
+        return domain_info
+    
+    def _check_with_command(self, domain):
+        """Check domain status by running the system whois command"""
         try:
             logger.info(f"Checking {domain} using free whois command...")
             
@@ -37,84 +52,12 @@ class FreeWhoisChecker:
                 logger.warning(f"Whois command failed for {domain} (return code: {result.returncode})")
                 return None
             
-            output = result.stdout.lower()
-            
-            # Extract domain information
-            domain_info = {
-                'domain': domain,
-                'status': 'unknown',
-                'expiry_date': '',
-                'registrar': 'unknown',
-                'last_updated': datetime.now().isoformat(),
-                'source': 'free_whois'
-            }
-            
-            # Check for pending delete status
-            pending_statuses = [
-                'pendingdelete', 'redemptionperiod', 'pending delete',
-                'redemption period', 'clientdeleteprohibited', 'pendingdeleteperiod',
-                'redemption', 'pending delete period'
-            ]
+            domain_info = parse_whois(result.stdout).to_domain_info(domain)
             
-            for status in pending_statuses:
-                if status in output:
-                    domain_info['status'] = 'pendingDelete'
-                    logger.warning(f"🚨 {domain} is in pendingDelete status!")
-                    break
-            
-            # Extract registrar information
-            registrar_patterns = [
-                r'registrar:\s*(.+)',
-                r'registrar name:\s*(.+)',
-                r'registrar organization:\s*(.+)',
-                r'registrar\s*:\s*(.+)'
-            ]
-            
-            for pattern in registrar_patterns:
-                match = re.search(pattern, output, re.IGNORECASE)
-                if match:
-                    registrar = match.group(1).strip()
-                    # Clean up registrar name
-                    registrar = re.sub(r'\s+', ' ', registrar)
-                    domain_info['registrar'] = registrar
-                    break
-            
-            # Extract expiry date
-            expiry_patterns = [
-                r'expires?:\s*(.+)',
-                r'expiry date:\s*(.+)',
-                r'expiration date:\s*(.+)',
-                r'expires on:\s*(.+)'
-            ]
-            
-            for pattern in expiry_patterns:
-                match = re.search(pattern, output, re.IGNORECASE)
-                if match:
-                    expiry_date = match.group(1).strip()
-                    # Clean up expiry date
-                    expiry_date = re.sub(r'\s+', ' ', expiry_date)
-                    domain_info['expiry_date'] = expiry_date
-                    break
-            
-            # Check if domain is expired
-            if domain_info['expiry_date']:
-                try:
-                    # Try to parse expiry date
-                    expiry_str = domain_info['expiry_date']
-                    # Handle common date formats
-                    if 'tld' in expiry_str.lower() or 'utc' in expiry_str.lower():
-                        # Skip TLD-specific expiry info
-                        pass
-                    else:
-                        # Try to extract date
-                        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', expiry_str)
-                        if date_match:
-                            expiry_date = datetime.fromisoformat(date_match.group(1))
-                            if expiry_date < datetime.now():
-                                domain_info['status'] = 'expired'
-                                logger.info(f"⚠️ {domain} is expired")
-                except (ValueError, TypeError):
-                    logger.debug(f"Could not parse expiry date for {domain}: {expiry_date}")
+            if domain_info['status'] == 'pendingDelete':
+                logger.warning(f"🚨 {domain} is in pendingDelete status!")
+            elif domain_info['status'] == 'expired':
+                logger.info(f"⚠️ {domain} is expired")
             
             logger.info(f"Status for {domain}: {domain_info['status']}")
             return domain_info
@@ -129,6 +72,27 @@ class FreeWhoisChecker:
             logger.error(f"Error checking {domain}: {e}")
             return None
     
+    def _check_with_client(self, domain):
+        """Check domain status with the in-process port-43 WHOIS client"""
+        try:
+            logger.info(f"Checking {domain} using WHOIS...")
+            domain_info = self.client.lookup(domain).to_domain_info(domain)
+            
+            if domain_info['status'] == 'pendingDelete':
+                logger.warning(f"🚨 {domain} is in pendingDelete status!")
+            elif domain_info['status'] == 'expired':
+                logger.info(f"⚠️ {domain} is expired")
+            
+            logger.info(f"Status for {domain}: {domain_info['status']}")
+            return domain_info
+            
+        except OSError as e:
+            logger.error(f"WHOIS query failed for {domain}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error checking {domain}: {e}")
+            return None
+    
     def is_pending_delete(self, domain_info):
         """Check if domain is in pendingDelete status"""
         if not domain_info:
@@ -147,6 +111,10 @@ class FreeWhoisChecker:
     
     def test_whois_command(self):
         """Test if whois command is available"""
+        if self.backend == 'socket':
+            logger.info("SUCCESS: Using built-in WHOIS client (no whois command needed)")
+            return True
+        
         try:
             result = subprocess.run(
                 [self.whois_command, '--version'], 
@@ -1,51 +1,137 @@
 #!/usr/bin/env python3
 """
 Simple health check server for Railway deployment
+
+The HTTP server is listening before the scheduler is even imported: the
+scheduler and everything it pulls in are built on a background thread, so
+/health answers as soon as the process is up. /ready turns 200 once the
+scheduler has warmed up and is monitoring.
+
+/api/scheduled, /api/catches, /api/rates and /api/progress serve the
+progress board the scheduler and catch loops publish to (see progress.py);
+/api/progress/stream pushes the same snapshot as server-sent events
+whenever it changes.
 """
+import json
 import os
 import threading
 import time
-from flask import Flask, jsonify
-from scheduler import DropScheduler
+from flask import Flask, Response, jsonify
+from werkzeug.serving import make_server
+import metrics
+from config import PROGRESS_STREAM_INTERVAL, PROGRESS_STREAM_KEEPALIVE
+from progress import BOARD
 
 # Create Flask app
 app = Flask(__name__)
 
-# Global scheduler instance
+# Global scheduler instance (None until the background thread has built it)
 scheduler = None
+scheduler_failed = False
+
+def scheduler_state():
+    """'starting', 'running' or 'failed'"""
+    if scheduler_failed:
+        return 'failed'
+    if scheduler is not None and scheduler.ready.is_set():
+        return 'running'
+    return 'starting'
 
 @app.route('/health')
 def health_check():
-    """Health check endpoint for Railway"""
+    """Health check endpoint for Railway (the process is up, whatever the scheduler is doing)"""
     return jsonify({
         'status': 'healthy',
         'service': 'domain-monitor',
+        'scheduler': scheduler_state(),
         'timestamp': time.time()
     }), 200
 
+@app.route('/ready')
+def readiness_check():
+    """200 once the scheduler is monitoring, 503 while it starts up or after it failed"""
+    state = scheduler_state()
+    return jsonify({'ready': state == 'running', 'scheduler': state}), 200 if state == 'running' else 503
+
 @app.route('/')
 def root():
     """Root endpoint"""
     return jsonify({
         'service': 'Domain Monitor',
         'status': 'running',
-        'endpoints': ['/health']
+        'endpoints': ['/health', '/ready', '/metrics', '/api/scheduled', '/api/catches', '/api/rates',
+                      '/api/progress', '/api/progress/stream']
     }), 200
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/scheduled')
+def scheduled_catches():
+    """Catches that are scheduled or running, with their status, soonest first"""
+    snapshot = BOARD.snapshot()
+    return jsonify({'version': snapshot['version'], 'scheduled': snapshot['scheduled']}), 200
+
+@app.route('/api/catches')
+def running_catches():
+    """Catches in flight and the most recently finished ones"""
+    snapshot = BOARD.snapshot()
+    return jsonify({'version': snapshot['version'], 'catches': snapshot['catches'],
+                    'finished': snapshot['finished']}), 200
+
+@app.route('/api/rates')
+def probe_rates():
+    """Probe rates of the running catches"""
+    snapshot = BOARD.snapshot()
+    return jsonify(dict(snapshot['rates'], version=snapshot['version'])), 200
+
+@app.route('/api/progress')
+def progress_snapshot():
+    """Everything on the progress board"""
+    return jsonify(BOARD.snapshot()), 200
+
+@app.route('/api/progress/stream')
+def progress_stream():
+    """Server-sent events: a 'progress' event with the full snapshot each time it changes"""
+    def events():
+        yield f"retry: {int(PROGRESS_STREAM_INTERVAL * 2000)}\n\n"
+        version = None
+        last_sent = time.monotonic()
+        while True:
+            snapshot = BOARD.snapshot()
+            now = time.monotonic()
+            if snapshot['version'] != version:
+                version = snapshot['version']
+                yield f"id: {version}\nevent: progress\ndata: {json.dumps(snapshot)}\n\n"
+                last_sent = now
+            elif now - last_sent >= PROGRESS_STREAM_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_sent = now
+            time.sleep(PROGRESS_STREAM_INTERVAL)
+
+    # X-Accel-Buffering: nginx would otherwise hold events back until its buffer fills
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def start_scheduler():
-    """Start the domain scheduler in a separate thread"""
-    global scheduler
+    """Build and start the domain scheduler (runs on a background thread)"""
+    global scheduler, scheduler_failed
     try:
+        # Deferred: this imports the whole monitoring stack (requests, SQLite, the lookup clients)
+        from scheduler import DropScheduler
         scheduler = DropScheduler()
         scheduler.start_monitoring()
     except Exception as e:
+        scheduler_failed = True
         print(f"Scheduler error: {e}")
 
+def serve(port):
+    """Bind the HTTP server, then start the scheduler in the background and serve requests"""
+    server = make_server('0.0.0.0', port, app, threaded=True)
+    threading.Thread(target=start_scheduler, name='scheduler', daemon=True).start()
+    server.serve_forever()
+
 if __name__ == '__main__':
-    # Start scheduler in background thread
-    scheduler_thread = threading.Thread(target=start_scheduler, daemon=True)
-    scheduler_thread.start()
-    
-    # Start Flask server
-    port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    serve(int(os.environ.get('PORT', 5000)))
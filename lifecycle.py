@@ -0,0 +1,151 @@
+"""
+Lifecycle-aware polling policy
+
+A domain moves through registered -> expired (auto-renew grace) -> redemption
+-> pendingDelete -> dropped, and nothing interesting happens between those
+transitions. Instead of checking every domain every hour, each check result
+is turned into a lifecycle phase and an estimate of the next transition, and
+the next check is scheduled at a fraction of the time left until then:
+a domain registered until 2030 is checked weekly, one a few hours from
+expiry every few minutes. Transitions after expiry depend on the registrar,
+so those estimates are only trusted up to POLL_UNCERTAIN_INTERVAL.
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from config import (
+    POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_TRANSITION_FRACTION, POLL_UNCERTAIN_INTERVAL,
+    POLL_AVAILABLE_INTERVAL, POLL_RETRY_INTERVAL, POLL_JITTER, PENDING_CHECK_INTERVAL,
+    LIFECYCLE_GRACE_DAYS, LIFECYCLE_REDEMPTION_DAYS, LIFECYCLE_PENDING_DELETE_DAYS
+)
+from whois_parser import normalize_status, parse_date
+from domain_record import DomainRecord, to_datetime
+
+REDEMPTION_CODES = frozenset({'redemptionperiod', 'redemption', 'pendingrestore'})
+
+PHASES = ('registered', 'expired', 'redemption', 'pendingDelete', 'available', 'unknown')
+
+
+class LifecyclePolicy:
+    """Maps a check result to a lifecycle phase and the time of the next check"""
+
+    def __init__(self, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 fraction=POLL_TRANSITION_FRACTION, uncertain_interval=POLL_UNCERTAIN_INTERVAL,
+                 jitter=POLL_JITTER, rng=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fraction = fraction
+        self.uncertain_interval = uncertain_interval
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.grace = timedelta(days=LIFECYCLE_GRACE_DAYS)
+        self.redemption = timedelta(days=LIFECYCLE_REDEMPTION_DAYS)
+        self.pending_delete = timedelta(days=LIFECYCLE_PENDING_DELETE_DAYS)
+
+    def phase(self, domain_info):
+        """Lifecycle phase of a check result (None for a failed lookup is 'unknown')"""
+        if not domain_info:
+            return 'unknown'
+        status = domain_info.get('status')
+        if status == 'pendingDelete':
+            # The checkers fold redemption into pendingDelete; the EPP codes tell them apart
+            codes = {normalize_status(code) for code in domain_info.get('epp_status', ())}
+            return 'redemption' if codes & REDEMPTION_CODES else 'pendingDelete'
+        if status in ('registered', 'expired', 'available'):
+            return status
+        return 'unknown'
+
+    def next_transition(self, domain_info, phase):
+        """(estimated UTC instant of the next phase change, whether it is only an estimate)"""
+        if isinstance(domain_info, DomainRecord):
+            expiry, deletion = to_datetime(domain_info.expiry), to_datetime(domain_info.deletion)
+        else:
+            expiry = parse_date(domain_info.get('expiry_date') or '')
+            deletion = parse_date(domain_info.get('deletion_date') or '')
+        if phase == 'registered':
+            return expiry, False
+        if phase == 'expired':
+            return (expiry + self.grace if expiry else None), True
+        if phase == 'redemption':
+            if deletion:
+                return deletion - self.pending_delete, True
+            return (expiry + self.grace + self.redemption if expiry else None), True
+        if phase == 'pendingDelete':
+            if deletion:
+                return deletion, True
+            return (expiry + self.grace + self.redemption + self.pending_delete if expiry else None), True
+        return None, False
+
+    def interval(self, domain_info, phase=None, now=None):
+        """Seconds until the next check, before jitter"""
+        if not domain_info:
+            return POLL_RETRY_INTERVAL
+        phase = phase or self.phase(domain_info)
+        if phase == 'available':
+            return POLL_AVAILABLE_INTERVAL
+
+        transition, uncertain = self.next_transition(domain_info, phase)
+        if transition is None:
+            # No dates to go on (e.g. Dynadot availability only): the old fixed interval
+            return PENDING_CHECK_INTERVAL
+
+        now = now or datetime.now(timezone.utc)
+        # Distance either side: an estimate that has just passed is as interesting as one coming up
+        interval = abs((transition - now).total_seconds()) * self.fraction
+        if uncertain:
+            interval = min(interval, self.uncertain_interval)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def schedule(self, domain_info, now=None):
+        """(phase, next_check_at epoch seconds) for a check result taken at `now` (epoch seconds)"""
+        now = time.time() if now is None else now
+        phase = self.phase(domain_info)
+        interval = self.interval(domain_info, phase, datetime.fromtimestamp(now, timezone.utc))
+        if self.jitter:
+            interval *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        return phase, now + max(interval, self.min_interval)
+
+
+if __name__ == "__main__":
+    # Checks per week for a synthetic watchlist, compared with the hourly full sweep
+    policy = LifecyclePolicy(jitter=0)
+    now = datetime.now(timezone.utc)
+
+    def info(status, expiry_days=None, epp=(), deletion_days=None):
+        return {
+            'domain': 'example.com',
+            'status': status,
+            'expiry_date': (now + timedelta(days=expiry_days)).isoformat() if expiry_days is not None else '',
+            'deletion_date': (now + timedelta(days=deletion_days)).isoformat() if deletion_days is not None else '',
+            'epp_status': list(epp)
+        }
+
+    examples = [
+        ('registered until 2030', info('registered', 1500)),
+        ('expires in 60 days', info('registered', 60)),
+        ('expires in 2 days', info('registered', 2)),
+        ('expires in 3 hours', info('registered', 0.125)),
+        ('expired 3 days ago (grace)', info('expired', -3)),
+        ('expired 29 days ago (grace)', info('expired', -29)),
+        ('redemption', info('pendingDelete', -40, ['redemptionPeriod'])),
+        ('pendingDelete, drops in 2 days', info('pendingDelete', -63, ['pendingDelete'], 2)),
+        ('available', info('available')),
+        ('registered, no expiry known', info('registered')),
+        ('failed lookup', None),
+    ]
+    for label, domain_info in examples:
+        phase = policy.phase(domain_info)
+        print(f"{label:34s} {phase:14s} next check in {policy.interval(domain_info, phase, now) / 3600:8.2f}h")
+
+    # Population skewed like a real watchlist: most names are years from expiry
+    rng = random.Random(1)
+    population = [info('registered', rng.uniform(30, 3 * 365)) for _ in range(9000)]
+    population += [info('registered', rng.uniform(0.1, 30)) for _ in range(800)]
+    population += [info('expired', -rng.uniform(0, 30)) for _ in range(150)]
+    population += [info('pendingDelete', -45, ['redemptionPeriod']) for _ in range(40)]
+    population += [info('pendingDelete', -63, ['pendingDelete'], rng.uniform(0.1, 5)) for _ in range(10)]
+    week = 7 * 86400
+    adaptive = sum(week / policy.interval(domain_info, now=now) for domain_info in population)
+    hourly = len(population) * week / 3600
+    print(f"{len(population)} domains: {adaptive:,.0f} checks/week adaptive vs {hourly:,.0f} hourly "
+          f"({hourly / adaptive:.0f}x fewer)")
@@ -0,0 +1,200 @@
+"""
+Process-wide logging: queue-backed handler, text or JSON output, sampling
+
+Every module calls configure_logging() at import (the first call wins, like
+logging.basicConfig). The root logger gets a QueueHandler, so a log call on
+the catch thread only merges the message and enqueues the record; a
+QueueListener thread formats it and writes the log file and stderr. If the
+writer falls behind, records are dropped (and counted) instead of blocking
+the caller.
+
+LOG_FORMAT=json writes one JSON object per line with the timestamp, level,
+logger, thread, message and any `extra={...}` fields of the call.
+
+LogSampler rate-limits repetitive per-probe lines; state changes (a domain
+becoming available, registration results) are logged unconditionally by the
+callers.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import metrics
+from config import LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_INTERVAL
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came from extra={...}
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+DROPPED_RECORDS = metrics.counter('domain_catcher_log_records_dropped_total',
+                                  'Log records dropped because the writer thread fell behind')
+
+listener = None
+listener_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener and drops records when the queue is full"""
+
+    def prepare(self, record):
+        # Merge the arguments now: they may be mutated by the time the listener formats them.
+        # The root logger's only handler is this one, so the record is not copied first.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_RECORDS.inc()
+
+
+class LogSampler:
+    """Lets through one record per key every `interval` seconds and counts the rest.
+
+    Keys name a call site (for example 'dynadot.search'), so the set of keys
+    stays small however many domains pass through it.
+    """
+
+    def __init__(self, interval=LOG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.next_allowed = {}  # key -> monotonic time the next record may pass
+        self.suppressed = {}  # key -> records dropped since the last one let through
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        """True if a record for key should be logged now"""
+        now = time.monotonic()
+        with self.lock:
+            if now < self.next_allowed.get(key, 0.0):
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+            self.next_allowed[key] = now + self.interval
+            return True
+
+    def take_suppressed(self, key):
+        """Records suppressed for key since the last call (for a 'N similar' suffix)"""
+        with self.lock:
+            return self.suppressed.pop(key, 0)
+
+
+def _formatter(fmt):
+    return JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+
+
+def configure_logging(level=LOG_LEVEL, log_file=LOG_FILE, fmt=LOG_FORMAT):
+    """Route the root logger through a queue to a writer thread (no-op once configured)"""
+    global listener
+    root = logging.getLogger()
+    with listener_lock:
+        if listener is not None or root.handlers:
+            return
+        formatter = _formatter(fmt)
+        handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        records = queue.Queue(LOG_QUEUE_SIZE)
+        root.addHandler(NonBlockingQueueHandler(records))
+        root.setLevel(getattr(logging, level))
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the writer thread"""
+    global listener
+    with listener_lock:
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
+
+
+def _reset_after_fork():
+    """A forked child has the queue handler but no writer thread: start a fresh one"""
+    global listener, listener_lock
+    listener_lock = threading.Lock()
+    if listener is None:
+        return
+    listener = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    configure_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+if __name__ == "__main__":
+    # Time a log call takes on the calling thread: synchronous file handler vs the queue.
+    # Calls are paced like catch probes, which wait on the network between log lines.
+    import tempfile
+    n = 2000
+    response = {'SearchResponse': {'ResponseCode': '0', 'SearchResults': [
+        {'DomainName': 'example.com', 'Available': 'no'}]}}
+
+    def bench(label, log, sampler=None):
+        timings = []
+        for _ in range(n):
+            start = time.perf_counter()
+            if sampler is None or sampler.allow('bench.probe'):
+                log.info("Domain example.com availability: Not Available %s", response)
+            timings.append(time.perf_counter() - start)
+            time.sleep(0.0005)
+        timings.sort()
+        print(f"{label:26s} mean {sum(timings) / n * 1e6:6.2f} µs  p99 {timings[int(n * 0.99)] * 1e6:7.2f} µs  "
+              f"max {timings[-1] * 1e6:8.1f} µs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_logger = logging.getLogger('bench.sync')
+        sync_logger.propagate = False
+        sync_handler = logging.FileHandler(os.path.join(tmp, 'sync.log'))
+        sync_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        sync_logger.addHandler(sync_handler)
+        sync_logger.setLevel(logging.INFO)
+        bench('FileHandler (synchronous)', sync_logger)
+
+        configure_logging(log_file=os.path.join(tmp, 'queued.log'), fmt='json')
+        for handler in listener.handlers:
+            if not isinstance(handler, logging.FileHandler):
+                handler.setLevel(logging.CRITICAL)  # Keep the terminal quiet
+        queued_logger = logging.getLogger('bench.queued')
+        bench('QueueHandler (json)', queued_logger)
+        bench('QueueHandler, sampled 1/s', queued_logger, LogSampler(interval=1))
+        shutdown_logging()
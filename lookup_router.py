@@ -0,0 +1,190 @@
+"""
+Per-registry request routing for status lookups
+
+Groups lookups by the server that will answer them (WHOIS server or RDAP
+host), gives each server its own token bucket and concurrency cap, and
+dispatches round-robin across servers from one shared worker pool. A strict
+or slow registry only ever holds its own share of workers, so it cannot
+throttle the rest of the sweep. Finding the server for a TLD seen for the
+first time (IANA WHOIS referral, RDAP bootstrap) happens on resolver
+threads while the rest of the sweep keeps dispatching.
+"""
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import REGISTRY_LIMITS, ROUTER_BURST, ROUTER_MAX_PENDING, ROUTER_RESOLVERS, SWEEP_WORKERS
+from logging_setup import configure_logging
+from rate_limiter import RateLimiter
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+class ServerLane:
+    """Pending lookups, rate budget and in-flight count for one server"""
+    __slots__ = ('server', 'pending', 'limiter', 'concurrency', 'in_flight',
+                 'dispatched', 'failed', 'throttled')
+
+    def __init__(self, server, rate, concurrency, burst=ROUTER_BURST):
+        self.server = server
+        self.pending = deque()
+        # A small bucket: registries count per second, so a banked second of tokens reads as double the rate
+        self.limiter = RateLimiter(rate, burst=burst)
+        self.concurrency = max(1, int(concurrency))
+        self.in_flight = 0
+        self.dispatched = 0
+        self.failed = 0
+        self.throttled = 0  # Dispatch attempts that found this lane out of tokens
+
+
+def tld_of(domain):
+    return domain.rsplit('.', 1)[-1].lower()
+
+
+class LookupRouter:
+    """Runs lookups with per-server rate budgets and concurrency caps.
+
+    route(domain) names the server a domain's lookup goes to. It may block on
+    discovery, so it runs on a resolver thread, once per route_key(domain)
+    (the TLD by default); domains with that key wait until it is known.
+    lookup(domain) performs the lookup on a worker thread.
+    """
+
+    def __init__(self, route, lookup, limits=None, workers=SWEEP_WORKERS, max_pending=ROUTER_MAX_PENDING,
+                 route_key=tld_of, resolvers=ROUTER_RESOLVERS):
+        self.route = route
+        self.lookup = lookup
+        self.route_key = route_key
+        self.limits = limits or REGISTRY_LIMITS
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.resolvers = max(1, resolvers)
+        self.lanes = {}
+        self.routes = {}  # route_key -> ServerLane, once resolved
+
+    def lane_for(self, server):
+        lane = self.lanes.get(server)
+        if lane is None:
+            limits = self.limits.get(server) or self.limits['default']
+            lane = ServerLane(server, limits['rate'], limits['concurrency'], limits.get('burst', ROUTER_BURST))
+            self.lanes[server] = lane
+        return lane
+
+    def run(self, domains):
+        """Look up every domain and yield (domain, result) pairs as they complete.
+
+        domains may be any iterable; it is consumed lazily, at most
+        max_pending entries ahead of dispatch. A lookup that raises yields
+        None for that domain.
+        """
+        source = iter(domains)
+        exhausted = False
+        buffered = 0
+        order = deque()  # Lanes with pending or in-flight work, in round-robin order
+        futures = {}
+        unrouted = {}  # route_key -> domains waiting for their server
+        resolving = {}  # Future of route() -> route_key
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='lookup') as executor, \
+                ThreadPoolExecutor(max_workers=self.resolvers, thread_name_prefix='route') as resolver:
+            while True:
+                # Read ahead so every server with work has something queued
+                while not exhausted and buffered < self.max_pending:
+                    try:
+                        domain = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    buffered += 1
+                    key = self.route_key(domain)
+                    lane = self.routes.get(key)
+                    if lane is not None:
+                        self._queue(lane, [domain], order)
+                    elif key in unrouted:
+                        unrouted[key].append(domain)
+                    else:
+                        unrouted[key] = [domain]
+                        resolving[resolver.submit(self._resolve, domain)] = key
+
+                # One lookup per eligible lane per round, so servers interleave;
+                # repeat rounds until no lane can take more work
+                next_token = None
+                dispatched = True
+                while dispatched and len(futures) < self.workers:
+                    dispatched = False
+                    for _ in range(len(order)):
+                        if len(futures) >= self.workers:
+                            break
+                        lane = order[0]
+                        order.rotate(-1)
+                        if not lane.pending or lane.in_flight >= lane.concurrency:
+                            continue
+                        wait_time = lane.limiter.try_acquire()
+                        if wait_time > 0:
+                            lane.throttled += 1
+                            next_token = wait_time if next_token is None else min(next_token, wait_time)
+                            continue
+                        domain = lane.pending.popleft()
+                        buffered -= 1
+                        lane.in_flight += 1
+                        lane.dispatched += 1
+                        futures[executor.submit(self.lookup, domain)] = (domain, lane)
+                        dispatched = True
+
+                if not futures and not resolving:
+                    if exhausted and buffered == 0:
+                        break
+                    if next_token is not None:
+                        time.sleep(next_token)
+                    continue
+
+                done, _ = wait([*futures, *resolving], timeout=next_token, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in resolving:
+                        # The server is known: its waiting domains join their lane
+                        key = resolving.pop(future)
+                        lane = self.routes[key] = self.lane_for(future.result())
+                        self._queue(lane, unrouted.pop(key), order)
+                        continue
+                    domain, lane = futures.pop(future)
+                    lane.in_flight -= 1
+                    if lane.in_flight == 0 and not lane.pending:
+                        # Idle lanes leave the rotation until new work is routed to them
+                        order.remove(lane)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        lane.failed += 1
+                        logger.error(f"Lookup for {domain} via {lane.server} failed: {e}")
+                        result = None
+                    yield domain, result
+
+        logger.info(f"Lookup routing: {self.stats()}")
+
+    @staticmethod
+    def _queue(lane, domains, order):
+        if not lane.pending and lane.in_flight == 0:
+            order.append(lane)
+        lane.pending.extend(domains)
+
+    def _resolve(self, domain):
+        """Server for domain's route key (resolver thread)"""
+        try:
+            return self.route(domain) or 'default'
+        except Exception as e:
+            logger.warning(f"Could not route {domain}, using default budget for .{self.route_key(domain)}: {e}")
+            return 'default'
+
+    def stats(self):
+        """Per-server dispatch counters"""
+        return {
+            lane.server: {
+                'dispatched': lane.dispatched,
+                'failed': lane.failed,
+                'throttled': lane.throttled,
+                'pending': len(lane.pending)
+            }
+            for lane in self.lanes.values()
+        }
@@ -0,0 +1,296 @@
+"""
+In-process metrics registry
+
+Counters, gauges and fixed-bucket histograms, exported in the Prometheus text
+format (0.0.4) by health_server's /metrics endpoint. Metrics are created once
+at import time in the module they describe; recording a value is a dict
+lookup for the label set plus a short locked update (about a microsecond),
+so it is safe on the catch hot path.
+
+    SEARCH_SECONDS = metrics.histogram('dynadot_request_seconds', 'Dynadot API latency', ['command'])
+    SEARCH_SECONDS.labels('search').observe(elapsed)
+"""
+import bisect
+import math
+import threading
+import time
+
+# Seconds; covers sub-10ms local lookups up to slow registrar WHOIS servers
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def format_value(value):
+    """Sample value as Prometheus expects it ('+Inf', integers without a fraction)"""
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class CounterValue:
+    """One labelled series of a Counter"""
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, suffix=''):
+        return [(suffix, (), self.value)]
+
+
+class GaugeValue:
+    """One labelled series of a Gauge; set_function makes it read-through at scrape time"""
+    __slots__ = ('value', 'lock', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        self.function = function
+
+    def samples(self, suffix=''):
+        if self.function:
+            try:
+                return [('', (), self.function())]
+            except Exception:
+                return []
+        return [('', (), self.value)]
+
+
+class HistogramTimer:
+    """with histogram.time(): ... observes the elapsed wall time"""
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class HistogramValue:
+    """One labelled series of a Histogram: per-bucket counts, sum and count"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)  # Buckets are inclusive (le)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return HistogramTimer(self)
+
+    def samples(self, suffix=''):
+        with self.lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + (math.inf,), counts):
+            cumulative += bucket_count
+            samples.append(('_bucket', (('le', format_value(float(bound))),), cumulative))
+        samples.append(('_sum', (), total))
+        samples.append(('_count', (), count))
+        return samples
+
+
+class Metric:
+    """A named metric with optional labels; unlabelled metrics record directly"""
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            self.children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The series for these label values (positional, in labelnames order)"""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self.lock:
+                child = self.children.setdefault(tuple(str(value) for value in values), self._new_child())
+                self.children.setdefault(values, child)
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        seen = set()
+        for values, child in sorted(self.children.items(), key=lambda item: tuple(map(str, item[0]))):
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+            base = tuple(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                labels = ','.join(f'{key}="{escape_label(val)}"' for key, val in base + extra)
+                lines.append(f"{self.name}{suffix}{{{labels}}} {format_value(value)}" if labels
+                             else f"{self.name}{suffix} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return CounterValue()
+
+    def inc(self, amount=1):
+        self.children[()].inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return GaugeValue()
+
+    def set(self, value):
+        self.children[()].set(value)
+
+    def inc(self, amount=1):
+        self.children[()].inc(amount)
+
+    def dec(self, amount=1):
+        self.children[()].dec(amount)
+
+    def set_function(self, function):
+        self.children[()].set_function(function)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return HistogramValue(self.bounds)
+
+    def observe(self, value):
+        self.children[()].observe(value)
+
+    def time(self):
+        return self.children[()].time()
+
+
+class Registry:
+    """All metrics of the process, rendered together for a scrape"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def get_or_create(self, cls, name, help_text, labelnames=(), **kwargs):
+        """The metric called name, created on first use (modules may be imported more than once)"""
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def counter(name, help_text, labelnames=()):
+    return REGISTRY.get_or_create(Counter, name, help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    return REGISTRY.get_or_create(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def render():
+    return REGISTRY.render()
+
+
+START_TIME = gauge('domain_catcher_start_time_seconds', 'Unix time the process started')
+START_TIME.set(time.time())
+
+
+if __name__ == "__main__":
+    # Recording overhead on the paths the instrumented modules use
+    registry = Registry()
+    requests_total = registry.get_or_create(Counter, 'bench_requests_total', 'Requests', ['command', 'outcome'])
+    latency = registry.get_or_create(Histogram, 'bench_request_seconds', 'Latency', ['command'])
+    plain = registry.get_or_create(Counter, 'bench_plain_total', 'Unlabelled counter')
+    n = 1000000
+
+    def bench(label, func):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        print(f"{label:34s} {(time.perf_counter() - start) / n * 1e6:6.3f} µs/op")
+
+    bench('counter.inc()', plain.inc)
+    bench("counter.labels(a, b).inc()", lambda: requests_total.labels('search', 'ok').inc())
+    bench("histogram.labels(a).observe(x)", lambda: latency.labels('search').observe(0.042))
+
+    def timed():
+        with latency.labels('register').time():
+            pass
+    bench('with histogram.time()', timed)
+    print(registry.render()[:600])
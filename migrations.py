@@ -0,0 +1,168 @@
+"""
+Versioned schema migrations for domains.db
+
+Migrations run in order at startup; each one is applied once, inside its own
+transaction, and recorded in the schema_version table. Append new migrations
+to MIGRATIONS - never edit one that has shipped.
+"""
+import logging
+from logging_setup import configure_logging
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    (1, 'Baseline schema', [
+        # IF NOT EXISTS so databases created before versioning upgrade in place
+        '''
+        CREATE TABLE IF NOT EXISTS domains (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT UNIQUE NOT NULL,
+            status TEXT NOT NULL,
+            registrar TEXT,
+            expiry_date TEXT,
+            last_checked DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS catch_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT NOT NULL,
+            scheduled_time DATETIME,
+            attempted_time DATETIME,
+            success BOOLEAN,
+            attempts INTEGER,
+            message TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT NOT NULL,
+            notification_type TEXT NOT NULL,
+            message TEXT,
+            sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS status_cache (
+            domain TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            info TEXT NOT NULL,
+            checked_at REAL NOT NULL
+        )
+        ''',
+    ]),
+    (2, 'Indexes for status, per-domain history and cleanup queries', [
+        # get_pending_delete_domains: WHERE status = ? ORDER BY updated_at
+        'CREATE INDEX IF NOT EXISTS idx_domains_status ON domains (status, updated_at)',
+        # get_catch_attempts(domain) / get_notifications(domain): WHERE domain = ? ORDER BY time
+        'CREATE INDEX IF NOT EXISTS idx_catch_attempts_domain ON catch_attempts (domain, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_domain ON notifications (domain, sent_at)',
+        # cleanup_old_records and unfiltered listings: range scans on time
+        'CREATE INDEX IF NOT EXISTS idx_catch_attempts_created ON catch_attempts (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_sent ON notifications (sent_at)',
+        # StatusCache.warm: newest fresh entries
+        'CREATE INDEX IF NOT EXISTS idx_status_cache_checked_at ON status_cache (checked_at)',
+    ]),
+    (3, 'Watchlist sync: watched flag, staging table and file state', [
+        # Domains dropped from domains.txt keep their history with watched = 0
+        'ALTER TABLE domains ADD COLUMN watched INTEGER NOT NULL DEFAULT 0',
+        # Watchlist.domains(): keyset pagination over watched domains
+        'CREATE INDEX IF NOT EXISTS idx_domains_watched ON domains (domain) WHERE watched = 1',
+        # A regular table rather than TEMP: temp_store=MEMORY would hold a million-line file in RAM
+        '''
+        CREATE TABLE IF NOT EXISTS watchlist_staging (
+            domain TEXT PRIMARY KEY
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS watchlist_files (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            domains INTEGER NOT NULL,
+            synced_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (4, 'Shard coordination: node leases and work claims', [
+        '''
+        CREATE TABLE IF NOT EXISTS shard_nodes (
+            node_id TEXT PRIMARY KEY,
+            host TEXT,
+            pid INTEGER,
+            heartbeat_at REAL NOT NULL,
+            started_at REAL NOT NULL
+        )
+        ''',
+        # ShardCoordinator.live_nodes: WHERE heartbeat_at >= ?
+        'CREATE INDEX IF NOT EXISTS idx_shard_nodes_heartbeat ON shard_nodes (heartbeat_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS shard_claims (
+            claim_key TEXT PRIMARY KEY,
+            node_id TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+    ]),
+    (5, 'Lifecycle-aware polling: next check time and phase per domain', [
+        # 0 = due now, so existing and newly watched domains are checked on the first round
+        'ALTER TABLE domains ADD COLUMN next_check_at REAL NOT NULL DEFAULT 0',
+        'ALTER TABLE domains ADD COLUMN lifecycle_phase TEXT',
+        # get_due_domains_page / get_next_check_at: the due queue, soonest first
+        'CREATE INDEX IF NOT EXISTS idx_domains_next_check ON domains (next_check_at, domain) WHERE watched = 1',
+    ]),
+]
+
+
+def get_schema_version(conn):
+    """Highest applied migration version (0 for a fresh database)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations=MIGRATIONS):
+    """Apply pending migrations in order; returns the resulting schema version"""
+    # Manage transactions explicitly so DDL and the version bump commit together
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        version = get_schema_version(conn)
+        for migration_version, description, statements in migrations:
+            if migration_version <= version:
+                continue
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have migrated while we waited for the lock
+                if get_schema_version(conn) >= migration_version:
+                    conn.execute('ROLLBACK')
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                             (migration_version, description))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            version = migration_version
+            logger.info(f"Applied database migration {migration_version}: {description}")
+        return version
+    finally:
+        conn.isolation_level = isolation_level
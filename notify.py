@@ -1,24 +1,122 @@
 import requests
 import json
+import time
+import atexit
+import threading
 import logging
+from collections import deque
 from datetime import datetime
 from config import (
     DISCORD_WEBHOOK, EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT, EMAIL_USERNAME, EMAIL_PASSWORD,
-    LOG_LEVEL, LOG_FILE
+    NOTIFY_QUEUE_SIZE, NOTIFY_WORKERS, NOTIFY_BATCH_MAX, NOTIFY_MAX_RETRIES, NOTIFY_MERGE_KEEP, DISCORD_EMBED_TOTAL
 )
+from logging_setup import configure_logging
 from database import DomainDatabase
+from transport import get_session
+import metrics
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Catch outcomes are never dropped; status chatter can be merged or dropped under backpressure
+HIGH_PRIORITY_TYPES = {'success', 'failure', 'error'}
+
+DISCORD_POST_SECONDS = metrics.histogram('domain_catcher_discord_post_seconds', 'Discord webhook POST latency')
+DISCORD_POSTS = metrics.counter('domain_catcher_discord_posts_total', 'Discord webhook POSTs by outcome', ['outcome'])
+NOTIFICATIONS = metrics.counter('domain_catcher_notifications_total',
+                                'Notifications delivered by type and outcome', ['type', 'outcome'])
+QUEUE_DEPTH = metrics.gauge('domain_catcher_notify_queue_depth', 'Notifications waiting for delivery')
+
+
+def posted(status):
+    """True if _post_discord got a 2xx from Discord"""
+    return status is not None and 200 <= status < 300
+
+
+def render_message(item):
+    """A queued message's text, noting merged messages whose text was left out"""
+    hidden = item['count'] - item['shown']
+    return f"{item['message']}\n\n(+{hidden} more similar messages)" if hidden else item['message']
+
+
+def discord_payload(embeds):
+    return {
+        "username": "Domain Catcher",
+        "avatar_url": "https://cdn-icons-png.flaticon.com/512/3176/3176363.png",
+        "embeds": embeds
+    }
+
+
+class NotificationQueue:
+    """Bounded two-priority queue feeding the notification worker threads"""
+
+    def __init__(self, maxsize=NOTIFY_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.high = deque()
+        self.low = deque()
+        self.cond = threading.Condition()
+        self.in_progress = 0
+        self.dropped = 0
+        self.merged = 0
+
+    def put(self, item):
+        """Enqueue without blocking; returns False if the message was dropped"""
+        with self.cond:
+            if len(self.high) + len(self.low) >= self.maxsize:
+                if item['priority'] == 'low':
+                    tail = self.low[-1] if self.low else None
+                    if tail and tail['notification_type'] == item['notification_type']:
+                        # Fold into the newest queued message of the same kind (past a few, only count it)
+                        if tail['shown'] < NOTIFY_MERGE_KEEP:
+                            tail['message'] += f"\n\n{item['message']}"
+                            tail['shown'] += 1
+                        tail['count'] += 1
+                        self.merged += 1
+                        return True
+                    self.dropped += 1
+                    return False
+                if self.low:
+                    # Make room for a catch outcome by shedding the oldest status message
+                    self.low.popleft()
+                    self.dropped += 1
+            (self.high if item['priority'] == 'high' else self.low).append(item)
+            self.cond.notify()
+            return True
+
+    def get_batch(self, max_items, timeout=None):
+        """Wait for messages and take up to max_items, high priority first"""
+        with self.cond:
+            if not self.high and not self.low:
+                self.cond.wait(timeout)
+            batch = []
+            for source in (self.high, self.low):
+                while source and len(batch) < max_items:
+                    batch.append(source.popleft())
+            self.in_progress += len(batch)
+            return batch
+
+    def task_done(self, count):
+        with self.cond:
+            self.in_progress -= count
+            self.cond.notify_all()
+
+    def join(self, timeout=None):
+        """Wait until every queued message has been handled"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.cond:
+            while self.high or self.low or self.in_progress:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def __len__(self):
+        with self.cond:
+            return len(self.high) + len(self.low)
+
+
 class NotificationManager:
     def __init__(self):
         self.discord_webhook = DISCORD_WEBHOOK
@@ -27,10 +125,14 @@ class NotificationManager:
         self.smtp_server = EMAIL_SMTP_SERVER
         self.smtp_port = EMAIL_SMTP_PORT
         self.db = DomainDatabase()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'DomainCatcher/1.0'
-        })
+        self.session = get_session('discord')
+        
+        # Background delivery: send_* methods only enqueue
+        self.queue = NotificationQueue()
+        self.workers = []
+        self.workers_lock = threading.Lock()
+        self.running = True
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
     
     def send_email(self, subject, body, to_email=None):
         """Send email notification (optional for beginners)"""
@@ -81,39 +183,193 @@ class NotificationManager:
             logger.warning("Discord webhook not configured - this is the primary notification method")
             return False
         
-        try:
-            # Add timestamp to message
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
-            
-            data = {
-                "content": message,
-                "username": "Domain Catcher",
-                "avatar_url": "https://cdn-icons-png.flaticon.com/512/3176/3176363.png"
-            }
-            
-            if title:
-                data["embeds"] = [{
-                    "title": title,
-                    "description": message,
-                    "color": color,
-                    "timestamp": datetime.now().isoformat(),
-                    "footer": {
-                        "text": "DomainCatcher Beginner Combo"
-                    }
-                }]
-            
-            response = self.session.post(self.discord_webhook, json=data, timeout=10)
-            response.raise_for_status()
-            
+        data = {
+            "content": message,
+            "username": "Domain Catcher",
+            "avatar_url": "https://cdn-icons-png.flaticon.com/512/3176/3176363.png"
+        }
+        
+        if title:
+            data["embeds"] = [self._discord_embed(message, title, color)]
+        
+        if posted(self._post_discord(data)):
             logger.info(f"Discord notification sent successfully: {title or message}")
             return True
+        return False
+    
+    @staticmethod
+    def _embed_chars(embed):
+        """Characters Discord counts against DISCORD_EMBED_TOTAL for one embed"""
+        return len(embed['title'] or '') + len(embed['description']) + len(embed['footer']['text'])
+    
+    def _discord_embed(self, message, title, color):
+        """Build a Discord embed (descriptions are capped at 4096 characters)"""
+        return {
+            "title": title,
+            "description": message[:4000],
+            "color": color,
+            "timestamp": datetime.now().isoformat(),
+            "footer": {
+                "text": "DomainCatcher Beginner Combo"
+            }
+        }
+    
+    def _post_discord(self, data):
+        """POST a webhook payload, waiting out Discord 429 rate limits.
+        
+        Returns the final HTTP status, or None if no response arrived.
+        """
+        for attempt in range(NOTIFY_MAX_RETRIES + 1):
+            try:
+                start = time.perf_counter()
+                try:
+                    response = self.session.post(self.discord_webhook, json=data, timeout=10)
+                finally:
+                    DISCORD_POST_SECONDS.observe(time.perf_counter() - start)
+                
+                # Each POST is counted under exactly one outcome
+                if response.status_code == 429:
+                    DISCORD_POSTS.labels('rate_limited').inc()
+                    if attempt == NOTIFY_MAX_RETRIES:
+                        break
+                    try:
+                        retry_after = float(response.json().get('retry_after', 1))
+                    except ValueError:
+                        retry_after = float(response.headers.get('Retry-After', 1))
+                    logger.warning(f"Discord rate limited, retrying in {retry_after:.2f}s")
+                    time.sleep(retry_after)
+                    continue
+                
+                response.raise_for_status()
+                DISCORD_POSTS.labels('ok').inc()
+                return response.status_code
+                
+            except requests.exceptions.RequestException as e:
+                DISCORD_POSTS.labels('error').inc()
+                logger.error(f"Discord webhook request failed: {e}")
+                return e.response.status_code if e.response is not None else None
+            except Exception as e:
+                logger.error(f"Error sending Discord notification: {e}")
+                return None
+        
+        logger.error("Discord webhook still rate limited, giving up")
+        return 429
+    
+    def _enqueue(self, domain, notification_type, subject, message, color):
+        """Hand a notification to the background workers; never blocks the caller"""
+        self._ensure_workers()
+        return self.queue.put({
+            'priority': 'high' if notification_type in HIGH_PRIORITY_TYPES else 'low',
+            'domain': domain,
+            'notification_type': notification_type,
+            'subject': subject,
+            'message': message,
+            'color': color,
+            'count': 1,  # Messages folded into this one
+            'shown': 1   # ... of which the text is included
+        })
+    
+    def _ensure_workers(self):
+        """Start worker threads on first use"""
+        if self.workers:
+            return
+        with self.workers_lock:
+            if self.workers:
+                return
+            for index in range(NOTIFY_WORKERS):
+                worker = threading.Thread(target=self._worker, name=f'notify-{index}', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+            atexit.register(self.flush, 5)
+    
+    def _worker(self):
+        """Deliver queued notifications, coalescing bursts into one webhook call"""
+        while self.running:
+            batch = self.queue.get_batch(NOTIFY_BATCH_MAX, timeout=1)
+            if not batch:
+                continue
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                logger.error(f"Error delivering {len(batch)} notifications: {e}")
+            finally:
+                self.queue.task_done(len(batch))
+    
+    def _deliver(self, batch):
+        """Send a batch via Discord and email, then record it in the database"""
+        if len(batch) == 1:
+            item = batch[0]
+            message = render_message(item)
+            discord_sent = {id(item)} if self.send_discord(message, item['subject'], color=item['color']) else set()
+            email_sent = self.send_email(item['subject'], message)
+        else:
+            discord_sent = set()
+            if self.discord_webhook:
+                for chunk in self._discord_chunks(batch):
+                    discord_sent |= self._post_discord_chunk(chunk)
+                if discord_sent:
+                    logger.info(f"Discord notification sent successfully: {len(discord_sent)} combined messages")
+            else:
+                logger.warning("Discord webhook not configured - this is the primary notification method")
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Discord webhook request failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Error sending Discord notification: {e}")
-            return False
+            body = "\n\n".join(f"{item['subject']}\n{render_message(item)}" for item in batch)
+            email_sent = self.send_email(f"{len(batch)} notifications", body)
+        
+        # Log to database
+        for item in batch:
+            sent = id(item) in discord_sent or email_sent
+            NOTIFICATIONS.labels(item['notification_type'], 'sent' if sent else 'failed').inc(item['count'])
+            if item['domain']:
+                self.db.add_notification(item['domain'], item['notification_type'], item['message'], sent)
+    
+    def _discord_chunks(self, batch):
+        """Split a batch into groups of (item, embed) that each fit in one webhook message"""
+        chunk, chars = [], 0
+        for item in batch:
+            embed = self._discord_embed(render_message(item), item['subject'], item['color'])
+            size = self._embed_chars(embed)
+            if chunk and (chars + size > DISCORD_EMBED_TOTAL or len(chunk) >= NOTIFY_BATCH_MAX):
+                yield chunk
+                chunk, chars = [], 0
+            chunk.append((item, embed))
+            chars += size
+        if chunk:
+            yield chunk
+    
+    def _post_discord_chunk(self, chunk):
+        """Post a group of embeds as one message; returns the ids of the items delivered.
+        
+        If Discord rejects the combined message (a 4xx other than 429), the
+        catch outcomes in it are sent again one by one so a bad status message
+        cannot take them down with it.
+        """
+        status = self._post_discord(discord_payload([embed for _, embed in chunk]))
+        if posted(status):
+            return {id(item) for item, _ in chunk}
+        delivered = set()
+        if status and 400 <= status < 500 and status != 429 and len(chunk) > 1:
+            logger.warning(f"Discord rejected {len(chunk)} combined messages ({status}), resending catch outcomes")
+            for item, embed in chunk:
+                if item['priority'] == 'high' and posted(self._post_discord(discord_payload([embed]))):
+                    delivered.add(id(item))
+        return delivered
+    
+    def flush(self, timeout=None):
+        """Wait until queued notifications are delivered; returns False on timeout"""
+        return self.queue.join(timeout)
+    
+    def close(self, timeout=5):
+        """Deliver what is queued, then stop the workers"""
+        self.flush(timeout)
+        self.running = False
+    
+    def get_queue_stats(self):
+        """Queue depth and backpressure counters"""
+        return {
+            'queued': len(self.queue),
+            'dropped': self.queue.dropped,
+            'merged': self.queue.merged
+        }
     
     def send_success_notification(self, domain, details=None):
         """Send success notification for caught domain"""
@@ -123,16 +379,8 @@ class NotificationManager:
         if details:
             message += f"\n\nDetails:\n{details}"
         
-        # Send Discord with green color (primary method)
-        discord_sent = self.send_discord(message, subject, color=0x00ff00)
-        
-        # Send email (optional)
-        email_sent = self.send_email(subject, message)
-        
-        # Log to database
-        self.db.add_notification(domain, 'success', message, discord_sent or email_sent)
-        
-        return discord_sent or email_sent
+        # Queue for Discord (primary) and email (optional); the database log is written on delivery
+        return self._enqueue(domain, 'success', subject, message, 0x00ff00)
     
     def send_failure_notification(self, domain, reason=None):
         """Send failure notification for missed domain"""
@@ -142,16 +390,8 @@ class NotificationManager:
         if reason:
             message += f"\n\nReason: {reason}"
         
-        # Send Discord with red color (primary method)
-        discord_sent = self.send_discord(message, subject, color=0xff0000)
-        
-        # Send email (optional)
-        email_sent = self.send_email(subject, message)
-        
-        # Log to database
-        self.db.add_notification(domain, 'failure', message, discord_sent or email_sent)
-        
-        return discord_sent or email_sent
+        # Queue for Discord (primary) and email (optional); the database log is written on delivery
+        return self._enqueue(domain, 'failure', subject, message, 0xff0000)
     
     def send_monitoring_notification(self, domain, status, registrar=None):
         """Send notification about domain status change"""
@@ -161,32 +401,16 @@ class NotificationManager:
         if registrar:
             message += f"\nRegistrar: {registrar}"
         
-        # Send Discord with blue color (primary method)
-        discord_sent = self.send_discord(message, subject, color=0x0099ff)
-        
-        # Send email (optional)
-        email_sent = self.send_email(subject, message)
-        
-        # Log to database
-        self.db.add_notification(domain, 'monitoring', message, discord_sent or email_sent)
-        
-        return discord_sent or email_sent
+        # Queue for Discord (primary) and email (optional); the database log is written on delivery
+        return self._enqueue(domain, 'monitoring', subject, message, 0x0099ff)
     
     def send_scheduled_notification(self, domain, drop_time):
         """Send notification about scheduled catch attempt"""
         subject = f"⏰ Domain Catch Scheduled: {domain}"
         message = f"Domain {domain} scheduled for catch at {drop_time}"
         
-        # Send Discord with orange color (primary method)
-        discord_sent = self.send_discord(message, subject, color=0xff9900)
-        
-        # Send email (optional)
-        email_sent = self.send_email(subject, message)
-        
-        # Log to database
-        self.db.add_notification(domain, 'scheduled', message, discord_sent or email_sent)
-        
-        return discord_sent or email_sent
+        # Queue for Discord (primary) and email (optional); the database log is written on delivery
+        return self._enqueue(domain, 'scheduled', subject, message, 0xff9900)
     
     def send_notification(self, subject, body, notification_type="info"):
         """Send general notification via all configured channels"""
@@ -202,13 +426,8 @@ class NotificationManager:
         }
         color = color_map.get(notification_type, 0x0099ff)
         
-        # Send Discord (primary method)
-        discord_sent = self.send_discord(body, subject, color=color)
-        
-        # Send email (optional)
-        email_sent = self.send_email(subject, body)
-        
-        return discord_sent or email_sent
+        # Queue for Discord (primary) and email (optional)
+        return self._enqueue(None, notification_type, subject, body, color)
     
     def test_notifications(self):
         """Test all notification channels"""
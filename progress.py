@@ -0,0 +1,160 @@
+"""
+Live catch progress for the HTTP API
+
+The scheduler and the catch loops publish small immutable entries (named
+tuples) to a ProgressBoard and health_server only reads it. Publishing is a
+dict item assignment and reading copies the dict, both single operations
+under the GIL, so neither side takes a lock: a dashboard polling every
+second, or an event stream per browser tab, never delays a probe. A running
+catch publishes on every state change and otherwise at most every
+PROGRESS_PUBLISH_INTERVAL seconds; between publishes the probe loop pays one
+comparison.
+"""
+import itertools
+import time
+from collections import deque, namedtuple
+from config import PROGRESS_PUBLISH_INTERVAL, PROGRESS_HISTORY
+
+# state: probing, registering, caught, failed, cancelled or error. Times are epoch seconds.
+CatchProgress = namedtuple('CatchProgress', 'domain state strategy started_at drop_at attempts in_flight '
+                                            'probe_rate updated_at message')
+ScheduledJob = namedtuple('ScheduledJob', 'domain status scheduled_at drop_at strategy registrar')
+
+
+class ProgressBoard:
+    """Latest progress of every scheduled and running catch"""
+
+    def __init__(self, history=PROGRESS_HISTORY):
+        self.catches = {}  # domain -> CatchProgress of running catches
+        self.finished = deque(maxlen=history)  # CatchProgress of finished catches, oldest first
+        self.scheduled = {}  # domain -> ScheduledJob of catches not yet finished
+        self.versions = itertools.count(1)
+        self.version = 0  # Changes on every publish
+        self.cached = None  # (version, snapshot) shared by all readers
+
+    def publish_catch(self, progress):
+        self.catches[progress.domain] = progress
+        self.version = next(self.versions)
+
+    def finish_catch(self, progress):
+        """Move a catch from running to finished (its schedule entry goes too)"""
+        self.finished.append(progress)
+        self.catches.pop(progress.domain, None)
+        self.scheduled.pop(progress.domain, None)
+        self.version = next(self.versions)
+
+    def publish_scheduled(self, job):
+        self.scheduled[job.domain] = job
+        self.version = next(self.versions)
+
+    def drop_scheduled(self, domain):
+        """Remove a schedule entry that will never run or has finished"""
+        if self.scheduled.pop(domain, None) is not None:
+            self.version = next(self.versions)
+
+    def snapshot(self):
+        """JSON-ready view of the board, rebuilt only when something was published since the last one"""
+        version = self.version
+        cached = self.cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        catches = list(self.catches.copy().values())
+        scheduled = sorted(self.scheduled.copy().values(), key=lambda job: job.scheduled_at)
+        snapshot = {
+            'version': version,
+            'generated_at': time.time(),
+            'scheduled': [job._asdict() for job in scheduled],
+            'catches': [progress._asdict() for progress in catches],
+            'finished': [progress._asdict() for progress in list(self.finished)],
+            'rates': {
+                'active_catches': len(catches),
+                'probes_per_second': round(sum(progress.probe_rate for progress in catches), 2),
+                'probes_in_flight': sum(progress.in_flight for progress in catches),
+                'per_catch': {progress.domain: progress.probe_rate for progress in catches}
+            }
+        }
+        self.cached = (version, snapshot)
+        return snapshot
+
+
+BOARD = ProgressBoard()
+
+
+class CatchTracker:
+    """Publishes one catch's progress to a board.
+
+    The probe loop checks `now >= tracker.next_publish` itself and calls
+    publish() only when that is true. The probe rate is measured over at
+    least one publish interval.
+    """
+
+    def __init__(self, domain, strategy, drop_at, clock, board=None, interval=PROGRESS_PUBLISH_INTERVAL):
+        self.board = board or BOARD
+        self.domain = domain
+        self.strategy = strategy
+        self.drop_at = drop_at  # Epoch seconds of the predicted drop, or None
+        self.clock = clock
+        self.interval = interval
+        self.started_at = clock.time()
+        self.rate_since = clock.monotonic()
+        self.rate_attempts = 0
+        self.probe_rate = 0.0
+        self.next_publish = self.rate_since
+
+    def publish(self, state, attempts, in_flight=0, now=None, message=''):
+        now = self.clock.monotonic() if now is None else now
+        elapsed = now - self.rate_since
+        if elapsed >= self.interval:
+            self.probe_rate = round((attempts - self.rate_attempts) / elapsed, 2)
+            self.rate_since, self.rate_attempts = now, attempts
+        self.next_publish = now + self.interval
+        self.board.publish_catch(self._progress(state, attempts, in_flight, self.probe_rate, message))
+
+    def finish(self, state, attempts, message=''):
+        """Publish the outcome; the rate becomes the average over the whole catch"""
+        elapsed = self.clock.time() - self.started_at
+        rate = round(attempts / elapsed, 2) if elapsed > 0 else 0.0
+        self.board.finish_catch(self._progress(state, attempts, 0, rate, message))
+
+    def _progress(self, state, attempts, in_flight, rate, message):
+        return CatchProgress(self.domain, state, self.strategy, self.started_at, self.drop_at, attempts, in_flight,
+                             rate, self.clock.time(), message)
+
+
+if __name__ == "__main__":
+    # Cost on the catch thread (a due publish, and the check when not due) and of building a snapshot
+    from clock import SystemClock
+
+    n = 200000
+    board = ProgressBoard()
+    tracker = CatchTracker('example.com', 'burst', time.time() + 60, SystemClock(), board=board)
+    for i in range(20):
+        CatchTracker(f"other{i}.com", 'burst', None, SystemClock(), board=board).publish('probing', i)
+
+    start = time.perf_counter()
+    for i in range(n):
+        tracker.publish('probing', i, 2)
+    publish = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    for i in range(n):
+        if time.monotonic() >= tracker.next_publish:
+            tracker.publish('probing', i, 2)
+    check = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    for i in range(n // 100):
+        board.version = next(board.versions)  # Force a rebuild each time
+        board.snapshot()
+    rebuild = (time.perf_counter() - start) / (n // 100)
+
+    start = time.perf_counter()
+    for i in range(n):
+        board.snapshot()
+    cached = (time.perf_counter() - start) / n
+
+    print(f"publish (due):      {publish * 1e6:6.2f} µs")
+    print(f"check (not due):    {check * 1e6:6.2f} µs (including time.monotonic())")
+    print(f"snapshot, rebuilt:  {rebuild * 1e6:6.2f} µs for {len(board.catches)} running catches")
+    print(f"snapshot, cached:   {cached * 1e6:6.2f} µs")
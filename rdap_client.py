@@ -0,0 +1,235 @@
+"""
+RDAP status client
+
+Reads EPP status, lifecycle events (expiration, deletion) and registrar from
+registry RDAP JSON. Requests go through the shared keep-alive transport, and
+TLDs are routed to RDAP servers using the IANA bootstrap file (cached on disk,
+with a built-in map for common TLDs if it cannot be fetched).
+"""
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+import requests
+from config import (
+    RDAP_BOOTSTRAP_URL, RDAP_BOOTSTRAP_FILE, RDAP_BOOTSTRAP_MAX_AGE, RDAP_TIMEOUT
+)
+from logging_setup import configure_logging
+from transport import get_session
+from whois_parser import WhoisRecord
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Used when the bootstrap file is unavailable
+FALLBACK_RDAP_SERVERS = {
+    'com': 'https://rdap.verisign.com/com/v1/',
+    'net': 'https://rdap.verisign.com/net/v1/',
+    'org': 'https://rdap.publicinterestregistry.org/rdap/',
+    'info': 'https://rdap.identitydigital.services/rdap/',
+    'io': 'https://rdap.identitydigital.services/rdap/',
+    'me': 'https://rdap.identitydigital.services/rdap/',
+    'xyz': 'https://rdap.centralnic.com/xyz/',
+    'app': 'https://pubapi.registry.google/rdap/',
+    'dev': 'https://pubapi.registry.google/rdap/',
+    'co': 'https://rdap.registry.co/co/',
+    'fr': 'https://rdap.nic.fr/',
+    'nl': 'https://rdap.sidn.nl/',
+}
+
+
+class RDAPBootstrap:
+    """TLD -> RDAP base URL map from the IANA bootstrap file"""
+
+    def __init__(self, path=RDAP_BOOTSTRAP_FILE, url=RDAP_BOOTSTRAP_URL, max_age=RDAP_BOOTSTRAP_MAX_AGE,
+                 session=None):
+        self.path = path
+        self.url = url
+        self.max_age = max_age
+        self.session = session
+        self.servers = None
+        self.lock = threading.Lock()
+
+    def server_for(self, tld):
+        """Base URL (with trailing slash) for tld, or None if it has no RDAP service"""
+        if self.servers is None:
+            with self.lock:
+                if self.servers is None:
+                    self.servers = self.load()
+        return self.servers.get(tld.lower())
+
+    def load(self):
+        """Read the local bootstrap file, refreshing it from IANA when missing or stale"""
+        fresh = os.path.exists(self.path) and time.time() - os.path.getmtime(self.path) < self.max_age
+        if not fresh:
+            try:
+                self.refresh()
+            except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                logger.warning(f"Could not refresh RDAP bootstrap from {self.url}: {e}")
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                servers = self.parse(json.load(f))
+            logger.info(f"Loaded RDAP bootstrap for {len(servers)} TLDs from {self.path}")
+            return servers
+        except (OSError, ValueError) as e:
+            logger.warning(f"No usable RDAP bootstrap file ({e}); using built-in servers")
+            return dict(FALLBACK_RDAP_SERVERS)
+
+    def refresh(self):
+        """Download the bootstrap file and replace the local copy atomically"""
+        response = (self.session or get_session('rdap')).get(self.url, timeout=RDAP_TIMEOUT)
+        response.raise_for_status()
+        self.parse(response.json())  # Refuse to save something we cannot read back
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def parse(bootstrap):
+        """Turn the bootstrap 'services' list into {tld: base_url}, preferring https"""
+        servers = {}
+        for tlds, urls in bootstrap['services']:
+            urls = sorted(urls, key=lambda url: not url.startswith('https://'))
+            if not urls:
+                continue
+            base_url = urls[0] if urls[0].endswith('/') else urls[0] + '/'
+            for tld in tlds:
+                servers[tld.lower()] = base_url
+        # Fill gaps so common TLDs work even with a partial file
+        for tld, base_url in FALLBACK_RDAP_SERVERS.items():
+            servers.setdefault(tld, base_url)
+        return servers
+
+
+class RDAPRecord(WhoisRecord):
+    """WhoisRecord built from an RDAP domain object, plus its lifecycle events"""
+    __slots__ = ('deletion', 'events')
+
+    def __init__(self):
+        super().__init__()
+        self.deletion = None  # aware UTC datetime of the scheduled deletion, if published
+        self.events = {}  # eventAction -> raw eventDate
+
+    def to_domain_info(self, domain, source='rdap'):
+        domain_info = super().to_domain_info(domain, source)
+        domain_info['deletion_date'] = self.deletion.isoformat() if self.deletion else ''
+        return domain_info
+
+
+def parse_rdap_date(value):
+    """Parse an RDAP eventDate (RFC 3339) into an aware UTC datetime, or None"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def parse_rdap(data):
+    """Extract status codes, events and registrar from an RDAP domain response"""
+    record = RDAPRecord()
+    record.statuses = list(data.get('status', []))
+
+    for event in data.get('events', []):
+        action = event.get('eventAction', '').lower()
+        date = event.get('eventDate')
+        if not action or not date:
+            continue
+        record.events.setdefault(action, date)
+        if action == 'expiration' and record.expiry_raw is None:
+            record.expiry_raw = date
+            record.expiry = parse_rdap_date(date)
+        elif action == 'deletion' and record.deletion is None:
+            record.deletion = parse_rdap_date(date)
+
+    for entity in data.get('entities', []):
+        if 'registrar' in entity.get('roles', []):
+            record.registrar = _vcard_name(entity) or entity.get('handle')
+            break
+
+    return record
+
+
+def _vcard_name(entity):
+    """The 'fn' property of an entity's jCard, if any"""
+    try:
+        for prop in entity['vcardArray'][1]:
+            if prop[0] == 'fn':
+                return prop[3]
+    except (KeyError, IndexError, TypeError):
+        pass
+    return None
+
+
+class RDAPClient:
+    """Looks up domain status over RDAP using pooled keep-alive connections"""
+
+    def __init__(self, session=None, bootstrap=None, servers=None, timeout=RDAP_TIMEOUT):
+        self.session = session or get_session('rdap', headers={'Accept': 'application/rdap+json'})
+        self.bootstrap = bootstrap or RDAPBootstrap(session=self.session)
+        # Optional {tld: base_url} overrides, e.g. to point at a local stand-in
+        self.servers = servers or {}
+        self.timeout = timeout
+
+    def server_for(self, domain):
+        tld = domain.rsplit('.', 1)[-1].lower()
+        return self.servers.get(tld) or self.bootstrap.server_for(tld)
+
+    def lookup(self, domain):
+        """Return an RDAPRecord for domain, or None if the lookup failed.
+
+        A 404 from the registry means the domain is not registered, so the
+        record comes back with not_found set.
+        """
+        domain = domain.strip().lower()
+        base_url = self.server_for(domain)
+        if not base_url:
+            logger.error(f"No RDAP server known for {domain}")
+            return None
+
+        try:
+            response = self.session.get(f"{base_url}domain/{domain}", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"RDAP request failed for {domain}: {e}")
+            return None
+
+        if response.status_code == 404:
+            record = RDAPRecord()
+            record.not_found = True
+            return record
+        if response.status_code == 429:
+            logger.warning(f"RDAP rate limit hit for {domain} (Retry-After: {response.headers.get('Retry-After')})")
+            return None
+        if response.status_code != 200:
+            logger.error(f"RDAP lookup for {domain} returned HTTP {response.status_code}")
+            return None
+
+        try:
+            return parse_rdap(response.json())
+        except ValueError as e:
+            logger.error(f"Invalid RDAP response for {domain}: {e}")
+            return None
+
+    def check_domain_status(self, domain):
+        """Domain info dict in the format used by DomainStatusChecker, or None"""
+        record = self.lookup(domain)
+        if record is None:
+            return None
+        return record.to_domain_info(domain)
+
+
+if __name__ == "__main__":
+    import sys
+
+    client = RDAPClient()
+    for name in sys.argv[1:] or ['example.com']:
+        info = client.check_domain_status(name)
+        print(f"{name}: {info}")
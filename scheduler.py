@@ -1,67 +1,125 @@
-import schedule
-import time
 import threading
+import time
 import logging
+from functools import cached_property
 from datetime import datetime, timedelta
 from check_status import DomainStatusChecker
-from catcher import DomainCatcher
+from catch_executor import CatchExecutor, ThreadSafeDict
+from drop_timer import OneShotScheduler
+from dynadot_api import DynadotAPI
 from notify import NotificationManager
+import metrics
 from config import (
-    CHECK_INTERVAL, REGISTRAR_DROP_TIMES, DROP_BUFFER_TIME,
-    LOG_LEVEL, LOG_FILE
+    POLL_MIN_WAIT, POLL_MAX_WAIT, REGISTRAR_DROP_TIMES, DROP_BUFFER_TIME, CATCH_STRATEGY, PREWARM_SECONDS,
+    CATCH_MAX_DURATION_MINUTES, CATCH_PIPELINE_DEPTH
 )
+from logging_setup import configure_logging
+from clock import SYSTEM_CLOCK
+from domain_record import DomainRecord, ScheduledCatch, to_datetime
+from progress import BOARD, ScheduledJob
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+CHECK_ROUND_SECONDS = metrics.histogram('domain_catcher_check_round_seconds', 'Duration of one due-domain check round',
+                                        buckets=(1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200))
+PENDING_FOUND = metrics.counter('domain_catcher_pending_delete_found_total',
+                                'pendingDelete domains newly scheduled for a catch')
+SCHEDULED_DOMAINS = metrics.gauge('domain_catcher_scheduled_domains', 'Scheduled catches by status', ['status'])
+ACTIVE_CATCHES = metrics.gauge('domain_catcher_active_catches', 'Catches currently running')
+STARTUP_SECONDS = metrics.gauge('domain_catcher_scheduler_startup_seconds',
+                                'Seconds from building the scheduler until it was warmed up and monitoring')
+SCHEDULE_STATUSES = ('scheduled', 'attempting', 'success', 'failed', 'cancelled', 'error')
+FINISHED_STATUSES = frozenset({'success', 'failed', 'cancelled', 'error'})
+
+def registry_deletion_time(domain_info, clock=SYSTEM_CLOCK):
+    """Future deletion instant from the registry's deletion event (RDAP), or None"""
+    deletion = DomainRecord.from_dict(domain_info).deletion
+    if deletion is None or deletion <= clock.time():
+        return None
+    return to_datetime(deletion)
+
+def predict_drop_time(domain_info, clock=SYSTEM_CLOCK):
+    """Predict the UTC instant a domain drops, based on status and registrar"""
+    # PendingDelete domains typically drop 5 days after expiry
+    # This is an approximation - actual times vary by registrar
+    base_drop_time = clock.now() + timedelta(days=5)
+    
+    # Prefer the deletion date the registry publishes over RDAP
+    deletion_time = registry_deletion_time(domain_info, clock)
+    if deletion_time:
+        if deletion_time.time() != datetime.min.time():
+            logger.info(f"Predicted drop time for {domain_info['domain']} "
+                        f"(registry deletion event): {deletion_time.isoformat()}")
+            return deletion_time
+        # Date-only event: drop on that day at the registrar's usual hour
+        base_drop_time = deletion_time
+    
+    # Adjust based on registrar
+    registrar = domain_info.get('registrar', '').lower()
+    
+    # Look up registrar-specific drop time
+    drop_time_config = REGISTRAR_DROP_TIMES.get('default')
+    for reg_name, config in REGISTRAR_DROP_TIMES.items():
+        if reg_name != 'default' and reg_name in registrar:
+            drop_time_config = config
+            break
+    
+    # Set the drop time
+    drop_time = base_drop_time.replace(
+        hour=drop_time_config['hour'],
+        minute=drop_time_config['minute'],
+        second=0,
+        microsecond=0
+    )
+    
+    logger.info(f"Predicted drop time for {domain_info['domain']}: {drop_time.isoformat()}")
+    return drop_time
+
 class DropScheduler:
-    def __init__(self):
+    def __init__(self, clock=None):
+        self.created_at = time.monotonic()
+        self.clock = clock or SYSTEM_CLOCK  # VirtualClock when replaying drops in simulation.py
         self.checker = DomainStatusChecker()
-        self.catcher = DomainCatcher()
         self.notifier = NotificationManager()
-        self.scheduled_domains = {}  # Track scheduled domains
+        self.catcher = CatchExecutor(notifier=self.notifier, shard=self.checker.shard, clock=self.clock)
+        self.scheduled_domains = ThreadSafeDict()  # domain -> ScheduledCatch
+        self.timer = OneShotScheduler(clock=self.clock)
+        self.catch_minutes = CATCH_MAX_DURATION_MINUTES
+        self.pipeline_depth = CATCH_PIPELINE_DEPTH
+        self.check_thread = None
         self.running = False
+        self.ready = threading.Event()  # Set once start_monitoring has warmed up
+        
+        # Gauges read the live state at scrape time
+        for status in SCHEDULE_STATUSES:
+            SCHEDULED_DOMAINS.labels(status).set_function(
+                lambda status=status: sum(1 for entry in self.scheduled_domains.values() if entry.status == status))
+        ACTIVE_CATCHES.set_function(lambda: len(self.catcher.active))
+    
+    @cached_property
+    def prewarm_api(self):
+        """Client that only opens connections ahead of catches, built with the first one"""
+        return DynadotAPI()
         
-    def calculate_drop_time(self, domain_info):
-        """Calculate approximate drop time based on status and registrar"""
-        # PendingDelete domains typically drop 5 days after expiry
-        # This is an approximation - actual times vary by registrar
-        base_drop_time = datetime.now() + timedelta(days=5)
-        
-        # Adjust based on registrar
-        registrar = domain_info.get('registrar', '').lower()
-        
-        # Look up registrar-specific drop time
-        drop_time_config = REGISTRAR_DROP_TIMES.get('default')
-        for reg_name, config in REGISTRAR_DROP_TIMES.items():
-            if reg_name != 'default' and reg_name in registrar:
-                drop_time_config = config
-                break
-        
-        # Set the drop time
-        drop_time = base_drop_time.replace(
-            hour=drop_time_config['hour'],
-            minute=drop_time_config['minute'],
-            second=0,
-            microsecond=0
-        )
-        
-        # Add buffer time before actual drop
-        drop_time -= timedelta(seconds=DROP_BUFFER_TIME)
-        
-        logger.info(f"Calculated drop time for {domain_info['domain']}: {drop_time}")
-        return drop_time
-    
-    def schedule_domain_catch(self, domain_info):
-        """Schedule a domain catch attempt"""
+    def predict_drop_time(self, domain_info):
+        """Predict the UTC instant a domain drops, on this scheduler's clock"""
+        return predict_drop_time(domain_info, self.clock)
+    
+    def calculate_drop_time(self, domain_info, lead_seconds=DROP_BUFFER_TIME):
+        """Calculate when to start catching: lead_seconds before the predicted drop (UTC)"""
+        start_time = self.predict_drop_time(domain_info) - timedelta(seconds=lead_seconds)
+        logger.info(f"Calculated catch start for {domain_info['domain']}: {start_time.isoformat()}")
+        return start_time
+    
+    def schedule_domain_catch(self, domain_info, lead_seconds=DROP_BUFFER_TIME, strategy=None):
+        """Schedule a one-shot catch attempt lead_seconds before the predicted drop.
+        
+        strategy picks the catch intensity curve for this domain ('burst',
+        'constant' or a CatchStrategy); it defaults to domain_info['catch_strategy']
+        and then CATCH_STRATEGY.
+        """
         domain = domain_info['domain']
         
         # Check if already scheduled
@@ -69,82 +127,123 @@ class DropScheduler:
             logger.info(f"Domain {domain} already scheduled, skipping")
             return
         
-        drop_time = self.calculate_drop_time(domain_info)
+        strategy = strategy or domain_info.get('catch_strategy') or CATCH_STRATEGY
+        domain_info = DomainRecord.from_dict(domain_info)
+        drop_time = self.predict_drop_time(domain_info)
+        start_time = drop_time - timedelta(seconds=lead_seconds)
         
-        # Don't schedule if drop time is in the past
-        if drop_time <= datetime.now():
-            logger.warning(f"Drop time for {domain} is in the past, scheduling immediately")
-            drop_time = datetime.now() + timedelta(minutes=1)
+        # Don't schedule if start time is in the past
+        now = self.clock.now()
+        if start_time <= now:
+            logger.warning(f"Start time for {domain} is in the past, scheduling immediately")
+            start_time = now
         
-        logger.info(f"Scheduling catch for {domain} at {drop_time}")
+        logger.info(f"Scheduling catch for {domain} at {start_time.isoformat()} (drop {drop_time.isoformat()})")
         
-        # Schedule the catch attempt
-        schedule.every().day.at(drop_time.strftime("%H:%M")).do(
-            self.attempt_catch, domain_info
-        )
+        # Schedule the catch attempt (fires once, on the monotonic clock)
+        job = self.timer.schedule_at(start_time, self.attempt_catch, domain_info, name=f"catch:{domain}")
+        
+        # Open API connections shortly before the catch starts and again before the drop,
+        # so neither the first probe nor the register call pays for DNS/TCP/TLS setup
+        warm_jobs = [
+            self.timer.schedule_at(warm_time - timedelta(seconds=PREWARM_SECONDS), self._start_prewarm,
+                                   name=f"prewarm:{domain}")
+            for warm_time in sorted({start_time, drop_time})
+        ]
         
         # Track scheduled domain
-        self.scheduled_domains[domain] = {
-            'domain_info': domain_info,
-            'scheduled_time': drop_time,
-            'status': 'scheduled'
-        }
+        self.scheduled_domains[domain] = ScheduledCatch(domain_info, start_time.timestamp(), drop_time.timestamp(),
+                                                        strategy, job, warm_jobs)
+        self._publish_schedule(domain)
         
         # Notify about scheduled catch
-        self.notifier.send_scheduled_notification(domain, drop_time)
+        self.notifier.send_scheduled_notification(domain, start_time)
         
-        logger.info(f"✅ Domain {domain} scheduled for catch at {drop_time}")
+        logger.info(f"✅ Domain {domain} scheduled for catch at {start_time.isoformat()}")
     
     def attempt_catch(self, domain_info):
-        """Attempt to catch a domain"""
+        """Start a catch attempt for a domain on the catch executor"""
         domain = domain_info['domain']
         logger.info(f"🚀 Starting catch attempt for {domain}...")
         
-        # Update status
-        if domain in self.scheduled_domains:
-            self.scheduled_domains[domain]['status'] = 'attempting'
+        # Update status (a cancelled domain never starts)
+        entry = self.scheduled_domains.get(domain)
+        if entry and entry.status == 'cancelled':
+            logger.info(f"Catch for {domain} was cancelled, not starting")
+            return None
+        self._set_status(domain, 'attempting')
         
         try:
-            success = self.catcher.catch_domain(domain)
-            stats = self.catcher.get_catch_stats(domain)
-            
-            if success:
-                # Update status
-                if domain in self.scheduled_domains:
-                    self.scheduled_domains[domain]['status'] = 'success'
-                
-                # Send success notification
-                details = f"Attempts: {stats['attempts']}\nMessage: {stats['message']}"
-                self.notifier.send_success_notification(domain, details)
-                
-                logger.info(f"🎉 Successfully caught {domain}!")
-            else:
-                # Update status
-                if domain in self.scheduled_domains:
-                    self.scheduled_domains[domain]['status'] = 'failed'
-                
-                # Send failure notification
-                reason = f"Failed after {stats['attempts']} attempts: {stats['message']}"
-                self.notifier.send_failure_notification(domain, reason)
-                
-                logger.warning(f"❌ Failed to catch {domain}")
+            # Runs concurrently with other catches in the same drop window
+            catch_kwargs = {'max_duration_minutes': self.catch_minutes, 'pipeline_depth': self.pipeline_depth}
+            if entry:
+                catch_kwargs.update(drop_time=entry.drop_time, strategy=entry.strategy)
+            future = self.catcher.submit(domain, callback=self._on_catch_finished, **catch_kwargs)
+            if future is None:
+                logger.info(f"Catch for {domain} is already in progress")
+            return future
                 
         except Exception as e:
-            logger.error(f"Error during catch attempt for {domain}: {e}")
+            logger.error(f"Error starting catch attempt for {domain}: {e}")
             
             # Update status
-            if domain in self.scheduled_domains:
-                self.scheduled_domains[domain]['status'] = 'error'
+            self._set_status(domain, 'error')
             
             # Send error notification
             self.notifier.send_failure_notification(domain, f"Error: {str(e)}")
+            return None
+    
+    def _set_status(self, domain, status):
+        """Update a scheduled catch's status and publish it to the progress board.
+        
+        A finished catch leaves the board's schedule; its outcome is in the board's finished list.
+        """
+        if self.scheduled_domains.update_item(domain, status=status):
+            if status in FINISHED_STATUSES:
+                BOARD.drop_scheduled(domain)
+            else:
+                self._publish_schedule(domain)
+    
+    def _publish_schedule(self, domain):
+        entry = self.scheduled_domains.get(domain)
+        if entry:
+            BOARD.publish_scheduled(ScheduledJob(domain, entry.status, entry.scheduled_at, entry.drop_at,
+                                                 getattr(entry.strategy, 'name', entry.strategy),
+                                                 entry.record.registrar))
+    
+    def _on_catch_finished(self, domain, success, stats):
+        """Record the outcome of a catch (runs on the catch thread)"""
+        entry = self.scheduled_domains.get(domain)
+        if entry and entry.status == 'cancelled':
+            logger.info(f"Catch for {domain} stopped after cancellation")
+            return
+        
+        if success:
+            # Update status
+            self._set_status(domain, 'success')
+            
+            # Send success notification
+            details = f"Attempts: {stats['attempts']}\nMessage: {stats['message']}"
+            self.notifier.send_success_notification(domain, details)
+            
+            logger.info(f"🎉 Successfully caught {domain}!")
+        else:
+            # Update status
+            self._set_status(domain, 'failed')
+            
+            # Send failure notification
+            reason = f"Failed after {stats['attempts']} attempts: {stats['message']}"
+            self.notifier.send_failure_notification(domain, reason)
+            
+            logger.warning(f"❌ Failed to catch {domain}")
     
     def check_pending_domains(self):
-        """Check for new pendingDelete domains"""
-        logger.info("Checking for pendingDelete domains...")
+        """Check the domains that are due and schedule catches for new pendingDelete ones"""
+        logger.info("Checking due domains for pendingDelete...")
+        start = time.perf_counter()
         
         try:
-            pending_domains = self.checker.monitor_all_domains()
+            pending_domains = self.checker.check_due_domains()
             
             for domain_info in pending_domains:
                 domain = domain_info['domain']
@@ -156,6 +255,7 @@ class DropScheduler:
                 
                 # Schedule catch attempt
                 self.schedule_domain_catch(domain_info)
+                PENDING_FOUND.inc()
                 
                 # Send monitoring notification
                 self.notifier.send_monitoring_notification(
@@ -167,44 +267,69 @@ class DropScheduler:
                 
         except Exception as e:
             logger.error(f"Error checking pending domains: {e}")
+        finally:
+            CHECK_ROUND_SECONDS.observe(time.perf_counter() - start)
+            self._schedule_next_check()
+    
+    def _schedule_next_check(self):
+        """Wake up when the next domain falls due (bounded so domains.txt edits are seen)"""
+        if not self.running:
+            return
+        next_check_at = self.checker.next_check_time()
+        delay = POLL_MAX_WAIT if next_check_at is None else next_check_at - self.clock.time()
+        delay = min(max(delay, POLL_MIN_WAIT), POLL_MAX_WAIT)
+        self.timer.schedule_in(delay, self._start_pending_check, name='check_pending_domains')
+        logger.debug(f"Next due-domain check in {delay:.0f}s")
     
     def get_scheduled_domains(self):
         """Get list of scheduled domains"""
         return self.scheduled_domains.copy()
     
     def cancel_domain(self, domain):
-        """Cancel a scheduled domain catch"""
-        if domain in self.scheduled_domains:
-            # Note: schedule library doesn't have a direct way to cancel specific jobs
-            # This is a limitation - in production, you'd want a more sophisticated scheduler
-            logger.info(f"Cancelling scheduled catch for {domain}")
-            self.scheduled_domains[domain]['status'] = 'cancelled'
-            return True
-        return False
+        """Cancel a scheduled domain catch, stopping it if it is already running"""
+        entry = self.scheduled_domains.get(domain)
+        if not entry:
+            return False
+        
+        logger.info(f"Cancelling scheduled catch for {domain}")
+        self.timer.cancel(entry.job)
+        for warm_job in entry.warm_jobs:
+            self.timer.cancel(warm_job)
+        self._set_status(domain, 'cancelled')
+        self.catcher.cancel(domain)
+        return True
+    
+    def _start_prewarm(self):
+        """Timer job: pre-warm Dynadot connections on a short-lived thread"""
+        threading.Thread(target=self.prewarm_api.prewarm, name='prewarm', daemon=True).start()
+    
+    def _start_pending_check(self):
+        """Timer job: run check_pending_domains on its own thread so the timer never stalls"""
+        if self.check_thread and self.check_thread.is_alive():
+            logger.warning("Previous pendingDelete check still running, skipping this round")
+            return
+        self.check_thread = threading.Thread(target=self.check_pending_domains, name='pending-check', daemon=True)
+        self.check_thread.start()
     
     def start_monitoring(self):
         """Start the monitoring loop"""
         logger.info("Starting domain monitoring system...")
         self.running = True
         
-        # Check for pendingDelete domains every hour
-        schedule.every().hour.do(self.check_pending_domains)
+        # Preload the status cache before the first round rather than when the scheduler is built
+        self.checker.warm_cache()
+        STARTUP_SECONDS.set(time.monotonic() - self.created_at)
+        self.ready.set()
         
-        # Run initial check
+        # Run initial check now; each round schedules the next one for when domains fall due
         logger.info("Running initial domain check...")
-        self.check_pending_domains()
-        
-        # Keep the scheduler running
-        while self.running:
-            try:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-            except KeyboardInterrupt:
-                logger.info("Monitoring interrupted by user")
-                break
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(60)  # Continue after error
+        self.timer.schedule_in(0, self._start_pending_check, name='check_pending_domains')
+        
+        # Keep the scheduler running; catches fire at their exact start time
+        try:
+            self.timer.run()
+        except KeyboardInterrupt:
+            logger.info("Monitoring interrupted by user")
         
         self.cleanup()
     
@@ -212,18 +337,19 @@ class DropScheduler:
         """Stop the monitoring loop"""
         logger.info("Stopping domain monitoring...")
         self.running = False
+        self.timer.stop()
     
     def cleanup(self):
         """Clean up resources"""
         logger.info("Cleaning up resources...")
-        self.catcher.cleanup()
+        self.catcher.shutdown(wait=False)
         
         # Print final summary
         if self.scheduled_domains:
             logger.info("Scheduled domains summary:")
             for domain, info in self.scheduled_domains.items():
-                status = info['status']
-                scheduled_time = info['scheduled_time']
+                status = info.status
+                scheduled_time = info.scheduled_time.isoformat()
                 logger.info(f"  {domain}: {status} (scheduled: {scheduled_time})")
         else:
             logger.info("No domains were scheduled")
@@ -0,0 +1,232 @@
+"""
+Sharded monitoring
+
+Each worker process or node sets a unique SHARD_NODE_ID and renews a lease in
+the shard_nodes table. Live nodes are placed on a consistent-hash ring (with
+virtual nodes), and every node sweeps only the domains the ring assigns to
+it. Adding or removing a node moves only about 1/N of the domains, and a
+node that dies stops renewing its lease, so its slice passes to the
+survivors once the lease expires. Catches are additionally guarded by a
+claim in shard_claims so two nodes never work the same drop while
+membership is changing.
+"""
+import atexit
+import bisect
+import hashlib
+import os
+import socket
+import threading
+import time
+import logging
+from config import (
+    SHARD_NODE_ID, SHARD_DATABASE_FILE, SHARD_VNODES, SHARD_HEARTBEAT_INTERVAL, SHARD_LEASE_TTL,
+    SHARD_CLAIM_TTL
+)
+from logging_setup import configure_logging
+from database import DomainDatabase
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+def ring_hash(key):
+    """Stable 64-bit position on the ring (the same in every process and on every host)"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes; immutable once built"""
+
+    def __init__(self, nodes, vnodes=SHARD_VNODES):
+        self.nodes = tuple(sorted(set(nodes)))
+        self.vnodes = vnodes
+        points = sorted(
+            (ring_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(vnodes)
+        )
+        self.hashes = [point for point, _ in points]
+        self.owners = [node for _, node in points]
+
+    def node_for(self, key):
+        """Node that owns key: the first virtual node clockwise from the key's hash"""
+        if not self.hashes:
+            return None
+        index = bisect.bisect(self.hashes, ring_hash(key))
+        return self.owners[index % len(self.owners)]
+
+    def with_nodes(self, nodes):
+        """A new ring over nodes with the same number of virtual nodes"""
+        return HashRing(nodes, self.vnodes)
+
+
+class ShardCoordinator:
+    """Lease-based membership and work claims for one node"""
+
+    def __init__(self, node_id, db=None, vnodes=SHARD_VNODES, lease_ttl=SHARD_LEASE_TTL,
+                 heartbeat_interval=SHARD_HEARTBEAT_INTERVAL, claim_ttl=SHARD_CLAIM_TTL):
+        self.node_id = node_id
+        self.db = db or DomainDatabase(SHARD_DATABASE_FILE)
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.claim_ttl = claim_ttl
+        self.host = socket.gethostname()
+        self.ring = HashRing([node_id], vnodes)  # Replaced wholesale when membership changes
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def members(self):
+        return self.ring.nodes
+
+    def start(self):
+        """Take a lease, learn the current members and keep renewing in the background"""
+        self.heartbeat()
+        self.thread = threading.Thread(target=self._heartbeat_loop, name='shard-heartbeat', daemon=True)
+        self.thread.start()
+        logger.info(f"Shard node {self.node_id} started ({len(self.members)} live nodes: {', '.join(self.members)})")
+        return self
+
+    def stop(self):
+        """Stop renewing and give up the lease so the other nodes take over immediately"""
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.db.remove_shard_node(self.node_id)
+        logger.info(f"Shard node {self.node_id} left the ring")
+
+    def heartbeat(self):
+        """Renew this node's lease and rebuild the ring if membership changed"""
+        now = time.time()
+        self.db.heartbeat_shard_node(self.node_id, self.host, os.getpid(), now)
+        live = self.db.get_live_shard_nodes(now - self.lease_ttl)
+        if live is None:
+            # Database unavailable: keep the last known ring rather than claiming everything
+            return
+        members = tuple(sorted(set(live) | {self.node_id}))
+        if members != self.members:
+            previous = self.members
+            self.ring = self.ring.with_nodes(members)
+            logger.info(f"Shard membership changed: {', '.join(previous)} -> {', '.join(members)}")
+
+    def _heartbeat_loop(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"Shard heartbeat failed for {self.node_id}: {e}")
+
+    def owns(self, domain):
+        """True if this node is responsible for monitoring domain"""
+        return self.ring.node_for(domain) == self.node_id
+
+    def filter(self, domains):
+        """Yield the domains this node owns from any iterable"""
+        ring = self.ring  # One consistent view for the whole pass
+        node_id = self.node_id
+        for domain in domains:
+            if ring.node_for(domain) == node_id:
+                yield domain
+
+    def claim(self, key, ttl=None):
+        """Claim a unit of work (e.g. 'catch:example.com') across all nodes; True if this node has it"""
+        return self.db.claim_shard_work(key, self.node_id, time.time(), ttl or self.claim_ttl)
+
+    def release(self, key):
+        self.db.release_shard_work(key, self.node_id)
+
+    def stats(self):
+        return {
+            'node_id': self.node_id,
+            'members': list(self.members),
+            'share': round(1 / len(self.members), 4)
+        }
+
+
+coordinator = None
+coordinator_lock = threading.Lock()
+
+
+def get_coordinator():
+    """The process-wide coordinator when SHARD_NODE_ID is set, or None when unsharded"""
+    global coordinator
+    if not SHARD_NODE_ID:
+        return None
+    with coordinator_lock:
+        if coordinator is None:
+            coordinator = ShardCoordinator(SHARD_NODE_ID).start()
+            atexit.register(coordinator.stop)
+        return coordinator
+
+
+def _demo_node(node_id, db_file, domains, results, crash_event):
+    """One demo worker: report its slice, then again after the membership changes"""
+    node = ShardCoordinator(node_id, db=DomainDatabase(db_file), lease_ttl=2, heartbeat_interval=0.25).start()
+    while len(node.members) < 3:
+        time.sleep(0.05)
+    results.put(('phase1', node_id, sorted(node.filter(domains)), node.claim('catch:example.com')))
+
+    crash_event.wait()
+    while len(node.members) == 3:
+        time.sleep(0.05)
+    results.put(('phase2', node_id, sorted(node.filter(domains)), None))
+    node.stop()
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import tempfile
+
+    domains = [f"domain{i}.com" for i in range(20000)]
+
+    # Pure ring property: adding a 4th node moves about 1/4 of the keys
+    three = HashRing(['node-a', 'node-b', 'node-c'])
+    four = three.with_nodes(['node-a', 'node-b', 'node-c', 'node-d'])
+    moved = sum(three.node_for(domain) != four.node_for(domain) for domain in domains)
+    print(f"Adding a 4th node moves {moved / len(domains):.1%} of domains (ideal 25%)")
+
+    # Three worker processes sharing a SQLite lease table; node-c then crashes
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'shards.db')
+        DomainDatabase(db_file)  # Apply migrations once, before the workers start
+        results = multiprocessing.Queue()
+        crash_event = multiprocessing.Event()
+        workers = {
+            node_id: multiprocessing.Process(target=_demo_node, args=(node_id, db_file, domains, results, crash_event))
+            for node_id in ('node-a', 'node-b', 'node-c')
+        }
+        for worker in workers.values():
+            worker.start()
+
+        phase1 = {}
+        for _ in workers:
+            _, node_id, owned, claimed = results.get(timeout=30)
+            phase1[node_id] = (owned, claimed)
+        owned_sets = {node_id: set(owned) for node_id, (owned, _) in phase1.items()}
+        covered = set().union(*owned_sets.values())
+        overlap = sum(len(owned) for owned in owned_sets.values()) - len(covered)
+        print(f"3 nodes: slices {', '.join(f'{n}={len(s)}' for n, s in sorted(owned_sets.items()))}; "
+              f"{len(covered)}/{len(domains)} covered, {overlap} overlapping")
+        print(f"Catch claim for example.com won by: {[n for n, (_, c) in phase1.items() if c]}")
+
+        # Release the waiters first: a process killed inside Event.wait() would block set()
+        crash_event.set()
+        workers['node-c'].kill()  # No clean shutdown: its lease has to expire
+        crashed_at = time.monotonic()
+        phase2 = {}
+        for _ in range(2):
+            _, node_id, owned, _ = results.get(timeout=30)
+            phase2[node_id] = set(owned)
+        rebalance_seconds = time.monotonic() - crashed_at
+        covered = set().union(*phase2.values())
+        reassigned = sum(len(phase2[n] - owned_sets[n]) for n in phase2)
+        kept = all(owned_sets[n] <= phase2[n] for n in phase2)
+        print(f"node-c crashed: survivors took over in {rebalance_seconds:.1f}s; {len(covered)}/{len(domains)} covered, "
+              f"{reassigned} domains reassigned (node-c had {len(owned_sets['node-c'])}), "
+              f"survivors kept their own slices: {kept}")
+
+        for worker in workers.values():
+            worker.join(timeout=10)
@@ -0,0 +1,327 @@
+"""
+Offline drop simulation for tuning the catch settings
+
+Replays a drop schedule on a VirtualClock through the real DropScheduler ->
+CatchExecutor -> DomainCatcher path, against a simulated registry instead of
+Dynadot, so a week of drops runs in seconds. Every configuration (strategy,
+burst interval, lead time, catch window) replays the same schedule and is
+reported as catch rate, registry requests per drop and the delay from the
+actual drop to our register command.
+
+The registry answers after a simulated round trip (latency +/- jitter) that
+moves the catch's clock forward. A domain is available from its actual drop
+instant until a competitor or we register it. Catches run with one probe
+connection: pipelining overlaps round trips in real time, which
+benchmarks/bench_scenarios.py measures against the mock server.
+
+    python simulation.py --drops 200 --days 7
+    python simulation.py --schedule drops.json --strategies burst --intervals 0.05,0.1 --output sim.json
+
+A schedule file is a JSON list of {"domain", "registrar", "drop_at" (epoch
+seconds), "competitor_delay" (seconds after the drop, null for none) and
+optionally "detected_at" (epoch seconds, default one day before the drop)}.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from catch_executor import CatchExecutor
+from catch_strategy import BurstStrategy, ConstantStrategy
+from catcher import DomainCatcher
+from clock import VirtualClock
+from config import REGISTRAR_DROP_TIMES, MAX_CONCURRENT_CATCHES
+from scheduler import DropScheduler
+
+
+class SimulatedRegistry:
+    """Drop instants and competitors per domain; availability is judged when a request arrives"""
+
+    def __init__(self, drops, latency=0.03, jitter=0.01, seed=1):
+        self.drops = {drop['domain']: drop for drop in drops}
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.rngs = {}  # domain -> Random, so each catch's round trips replay identically
+        self.requests = Counter()  # domain -> search and register requests
+        self.seen_available = set()
+        self.caught = {}  # domain -> epoch seconds our register command reached the registry
+
+    def client(self, clock):
+        """A Dynadot stand-in whose requests take time on clock"""
+        return SimulatedDynadotClient(self, clock)
+
+    def round_trip(self, domain, clock):
+        """Advance clock by one round trip; returns the instant the request reached the registry"""
+        with self.lock:
+            rng = self.rngs.setdefault(domain, random.Random(f"{self.seed}:{domain}"))
+            self.requests[domain] += 1
+        rtt = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        arrival = clock.time() + rtt / 2
+        clock.advance(rtt)
+        return arrival
+
+    def is_available(self, domain, instant):
+        drop = self.drops.get(domain)
+        if drop is None or instant < drop['drop_at'] or domain in self.caught:
+            return False
+        delay = drop.get('competitor_delay')
+        return delay is None or instant < drop['drop_at'] + delay
+
+    def search(self, domain, clock):
+        arrival = self.round_trip(domain, clock)
+        with self.lock:
+            available = self.is_available(domain, arrival)
+            if available:
+                self.seen_available.add(domain)
+        return available
+
+    def register(self, domain, clock):
+        arrival = self.round_trip(domain, clock)
+        with self.lock:
+            if not self.is_available(domain, arrival):
+                return False, 'Domain not available'
+            self.caught[domain] = arrival
+        return True, f"Registered {domain}"
+
+
+class SimulatedDynadotClient:
+    """The DynadotAPI calls the catcher makes, answered by a SimulatedRegistry"""
+    api_url = 'sim://dynadot'
+    api_key = 'sim'
+
+    def __init__(self, registry, clock):
+        self.registry = registry
+        self.clock = clock
+
+    def check_domain_availability(self, domain):
+        return self.registry.search(domain.lower(), self.clock)
+
+    def check_many(self, domains):
+        return {domain: self.check_domain_availability(domain) for domain in domains}
+
+    def register_domain(self, domain):
+        return self.registry.register(domain.lower(), self.clock)
+
+    def prewarm(self, connections=None):
+        return 0
+
+
+class RecordingNotifier:
+    """Stands in for NotificationManager: counts notifications instead of sending them"""
+
+    def __init__(self):
+        self.sent = Counter()
+        self.lock = threading.Lock()
+
+    def _record(self, notification_type):
+        with self.lock:
+            self.sent[notification_type] += 1
+
+    def send_success_notification(self, domain, details=None):
+        self._record('success')
+
+    def send_failure_notification(self, domain, reason=None):
+        self._record('failure')
+
+    def send_monitoring_notification(self, domain, status, registrar=None):
+        self._record('monitoring')
+
+    def send_scheduled_notification(self, domain, drop_time):
+        self._record('scheduled')
+
+    def send_notification(self, subject, body, notification_type="info"):
+        self._record(notification_type)
+
+    def flush(self, timeout=None):
+        return True
+
+    def close(self, timeout=5):
+        pass
+
+
+def synthetic_schedule(count, days, start, drop_early=10, drop_window=120, competition=0.3,
+                       competitor_delay=2.0, seed=1):
+    """count drops over the days after start at the registrars' usual hours.
+
+    The actual drop lands between drop_early seconds before and drop_window
+    seconds after the registrar's hour; with probability competition another
+    catcher registers the name an exponential competitor_delay (mean) later.
+    """
+    rng = random.Random(seed)
+    registrars = [name for name in REGISTRAR_DROP_TIMES if name != 'default']
+    first_day = datetime.fromtimestamp(start, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    drops = []
+    for i in range(count):
+        registrar = rng.choice(registrars)
+        drop_config = REGISTRAR_DROP_TIMES[registrar]
+        day = first_day + timedelta(days=1 + rng.randrange(days))
+        nominal = day.replace(hour=drop_config['hour'], minute=drop_config['minute']).timestamp()
+        drops.append({
+            'domain': f"sim{i}.com",
+            'registrar': registrar.title(),
+            'drop_at': nominal + rng.uniform(-drop_early, drop_window),
+            'competitor_delay': rng.expovariate(1 / competitor_delay) if rng.random() < competition else None,
+            'detected_at': day.timestamp() - rng.uniform(0.5, 4) * 86400
+        })
+    return drops
+
+
+def domain_info(drop):
+    """What the status checker reports for a pendingDelete domain: the deletion day, not the hour"""
+    drop_day = datetime.fromtimestamp(drop['drop_at'], timezone.utc).date()
+    return {
+        'domain': drop['domain'],
+        'status': 'pendingDelete',
+        'registrar': drop.get('registrar') or '',
+        'expiry_date': '',
+        'deletion_date': drop_day.isoformat()
+    }
+
+
+def make_strategy(name, interval):
+    """Strategy instance with interval as its fastest probe interval"""
+    if name == 'constant':
+        return ConstantStrategy(interval)
+    if name == 'burst':
+        return BurstStrategy(burst_interval=interval)
+    raise ValueError(f"Unknown catch strategy '{name}' (available: burst, constant)")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, or None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def run_config(drops, strategy, interval, lead_seconds, catch_minutes, args):
+    """Replay drops through a DropScheduler on a VirtualClock; returns the result row"""
+    start = min(drop.get('detected_at', drop['drop_at'] - 86400) for drop in drops) - 60
+    end = max(drop['drop_at'] for drop in drops) + catch_minutes * 60 + 3600
+    clock = VirtualClock(start)
+    registry = SimulatedRegistry(drops, latency=args.latency, jitter=args.jitter, seed=args.seed)
+    notifier = RecordingNotifier()
+
+    def catcher_factory(**kwargs):
+        catcher = DomainCatcher(**kwargs)
+        catcher.dynadot_api = registry.client(kwargs['clock'])
+        catcher.dynadot_key = 'sim'
+        return catcher
+
+    scheduler = DropScheduler(clock=clock)
+    scheduler.catcher.shutdown(wait=False)
+    scheduler.notifier = notifier
+    scheduler.catcher = CatchExecutor(notifier=notifier, max_concurrent=args.concurrency, clock=clock,
+                                      catcher_factory=catcher_factory)
+    scheduler.prewarm_api = registry.client(clock)
+    scheduler.catch_minutes = catch_minutes
+    scheduler.pipeline_depth = 1
+
+    catch_strategy = make_strategy(strategy, interval)
+    for drop in drops:
+        detected_at = drop.get('detected_at', drop['drop_at'] - 86400)
+        scheduler.timer.schedule_at(datetime.fromtimestamp(detected_at, timezone.utc),
+                                    scheduler.schedule_domain_catch, domain_info(drop),
+                                    name=f"detect:{drop['domain']}", lead_seconds=lead_seconds,
+                                    strategy=catch_strategy)
+
+    started = time.monotonic()
+    scheduler.timer.run_until(end)
+    scheduler.catcher.shutdown(wait=True)
+    elapsed = time.monotonic() - started
+
+    delays = [registry.caught[domain] - registry.drops[domain]['drop_at'] for domain in registry.caught]
+    requests = sum(registry.requests.values())
+    return {
+        'strategy': strategy,
+        'interval': interval,
+        'lead_seconds': lead_seconds,
+        'catch_minutes': catch_minutes,
+        'drops': len(drops),
+        'caught': len(registry.caught),
+        'catch_rate': round(len(registry.caught) / len(drops), 4),
+        'lost_race': len(registry.seen_available - set(registry.caught)),
+        'requests': requests,
+        'requests_per_drop': round(requests / len(drops), 1),
+        'drop_to_register_p50_ms': round(percentile(delays, 0.50) * 1000, 1) if delays else None,
+        'drop_to_register_p90_ms': round(percentile(delays, 0.90) * 1000, 1) if delays else None,
+        'simulated_days': round((end - start) / 86400, 2),
+        'elapsed_s': round(elapsed, 2)
+    }
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schedule', help='JSON drop schedule to replay (default: synthetic)')
+    parser.add_argument('--drops', type=int, default=100, help='synthetic drops (default 100)')
+    parser.add_argument('--days', type=int, default=7, help='synthetic drops spread over this many days')
+    parser.add_argument('--drop-early', type=float, default=10, help='drops up to this many seconds before the hour')
+    parser.add_argument('--drop-window', type=float, default=120, help='... and up to this many seconds after it')
+    parser.add_argument('--competition', type=float, default=0.3, help='share of drops another catcher goes for')
+    parser.add_argument('--competitor-delay', type=float, default=2.0, help='mean competitor delay after the drop (s)')
+    parser.add_argument('--latency', type=float, default=0.03, help='registry round trip in seconds')
+    parser.add_argument('--jitter', type=float, default=0.01, help='+/- round trip jitter in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--strategies', default='burst,constant', help='comma-separated catch strategies')
+    parser.add_argument('--intervals', default='0.05,0.25', help='comma-separated fastest probe intervals (s)')
+    parser.add_argument('--leads', default='300', help='comma-separated catch lead times before the drop (s)')
+    parser.add_argument('--catch-minutes', default='5,15', help='comma-separated catch windows after the drop')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_CATCHES, help='catch executor threads')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--verbose', action='store_true', help='keep the scheduler and catcher logs')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+
+    if args.schedule:
+        with open(args.schedule, 'r', encoding='utf-8') as f:
+            drops = json.load(f)
+    else:
+        drops = synthetic_schedule(args.drops, args.days, time.time(), drop_early=args.drop_early,
+                                   drop_window=args.drop_window, competition=args.competition,
+                                   competitor_delay=args.competitor_delay, seed=args.seed)
+    if not drops:
+        parser.error('the schedule has no drops')
+
+    grid = list(itertools.product(parse_list(args.strategies), parse_list(args.intervals, float),
+                                  parse_list(args.leads, float), parse_list(args.catch_minutes, float)))
+    output = os.path.abspath(args.output) if args.output else None
+    rows = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # The scheduler's domains.db for the run lives here
+        try:
+            for strategy, interval, lead_seconds, catch_minutes in grid:
+                row = run_config(drops, strategy, interval, lead_seconds, catch_minutes, args)
+                rows.append(row)
+                print(f"{strategy:8s} interval {interval:5.2f}s lead {lead_seconds:4.0f}s window {catch_minutes:4.1f}m: "
+                      f"caught {row['caught']}/{row['drops']} ({row['catch_rate']:.0%}, {row['lost_race']} lost races), "
+                      f"{row['requests_per_drop']:8.1f} requests/drop, "
+                      f"p50 {row['drop_to_register_p50_ms']} ms p90 {row['drop_to_register_p90_ms']} ms "
+                      f"[{row['simulated_days']} days in {row['elapsed_s']}s]")
+        finally:
+            os.chdir(cwd)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from config import STATUS_CACHE_MAX_ENTRIES, STATUS_CACHE_TTLS
+from logging_setup import configure_logging
+from domain_record import DomainRecord
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+class StatusCache:
+    """Bounded LRU cache of domain status with per-status TTLs, persisted to SQLite.
+
+    Lookups fall through to the status_cache table, so fresh results survive
+    a restart without another API call. Entries are DomainRecords; a record
+    is fresh until its checked_at plus the TTL of its status.
+    """
+
+    def __init__(self, db=None, max_entries=STATUS_CACHE_MAX_ENTRIES, ttls=None):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttls = ttls or STATUS_CACHE_TTLS
+        self.entries = OrderedDict()  # domain -> DomainRecord
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+        self.evictions = 0
+
+    def ttl_for(self, status):
+        """TTL in seconds for a status"""
+        return self.ttls.get(status, self.ttls['default'])
+
+    def warm(self):
+        """Load the most recent still-fresh entries from the database"""
+        if not self.db:
+            return 0
+
+        now = time.time()
+        max_ttl = max(self.ttls.values())
+        loaded = 0
+        for checked_at, domain_info in self.db.load_cached_statuses(now - max_ttl, self.max_entries):
+            record = DomainRecord.from_dict(domain_info, checked_at)
+            if self._is_fresh(record, now):
+                self._store(record)
+                loaded += 1
+
+        logger.info(f"Status cache warmed with {loaded} fresh entries from database")
+        return loaded
+
+    def _is_fresh(self, record, now):
+        return record.checked_at + self.ttl_for(record.status) > now
+
+    def get(self, domain):
+        """Return the fresh cached DomainRecord, or None on a miss"""
+        now = time.time()
+        with self.lock:
+            record = self.entries.get(domain)
+            if record:
+                if self._is_fresh(record, now):
+                    self.entries.move_to_end(domain)
+                    self.hits += 1
+                    return record
+                del self.entries[domain]
+
+        # Read through to the persisted cache
+        if self.db:
+            row = self.db.get_cached_status(domain)
+            if row:
+                record = DomainRecord.from_dict(row[1], row[0])
+                if self._is_fresh(record, now):
+                    self._store(record)
+                    with self.lock:
+                        self.hits += 1
+                        self.db_hits += 1
+                    return record
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, domain_info):
+        """Cache a fresh lookup result and persist it"""
+        self.put_many([domain_info])
+
+    def put_many(self, domain_infos):
+        """Cache several fresh lookup results (DomainRecords), persisting them in one transaction"""
+        records = [DomainRecord.from_dict(domain_info) for domain_info in domain_infos]
+        for record in records:
+            self._store(record)
+        if self.db:
+            self.db.save_cached_statuses([(record.checked_at, record) for record in records])
+
+    def _store(self, record):
+        domain = record.domain
+        with self.lock:
+            self.entries[domain] = record
+            self.entries.move_to_end(domain)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'db_hits': self.db_hits,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,167 @@
+"""
+Shared HTTP transport: pooled keep-alive sessions, cached DNS for their connections and pre-warming
+"""
+import socket
+import threading
+import time
+import logging
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib.parse import urlsplit
+from config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, DNS_CACHE_TTL, DNS_CACHE_SIZE, PREWARM_CONNECTIONS
+)
+from logging_setup import configure_logging
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'DomainCatcher/1.0'
+
+
+class DNSCache:
+    """Bounded LRU of resolved addresses with a TTL, used by the transport's connections only"""
+
+    def __init__(self, ttl=DNS_CACHE_TTL, max_entries=DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (host, port) -> (expires_at, address)
+        self.lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """An address for host (the cached one while fresh); host itself when caching is off"""
+        if self.ttl <= 0:
+            return host
+        key = (host, port)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][4][0]
+        with self.lock:
+            self.entries[key] = (now + self.ttl, address)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return address
+
+    def invalidate(self, host, port):
+        with self.lock:
+            self.entries.pop((host, port), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+dns_cache = DNSCache()
+
+
+class _CachedDNSMixin:
+    """Connect to the cached address of the host; TLS still verifies and sends the real hostname"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        self._dns_host = dns_cache.resolve(host, self.port)
+        try:
+            return super()._new_conn()
+        except Exception:
+            dns_cache.invalidate(host, self.port)  # The address may have moved; resolve again next time
+            raise
+        finally:
+            self._dns_host = host
+
+
+class CachedDNSHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class CachedDNSHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSHTTPConnection
+
+
+class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections resolve hosts through dns_cache"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CachedDNSHTTPConnectionPool,
+            'https': CachedDNSHTTPSConnectionPool,
+        }
+
+
+sessions = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(name='default', headers=None):
+    """Return the process-wide session for name, creating it with a sized keep-alive pool.
+
+    Sessions are shared between threads; each concurrent request gets its own
+    pooled connection, so callers must not close them.
+    """
+    with sessions_lock:
+        session = sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = CachedDNSAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+            if headers:
+                session.headers.update(headers)
+            sessions[name] = session
+        return session
+
+
+def prewarm(url, connections=PREWARM_CONNECTIONS, session=None):
+    """Open `connections` keep-alive connections to url's host so later requests skip DNS/TCP/TLS.
+
+    Requests are issued simultaneously so each one takes a separate pooled
+    connection. Returns how many connections were opened.
+    """
+    if connections < 1:
+        return 0
+    session = session or get_session()
+    parts = urlsplit(url)
+    base_url = f"{parts.scheme}://{parts.netloc}/"
+    barrier = threading.Barrier(connections)
+    opened = []
+
+    def open_connection():
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        try:
+            session.head(base_url, timeout=10, allow_redirects=False)
+            opened.append(1)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Pre-warm request to {base_url} failed: {e}")
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=open_connection, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed_ms = (time.monotonic() - start) * 1000
+    logger.info(f"Pre-warmed {len(opened)}/{connections} connections to {parts.netloc} in {elapsed_ms:.0f}ms")
+    return len(opened)
@@ -0,0 +1,146 @@
+"""
+Incremental watchlist loader
+
+Mirrors domains.txt into the domains table without holding the file in
+memory: lines are streamed, normalised (lowercase, no trailing dot, IDNs in
+xn-- form) and deduplicated by SQLite, and only domains that were added or
+removed since the last sync are written. An unchanged mtime/size skips the
+sync entirely; a changed mtime with identical content (same SHA-256) only
+updates the recorded state. The sweep reads domains back as a generator over
+keyset-paginated queries, so memory stays flat for lists of millions.
+"""
+import hashlib
+import os
+import logging
+from config import DOMAINS_FILE, WATCHLIST_PAGE_SIZE
+from logging_setup import configure_logging
+from database import DomainDatabase
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_domain(line):
+    """'  Derive.com  # note' -> 'derive.com'; None for blanks, comments and malformed lines"""
+    domain = line.strip().lower()
+    if '#' in domain or '/' in domain:
+        domain = domain.split('#', 1)[0].strip()
+        if '://' in domain:
+            domain = domain.split('://', 1)[1]
+        domain = domain.split('/', 1)[0]
+    if domain.endswith('.'):
+        domain = domain.rstrip('.')
+    if '.' not in domain or ' ' in domain or '\t' in domain:
+        return None
+    if not domain.isascii():
+        try:
+            domain = domain.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    return domain
+
+
+class Watchlist:
+    """domains.txt synced into the domains table and streamed back in pages"""
+
+    def __init__(self, path=DOMAINS_FILE, db=None, page_size=WATCHLIST_PAGE_SIZE):
+        self.path = path
+        self.db = db or DomainDatabase()
+        self.page_size = page_size
+        self.skipped = 0  # Malformed lines seen in the last read
+
+    @property
+    def key(self):
+        """Identifies this file in the watchlist_files table"""
+        return os.path.abspath(self.path)
+
+    def read(self):
+        """Yield normalised domains from the file, one line at a time (duplicates included)"""
+        self.skipped = 0
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                domain = normalize_domain(line)
+                if domain:
+                    yield domain
+                elif line.strip() and not line.lstrip().startswith('#'):
+                    self.skipped += 1
+
+    def file_hash(self):
+        """SHA-256 of the file contents, read in fixed-size chunks"""
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def refresh(self, force=False):
+        """Apply changes in the file to the domains table.
+
+        Returns {'changed', 'added', 'removed', 'total'}, or None if the file
+        could not be read or synced.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            logger.error(f"Error: {self.path} not found")
+            return None
+
+        state = self.db.get_watchlist_file(self.key)
+        unchanged = {'changed': False, 'added': 0, 'removed': 0, 'total': state['domains'] if state else 0}
+        if state and not force and (state['mtime_ns'], state['size']) == (stat.st_mtime_ns, stat.st_size):
+            return unchanged
+
+        try:
+            sha256 = self.file_hash()
+            if state and not force and state['sha256'] == sha256:
+                # Touched or rewritten with identical content
+                self.db.touch_watchlist_file(self.key, stat.st_mtime_ns, stat.st_size)
+                logger.debug(f"{self.path} modified but content unchanged")
+                return unchanged
+
+            # The stat is taken before reading, so an edit made during the sync triggers another one
+            result = self.db.sync_watchlist(self.key, self.read(), stat.st_mtime_ns, stat.st_size, sha256)
+        except OSError as e:
+            logger.error(f"Error reading {self.path}: {e}")
+            return None
+
+        if result is None:
+            return None
+
+        added, removed, total = result
+        if self.skipped:
+            logger.warning(f"Skipped {self.skipped} malformed lines in {self.path}")
+        logger.info(f"Watchlist synced from {self.path}: {total} domains ({added} added, {removed} removed)")
+        return {'changed': True, 'added': added, 'removed': removed, 'total': total}
+
+    def domains(self):
+        """Yield watched domains in name order, one keyset page at a time.
+
+        Domains added or removed while iterating are picked up or skipped
+        if they sort after the current page.
+        """
+        after = ''
+        while True:
+            page = self.db.get_watched_domains_page(after, self.page_size)
+            if not page:
+                return
+            yield from page
+            after = page[-1]
+
+    def __iter__(self):
+        return self.domains()
+
+    def count(self):
+        """Number of watched domains"""
+        return self.db.count_watched_domains()
+
+
+if __name__ == "__main__":
+    watchlist = Watchlist()
+    print(f"Sync: {watchlist.refresh()}")
+    print(f"Watched domains: {watchlist.count()}")
+    for domain in watchlist:
+        print(f"- {domain}")
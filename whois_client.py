@@ -0,0 +1,192 @@
+"""
+Native port-43 WHOIS client
+
+Talks to WHOIS servers directly over TCP instead of spawning the system
+`whois` command per domain. Servers are picked from a per-TLD map (unknown
+TLDs are looked up once via whois.iana.org), registry answers are followed to
+the registrar's server when they name one, and each server gets its own
+concurrency limit so one slow registry cannot tie up every worker.
+"""
+import asyncio
+import socket
+import threading
+import time
+import logging
+from config import (
+    WHOIS_TIMEOUT, WHOIS_SERVER_CONCURRENCY, WHOIS_FOLLOW_REFERRALS
+)
+from logging_setup import configure_logging
+from whois_parser import parse_whois
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+IANA_WHOIS_SERVER = 'whois.iana.org'
+WHOIS_PORT = 43
+MAX_RESPONSE_BYTES = 1024 * 1024
+
+# Registry WHOIS servers for common TLDs
+WHOIS_SERVERS = {
+    'com': 'whois.verisign-grs.com',
+    'net': 'whois.verisign-grs.com',
+    'org': 'whois.pir.org',
+    'info': 'whois.nic.info',
+    'biz': 'whois.nic.biz',
+    'io': 'whois.nic.io',
+    'co': 'whois.nic.co',
+    'me': 'whois.nic.me',
+    'ai': 'whois.nic.ai',
+    'xyz': 'whois.nic.xyz',
+    'app': 'whois.nic.google',
+    'dev': 'whois.nic.google',
+    'us': 'whois.nic.us',
+    'uk': 'whois.nic.uk',
+    'de': 'whois.denic.de',
+    'fr': 'whois.nic.fr',
+    'nl': 'whois.domain-registry.nl',
+    'eu': 'whois.eu',
+    'jp': 'whois.jprs.jp',
+    'ru': 'whois.tcinet.ru',
+    'ca': 'whois.cira.ca',
+    'au': 'whois.auda.org.au',
+}
+
+# Servers that need more than the bare domain name in the query
+QUERY_FORMATS = {
+    'whois.denic.de': '-T dn,ace {domain}',
+    'whois.jprs.jp': '{domain}/e',
+}
+
+
+def to_ascii(domain):
+    """Lowercase domain and convert internationalised names to their xn-- form"""
+    domain = domain.strip().lower().rstrip('.')
+    return domain if domain.isascii() else domain.encode('idna').decode('ascii')
+
+
+class WhoisClient:
+    """Thread-safe port-43 WHOIS client with per-server concurrency limits"""
+
+    def __init__(self, servers=None, port=WHOIS_PORT, addresses=None, timeout=WHOIS_TIMEOUT,
+                 max_per_server=WHOIS_SERVER_CONCURRENCY, follow_referrals=WHOIS_FOLLOW_REFERRALS):
+        self.servers = dict(WHOIS_SERVERS if servers is None else servers)
+        self.port = port
+        # Optional server -> (host, port) overrides, e.g. to point every server at a local stub
+        self.addresses = addresses or {}
+        self.timeout = timeout
+        self.max_per_server = max_per_server
+        self.follow_referrals = follow_referrals
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def server_for(self, domain):
+        """Registry WHOIS server for domain's TLD, asking IANA once for unknown TLDs"""
+        tld = domain.rsplit('.', 1)[-1].lower()
+        server = self.servers.get(tld)
+        if server:
+            return server
+
+        record = parse_whois(self.query(IANA_WHOIS_SERVER, tld))
+        server = record.refer
+        if not server:
+            raise LookupError(f"No WHOIS server known for .{tld}")
+        with self.lock:
+            self.servers[tld] = server
+        logger.info(f"Discovered WHOIS server for .{tld}: {server}")
+        return server
+
+    def query(self, server, text):
+        """Send one query to server and return the raw response text.
+
+        timeout bounds the whole exchange (connect, send and every read), so a
+        server trickling bytes cannot hold a worker longer than that.
+        """
+        host, port = self.addresses.get(server, (server, self.port))
+        with self._semaphore(server):
+            deadline = time.monotonic() + self.timeout
+            with socket.create_connection((host, port), timeout=self.timeout) as sock:
+                sock.settimeout(self._remaining(deadline, server))
+                sock.sendall(text.encode('ascii') + b'\r\n')
+                chunks = []
+                received = 0
+                while received < MAX_RESPONSE_BYTES:
+                    sock.settimeout(self._remaining(deadline, server))
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    received += len(chunk)
+
+        return b''.join(chunks).decode('utf-8', errors='replace')
+
+    def _remaining(self, deadline, server):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout(f"WHOIS query to {server} exceeded {self.timeout}s")
+        return remaining
+
+    def lookup_raw(self, domain):
+        """Return (registry server, raw registry response) for domain"""
+        domain = to_ascii(domain)
+        server = self.server_for(domain)
+        query = QUERY_FORMATS.get(server, '{domain}').format(domain=domain)
+        return server, self.query(server, query)
+
+    def lookup(self, domain):
+        """Look up domain and return a parsed WhoisRecord.
+
+        The registry answer is authoritative for status; if it names a
+        registrar WHOIS server, that answer fills in registrar and expiry.
+        Network errors propagate as OSError.
+        """
+        domain = to_ascii(domain)
+        server, response = self.lookup_raw(domain)
+        record = parse_whois(response)
+
+        referral = record.whois_server
+        if self.follow_referrals and referral and referral != server and not record.not_found:
+            try:
+                record.merge(parse_whois(self.query(referral, domain)))
+            except OSError as e:
+                # The registry answer is enough to decide the status
+                logger.debug(f"Referral to {referral} for {domain} failed: {e}")
+
+        return record
+
+    async def lookup_async(self, domain):
+        """lookup() for asyncio callers; runs the blocking socket I/O in a worker thread"""
+        return await asyncio.to_thread(self.lookup, domain)
+
+    async def lookup_many_async(self, domains):
+        """Look up several domains concurrently; per-server limits still apply.
+
+        Returns {domain: WhoisRecord or None}.
+        """
+        results = await asyncio.gather(*(self.lookup_async(domain) for domain in domains),
+                                       return_exceptions=True)
+        lookups = {}
+        for domain, result in zip(domains, results):
+            if isinstance(result, Exception):
+                logger.error(f"WHOIS lookup failed for {domain}: {result}")
+                result = None
+            lookups[domain] = result
+        return lookups
+
+    def _semaphore(self, server):
+        with self.lock:
+            semaphore = self.semaphores.get(server)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_server)
+                self.semaphores[server] = semaphore
+            return semaphore
+
+
+if __name__ == "__main__":
+    import sys
+
+    client = WhoisClient()
+    for name in sys.argv[1:] or ['example.com']:
+        result = client.lookup(name)
+        print(f"{name}: {result.status} (registrar: {result.registrar}, expiry: {result.expiry_raw}, "
+              f"epp: {', '.join(result.statuses) or '-'})")
@@ -0,0 +1,218 @@
+"""
+Single-pass WHOIS response parser
+
+Walks the raw WHOIS text once with a single precompiled pattern that only
+stops on lines starting with a known key, then maps each key to a field via a
+dict lookup. Value regexes (status codes, dates) are also precompiled and only
+run on the values they apply to.
+"""
+import re
+from datetime import datetime, timezone
+
+# Normalised key -> field. Keys are lowercased and whitespace-collapsed.
+FIELD_MAP = {
+    'domain status': 'status',
+    'status': 'status',
+    'state': 'status',
+    'registration status': 'status',
+    'registrar': 'registrar',
+    'registrar name': 'registrar',
+    'sponsoring registrar': 'registrar',
+    'registrar organization': 'registrar',
+    'registrar organisation': 'registrar',
+    'registry expiry date': 'expiry',
+    'registrar registration expiration date': 'expiry',
+    'expiry date': 'expiry',
+    'expiration date': 'expiry',
+    'expiration time': 'expiry',
+    'expire date': 'expiry',
+    'expires': 'expiry',
+    'expires on': 'expiry',
+    'expire': 'expiry',
+    'paid-till': 'expiry',
+    'renewal date': 'expiry',
+    'registrar whois server': 'whois_server',
+    'whois server': 'whois_server',
+    'refer': 'refer',
+    'whois': 'refer',
+}
+
+# Status codes (normalised: lowercase, no spaces/underscores) that mean the domain is being deleted
+PENDING_DELETE_CODES = frozenset({
+    'pendingdelete', 'redemptionperiod', 'pendingdeleteperiod', 'redemption',
+    'pendingpurge', 'pendingrelease'
+})
+
+# Matched against lowercased text
+NOT_FOUND_RE = re.compile(
+    r'^\s*(?:no match for|not found|no data found|no entries found|domain not found|'
+    r'no object found|the queried object does not exist|status:\s*(?:free|available)|'
+    r'.*\bis available for registration|%% no entries found)',
+    re.MULTILINE
+)
+
+# "key: value" (any indentation) or JPRS-style "[key]   value", for known keys only.
+# Runs against lowercased text with a leading newline; the literal "\n" prefix lets
+# the regex engine skip straight to line starts.
+FIELD_RE = re.compile(
+    r'\n[ \t]*\[?(' +
+    '|'.join(re.escape(key).replace('\\ ', '[ \t]+') for key in sorted(FIELD_MAP, key=len, reverse=True)) +
+    r')(?:\]|[ \t]*:)[ \t]*([^\r\n]*)'
+)
+NEXT_VALUE_RE = re.compile(r'[ \t]*\r?\n[ \t]*(\S[^\r\n]*)')
+
+STATUS_CODE_RE = re.compile(r'^([A-Za-z][A-Za-z _-]*?)(?:\s+\(?https?://|\s*\(|$)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+DATE_RE = re.compile(
+    # 2025-03-14T04:00:00Z, 2025-03-14 04:00:00, 2025-03-14, 2025.03.14, 2025/03/14
+    r'(?P<y1>\d{4})[-./](?P<m1>\d{1,2})[-./](?P<d1>\d{1,2})'
+    r'(?:[T ](?P<H>\d{1,2}):(?P<M>\d{2})(?::(?P<S>\d{2}))?)?'
+    # 14-Mar-2025, 14 March 2025
+    r'|(?P<d2>\d{1,2})[- ](?P<mon2>[A-Za-z]{3})[A-Za-z]*\.?[- ](?P<y2>\d{4})'
+    # 14.03.2025, 14/03/2025
+    r'|(?P<d3>\d{1,2})[./](?P<m3>\d{1,2})[./](?P<y3>\d{4})'
+    # Mar 14 2025
+    r'|(?P<mon4>[A-Za-z]{3})[A-Za-z]*\.? (?P<d4>\d{1,2}),? (?P<y4>\d{4})'
+)
+
+
+class WhoisRecord:
+    """Structured result of parsing one WHOIS response"""
+    __slots__ = ('statuses', 'registrar', 'expiry', 'expiry_raw', 'whois_server', 'refer', 'not_found')
+
+    def __init__(self):
+        self.statuses = []
+        self.registrar = None
+        self.expiry = None  # aware UTC datetime
+        self.expiry_raw = None
+        self.whois_server = None
+        self.refer = None
+        self.not_found = False
+
+    @property
+    def is_pending_delete(self):
+        return any(normalize_status(code) in PENDING_DELETE_CODES for code in self.statuses)
+
+    def status_at(self, now=None):
+        """Lifecycle status: available, pendingDelete, expired, registered or unknown"""
+        if self.not_found:
+            return 'available'
+        if self.is_pending_delete:
+            return 'pendingDelete'
+        if self.expiry and self.expiry < (now or datetime.now(timezone.utc)):
+            return 'expired'
+        if self.statuses or self.registrar or self.expiry:
+            return 'registered'
+        return 'unknown'
+
+    @property
+    def status(self):
+        return self.status_at()
+
+    def merge(self, other):
+        """Fill gaps from another record (e.g. the registrar's answer after a referral)"""
+        if not self.statuses:
+            self.statuses = other.statuses
+        self.registrar = self.registrar or other.registrar
+        if self.expiry is None:
+            self.expiry, self.expiry_raw = other.expiry, other.expiry_raw
+        return self
+
+    def to_domain_info(self, domain, source='free_whois'):
+        """Convert to the domain_info dict used by DomainStatusChecker"""
+        return {
+            'domain': domain,
+            'status': self.status,
+            'expiry_date': self.expiry.isoformat() if self.expiry else (self.expiry_raw or ''),
+            'registrar': self.registrar or 'unknown',
+            'epp_status': list(self.statuses),
+            'last_updated': datetime.now().isoformat(),
+            'source': source
+        }
+
+
+def normalize_status(code):
+    """'pendingDelete', 'PENDING DELETE' and 'pending_delete' all become 'pendingdelete'"""
+    return code.lower().replace(' ', '').replace('_', '').replace('-', '')
+
+
+def parse_date(value):
+    """Parse the date formats common in WHOIS output into an aware UTC datetime, or None"""
+    match = DATE_RE.search(value)
+    if not match:
+        return None
+    groups = match.groupdict()
+    try:
+        if groups['y1']:
+            return datetime(int(groups['y1']), int(groups['m1']), int(groups['d1']),
+                            int(groups['H'] or 0), int(groups['M'] or 0), int(groups['S'] or 0),
+                            tzinfo=timezone.utc)
+        if groups['y2']:
+            return datetime(int(groups['y2']), MONTHS[groups['mon2'][:3].lower()], int(groups['d2']),
+                            tzinfo=timezone.utc)
+        if groups['y3']:
+            return datetime(int(groups['y3']), int(groups['m3']), int(groups['d3']), tzinfo=timezone.utc)
+        return datetime(int(groups['y4']), MONTHS[groups['mon4'][:3].lower()], int(groups['d4']),
+                        tzinfo=timezone.utc)
+    except (KeyError, ValueError):
+        return None
+
+
+def parse_whois(text):
+    """Parse a raw WHOIS response into a WhoisRecord in a single pass"""
+    record = WhoisRecord()
+    field_map = FIELD_MAP
+
+    # Match keys case-sensitively on a lowered copy (IGNORECASE is several times
+    # slower) and slice values from the original so registrar names keep their case
+    lowered = '\n' + text.lower()
+    original = '\n' + text
+    if len(original) != len(lowered):
+        # A few non-ASCII characters change length when lowered; offsets would drift
+        original = lowered
+
+    # FIELD_RE only tries to match at newlines and only stops on known keys
+    for match in FIELD_RE.finditer(lowered):
+        field = field_map[' '.join(match.group(1).split())]
+        start, end = match.span(2)
+        value = original[start:end].rstrip()
+        if not value:
+            # Value on the next line (Nominet/EURid style blocks)
+            next_line = NEXT_VALUE_RE.match(original, match.end())
+            if not next_line:
+                continue
+            value = next_line.group(1).rstrip()
+        _set_field(record, field, value)
+
+    if not (record.statuses or record.registrar or record.expiry_raw) and NOT_FOUND_RE.search(lowered):
+        record.not_found = True
+    return record
+
+
+def _set_field(record, field, value):
+    if field == 'status':
+        match = STATUS_CODE_RE.match(value)
+        code = (match.group(1) if match else value).strip()
+        if normalize_status(code) in ('free', 'available'):
+            record.not_found = True
+        elif code and code not in record.statuses:
+            record.statuses.append(code)
+    elif field == 'registrar':
+        if not record.registrar:
+            record.registrar = WHITESPACE_RE.sub(' ', value)
+    elif field == 'expiry':
+        if record.expiry_raw is None:
+            record.expiry_raw = value
+            record.expiry = parse_date(value)
+    elif field == 'whois_server':
+        # Some registries publish the registrar server as a URL
+        server = value.lower().split('://', 1)[-1].strip('/')
+        record.whois_server = record.whois_server or server
+    elif field == 'refer':
+        record.refer = record.refer or value.lower()